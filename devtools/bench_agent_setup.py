@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of per-call setup overhead: constructing a model and agent for
+every metric call (the old behavior) vs reusing them from the model registry.
+
+Only setup is timed, so no API calls are made and no API key is needed.
+
+Usage: uv run python devtools/bench_agent_setup.py [--calls N] [--model NAME]
+"""
+
+import argparse
+import os
+import timeit
+
+from pydantic_ai import Agent
+from pydantic_ai.models import infer_model
+from rich import print as rprint
+
+from leximetry.eval.evaluate_text import METRIC_INSTRUCTIONS
+from leximetry.eval.model_registry import clear_registry, get_agent, get_model
+
+
+def setup_per_call(model_name: str) -> None:
+    Agent(model=infer_model(model_name), output_type=str, instructions=METRIC_INSTRUCTIONS)
+
+
+def setup_from_registry(model_name: str) -> None:
+    get_agent(get_model(model_name), str, METRIC_INSTRUCTIONS)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    args = parser.parse_args()
+
+    # Clients are constructed but never used, so a placeholder key is fine.
+    for key in ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GEMINI_API_KEY"):
+        os.environ.setdefault(key, "benchmark-placeholder")
+
+    clear_registry()
+    results = {
+        "per call": timeit.timeit(lambda: setup_per_call(args.model), number=args.calls),
+        "registry": timeit.timeit(lambda: setup_from_registry(args.model), number=args.calls),
+    }
+
+    rprint(f"Setup overhead for {args.calls} calls with {args.model}:")
+    for name, total in results.items():
+        rprint(f"  {name:>10}: {total / args.calls * 1e6:9.1f} µs/call")
+    rprint(f"  {'speedup':>10}: {results['per call'] / results['registry']:9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
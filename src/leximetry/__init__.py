@@ -1,3 +1,56 @@
-from leximetry.cli.cli_main import main
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
 
-__all__ = ("main",)
+if TYPE_CHECKING:
+    from leximetry.cli.cli_main import main
+    from leximetry.eval.doc_analysis import DocAnalysis
+    from leximetry.eval.evaluate_batch import (
+        TextResult,
+        evaluate_texts_async,
+        iter_evaluate_texts,
+    )
+    from leximetry.eval.evaluate_text import evaluate_text, evaluate_text_async
+    from leximetry.eval.metrics_model import ProseMetrics, RubricMetrics, Score, ScoringRubric
+    from leximetry.eval.score_cache import ScoreCache
+    from leximetry.utils.aio_limited import CallLimiter
+
+_EXPORTS = {
+    "main": "leximetry.cli.cli_main",
+    "evaluate_text": "leximetry.eval.evaluate_text",
+    "evaluate_text_async": "leximetry.eval.evaluate_text",
+    "evaluate_texts_async": "leximetry.eval.evaluate_batch",
+    "iter_evaluate_texts": "leximetry.eval.evaluate_batch",
+    "TextResult": "leximetry.eval.evaluate_batch",
+    "DocAnalysis": "leximetry.eval.doc_analysis",
+    "ProseMetrics": "leximetry.eval.metrics_model",
+    "RubricMetrics": "leximetry.eval.metrics_model",
+    "ScoringRubric": "leximetry.eval.metrics_model",
+    "Score": "leximetry.eval.metrics_model",
+    "ScoreCache": "leximetry.eval.score_cache",
+    "CallLimiter": "leximetry.utils.aio_limited",
+}
+
+__all__ = (  # noqa: RUF022
+    "main",
+    "evaluate_text",
+    "evaluate_text_async",
+    "evaluate_texts_async",
+    "iter_evaluate_texts",
+    "TextResult",
+    "DocAnalysis",
+    "ProseMetrics",
+    "RubricMetrics",
+    "ScoringRubric",
+    "Score",
+    "ScoreCache",
+    "CallLimiter",
+)
+
+
+def __getattr__(name: str) -> Any:
+    # Import exports lazily, so importing any leximetry module doesn't load the
+    # CLI or the evaluation stack and everything they depend on.
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(module), name)
@@ -1,30 +1,53 @@
 """
 Leximetry CLI.
 
+Run `leximetry serve` to start a daemon that keeps models, connections, and
+caches warm. Later single-file runs are then forwarded to it automatically.
+
 For more information: https://github.com/jlevy/leximetry
 """
 
+from __future__ import annotations
+
 import argparse
+import json
+import logging
 import sys
+from contextlib import ExitStack
 from importlib.metadata import version
 from pathlib import Path
 from textwrap import dedent
-from typing import Literal
+from typing import TYPE_CHECKING, Any, Literal
 
-from chopdiff.docs import TextDoc
-from clideps.env_vars.dotenv_utils import load_dotenv_paths
 from clideps.utils.readable_argparse import ReadableColorFormatter, get_readable_console_width
 from rich import print as rprint
-from rich.console import Console
 
-from leximetry.cli.rich_styles import LEXIMETRY_THEME
-from leximetry.eval.evaluate_text import evaluate_text
-from leximetry.eval.report_output import format_complete_analysis
+from leximetry.eval.eval_options import (
+    AGGREGATIONS,
+    CACHE_DIR_ENV,
+    DEFAULT_SAMPLE_TOKENS,
+    EVAL_STRATEGIES,
+)
+
+# Everything else is imported in main() after parsing arguments, so `--help`
+# and `--version` don't load the evaluation stack and provider SDKs.
+
+if TYPE_CHECKING:
+    from leximetry.eval.call_trace import CallTracer
+    from leximetry.eval.doc_analysis import DocAnalysis
+    from leximetry.eval.metrics_model import RubricMetrics
+    from leximetry.eval.sampling import TextSample
+    from leximetry.eval.score_cache import ScoreCache
+    from leximetry.utils.aio_limited import CallLimiter
+
+log = logging.getLogger(__name__)
 
 APP_NAME = "leximetry"
 
 DESCRIPTION = """Leximetry: Measure your words"""
 
+SERVE_DESCRIPTION = """Leximetry daemon: evaluate texts sent by other leximetry runs over a Unix socket, reusing loaded models, connections, caches, and rate limits"""
+
 
 def get_version_name() -> str:
     """Get formatted version string"""
@@ -35,6 +58,108 @@ def get_version_name() -> str:
         return "(unknown version)"
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def add_log_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--version", action="version", version=get_version_name())
+    parser.add_argument(
+        "--debug", action="store_true", help="enable debug logging (log level: debug)"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="enable verbose logging (log level: info)"
+    )
+    parser.add_argument("--quiet", action="store_true", help="only log errors (log level: error)")
+
+
+def add_cache_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the on-disk score cache",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached scores and re-evaluate, updating the cache with new results",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        help=f"Directory for the score cache (default: ${CACHE_DIR_ENV} or ~/.cache/leximetry/scores)",
+    )
+
+
+def add_limit_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-concurrent",
+        type=positive_int,
+        help="Maximum number of concurrent LLM calls, shared across all documents (default depends on the model's provider)",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=positive_float,
+        help="Maximum LLM requests per second, shared across all documents (default depends on the model's provider)",
+    )
+    parser.add_argument(
+        "--max-tpm",
+        type=positive_int,
+        help="Maximum estimated LLM tokens per minute (prompt plus completion), shared across all documents",
+    )
+    parser.add_argument(
+        "--fixed-limits",
+        action="store_true",
+        help="Always run at --max-concurrent and --max-rps instead of adapting to rate limit errors and latency",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        help="Retries per LLM call after rate limit, timeout, or server errors",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds before an LLM call attempt times out and is retried",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Seconds before giving up on an LLM call, including all retries",
+    )
+
+
+def add_trace_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--trace",
+        type=str,
+        help="Append a JSONL event per LLM call (timing, waits, tokens, retries, estimated cost) to this file",
+    )
+    parser.add_argument(
+        "--otel",
+        action="store_true",
+        help="Also export each LLM call as an OpenTelemetry span to the configured tracer provider",
+    )
+
+
+def add_socket_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help="Unix socket of the leximetry daemon (default: $LEXIMETRY_SOCKET, or leximetry.sock in $XDG_RUNTIME_DIR or ~/.cache/leximetry)",
+    )
+
+
 def build_parser() -> argparse.ArgumentParser:
     """Build the main argument parser"""
     parser = argparse.ArgumentParser(
@@ -42,30 +167,135 @@ def build_parser() -> argparse.ArgumentParser:
         epilog=dedent((__doc__ or "") + "\n\n" + get_version_name()),
         description=DESCRIPTION,
     )
-    parser.add_argument("--version", action="version", version=get_version_name())
+    add_log_args(parser)
     parser.add_argument(
-        "--debug", action="store_true", help="enable debug logging (log level: debug)"
+        "--model",
+        type=str,
+        default="gpt-4o",
+        help="Model to use for evaluation. Examples: gpt-4o-mini, gpt-4o, claude-4-sonnet-latest, claude-3-haiku-latest, gemini-2.0-flash, or mock:latency=0.2,throttle_rate=0.05 for an offline stand-in",
     )
     parser.add_argument(
-        "--verbose", action="store_true", help="enable verbose logging (log level: info)"
+        "--strategy",
+        choices=EVAL_STRATEGIES,
+        default="per-metric",
+        help="How to batch metrics into LLM calls: one call per metric, one per metric group, or a single call for all metrics",
     )
-    parser.add_argument("--quiet", action="store_true", help="only log errors (log level: error)")
     parser.add_argument(
-        "--model",
+        "--escalate-model",
         type=str,
-        default="gpt-4o",
-        help="Model to use for evaluation. Examples: gpt-4o-mini, gpt-4o, claude-4-sonnet-latest, claude-3-haiku-latest, gemini-2.0-flash",
+        metavar="MODEL",
+        help="Cascade mode: screen all metrics with --model (use a cheap one), then re-score only the metrics it's unsure of with this stronger model",
+    )
+    parser.add_argument(
+        "--samples",
+        type=positive_int,
+        default=1,
+        metavar="N",
+        help="Score each metric N times and report the median score with the spread (standard deviation) of the samples (default: 1)",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Have the model give structured scores and ask it to correct malformed ones, instead of guessing scores from free-form replies",
+    )
+    parser.add_argument(
+        "--rubric",
+        type=str,
+        metavar="FILE",
+        help="Score the metrics in this rubric JSON file instead of the built-in rubric (same format as docs/scoring_rubric.json, with optional metric groups)",
     )
     parser.add_argument(
         "--save",
         type=str,
-        help="Save output to the specified file in JSON instead of printing to console",
+        help="Save output to the specified file in JSON instead of printing to console "
+        "(with a summary of the LLM calls in a .run.json file alongside)",
+    )
+    add_cache_args(parser)
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Batch mode: append one JSONL record per document to this file as each document finishes",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="Batch mode: score short documents (tweets, reviews, emails) several at a time, in one call per metric for up to 8 documents, falling back to per-document calls if a packed call fails",
+    )
+    parser.add_argument(
+        "--batch-api",
+        action="store_true",
+        help="Batch mode: submit all prompts as provider batch jobs (OpenAI or Anthropic), which cost about half as much but may take hours, and poll until they finish. Other models run through a local stand-in. Rerun to resume polling after an interruption",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Batch mode: skip documents that already have a successful record in the --output file",
+    )
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        help="Long-document mode: split texts longer than this many tokens into chunks at paragraph or section boundaries, score chunks concurrently, and aggregate",
+    )
+    parser.add_argument(
+        "--aggregate",
+        choices=AGGREGATIONS,
+        default="mean",
+        help="Long-document mode: how to combine chunk scores (mean is weighted by chunk size)",
+    )
+    parser.add_argument(
+        "--sample",
+        type=int,
+        nargs="?",
+        const=DEFAULT_SAMPLE_TOKENS,
+        metavar="TOKENS",
+        help=f"Sampling mode: score a representative sample of paragraphs up to this many tokens (default {DEFAULT_SAMPLE_TOKENS}) instead of the whole text",
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=0,
+        help="Sampling mode: random seed for choosing paragraphs",
+    )
+    add_limit_args(parser)
+    add_trace_args(parser)
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Evaluate in this process even if a `leximetry serve` daemon is running",
+    )
+    add_socket_arg(parser)
+    parser.add_argument(
+        "input",
+        type=str,
+        nargs="+",
+        help="Input text files, directories, or glob patterns. More than one file runs in batch mode (requires --output)",
     )
-    parser.add_argument("input", type=str, help="Path to the input text file")
 
     return parser
 
 
+def build_serve_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for `leximetry serve`"""
+    parser = argparse.ArgumentParser(
+        prog=f"{APP_NAME} serve",
+        formatter_class=ReadableColorFormatter,
+        epilog=get_version_name(),
+        description=SERVE_DESCRIPTION,
+    )
+    add_log_args(parser)
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="gpt-4o",
+        help="Model for requests that don't name one, which is also loaded at startup and sets the default rate limits",
+    )
+    add_cache_args(parser)
+    add_limit_args(parser)
+    add_trace_args(parser)
+    add_socket_arg(parser)
+    return parser
+
+
 def get_log_level(args: argparse.Namespace) -> Literal["debug", "info", "warning", "error"]:
     """Get log level from command line arguments"""
     if args.quiet:
@@ -78,33 +308,357 @@ def get_log_level(args: argparse.Namespace) -> Literal["debug", "info", "warning
         return "warning"
 
 
+def get_socket_path(args: argparse.Namespace) -> Path:
+    from leximetry.cli.daemon_client import default_socket_path
+
+    return Path(args.socket).expanduser() if args.socket else default_socket_path()
+
+
+def make_cache(args: argparse.Namespace) -> ScoreCache | None:
+    from leximetry.eval.score_cache import ScoreCache, default_cache_dir
+
+    if args.no_cache:
+        return None
+    cache_dir = Path(args.cache_dir) if args.cache_dir else default_cache_dir()
+    return ScoreCache(cache_dir, refresh=args.refresh)
+
+
+def make_limiter(args: argparse.Namespace) -> CallLimiter:
+    from leximetry.eval.provider_limits import default_limits
+    from leximetry.utils.aio_limited import CallLimiter, RetrySettings
+
+    limits = default_limits(args.model)
+    retry_args = {
+        "max_retries": args.max_retries,
+        "timeout": args.timeout,
+        "deadline": args.deadline,
+    }
+    retry = RetrySettings(**{key: value for key, value in retry_args.items() if value is not None})
+    return CallLimiter(
+        limits.max_concurrent if args.max_concurrent is None else args.max_concurrent,
+        limits.max_rps if args.max_rps is None else args.max_rps,
+        retry=retry,
+        adaptive=not args.fixed_limits,
+        max_tpm=args.max_tpm,
+    )
+
+
+def make_tracer(args: argparse.Namespace, exit_stack: ExitStack) -> CallTracer:
+    from leximetry.eval.call_trace import (
+        CallSink,
+        CallTracer,
+        JsonlTraceSink,
+        LoggingSink,
+        OtelSink,
+    )
+
+    sinks: list[CallSink] = [LoggingSink()]
+    if args.trace:
+        sinks.append(exit_stack.enter_context(JsonlTraceSink(Path(args.trace))))
+    if args.otel:
+        sinks.append(OtelSink())
+    return CallTracer(sinks)
+
+
+def run_summary_path(output_path: Path) -> Path:
+    """
+    Sidecar file for the run summary of a saved result, e.g. `out.run.json`
+    for `out.json`.
+    """
+    return output_path.with_name(f"{output_path.stem}.run.json")
+
+
+def save_result(output_path: Path, metrics: dict[str, Any], run_summary: dict[str, Any]) -> None:
+    """
+    Save scores as JSON, in the same shape as the metrics model, with a summary
+    of the LLM calls saved separately alongside.
+    """
+    output_path.write_text(json.dumps(metrics, indent=2))
+    summary_path = run_summary_path(output_path)
+    summary_path.write_text(json.dumps(run_summary, indent=2))
+    rprint(f"[green]Results saved to {output_path} (run summary in {summary_path})[/green]")
+
+
+def print_report(result: RubricMetrics, doc: DocAnalysis, sample: TextSample | None = None) -> None:
+    """
+    Print scores with rich formatting, including document stats.
+    """
+    from rich.console import Console
+
+    from leximetry.cli.rich_styles import LEXIMETRY_THEME
+    from leximetry.eval.report_output import format_complete_analysis
+
+    console = Console(theme=LEXIMETRY_THEME, width=get_readable_console_width())
+    console.print(format_complete_analysis(result, doc, sample))
+
+
+LOCAL_ONLY_OPTIONS = (
+    "no_daemon",
+    "output",
+    "batch_api",
+    "resume",
+    "sample",
+    "no_cache",
+    "refresh",
+    "cache_dir",
+    "max_concurrent",
+    "max_rps",
+    "max_tpm",
+    "fixed_limits",
+    "max_retries",
+    "timeout",
+    "deadline",
+    "trace",
+    "otel",
+)
+"""
+Options that configure state the daemon owns (cache, limits, tracing) or that
+it doesn't handle (batch and sampling modes). Runs using any of them are
+evaluated locally.
+"""
+
+
+DAEMON_MAX_INPUT_BYTES = 16 * 1024 * 1024
+"""
+Larger inputs are evaluated locally, where they're streamed, rather than
+copied into a request and again in the daemon.
+"""
+
+
+def evaluate_via_daemon(args: argparse.Namespace, paths: list[Path]) -> bool:
+    """
+    Forward a single-file evaluation to a running daemon and output the result.
+    Returns False, having done nothing, if the run needs local-only options,
+    the input is large, or no daemon is running.
+    """
+    from leximetry.cli.daemon_client import daemon_request
+    from leximetry.eval.preflight import preflight_text, read_text_file
+
+    if len(paths) != 1 or any(getattr(args, name) for name in LOCAL_ONLY_OPTIONS):
+        return False
+    if paths[0].stat().st_size > DAEMON_MAX_INPUT_BYTES:
+        return False
+
+    socket_path = get_socket_path(args)
+    text = read_text_file(paths[0])
+    preflight_text(text)
+    request = {
+        "op": "evaluate",
+        "text": text,
+        "model": args.model,
+        "strategy": args.strategy,
+        "chunk_tokens": args.chunk_tokens,
+        "aggregate": args.aggregate,
+        "escalate_model": args.escalate_model,
+        "samples": args.samples,
+        "strict": args.strict,
+        # The daemon may run in another directory.
+        "rubric": str(Path(args.rubric).resolve()) if args.rubric else None,
+    }
+    response = daemon_request(request, socket_path)
+    if response is None:
+        return False
+    log.info("Evaluated by the leximetry daemon at %s", socket_path)
+
+    if args.save:
+        save_result(Path(args.save), response["metrics"], response["run_summary"])
+    else:
+        from leximetry.eval.doc_analysis import DocAnalysis
+        from leximetry.eval.metrics_model import get_rubric
+
+        metrics_type = get_rubric(args.rubric).metrics_type
+        print_report(metrics_type.model_validate(response["metrics"]), DocAnalysis(text))
+    return True
+
+
+def serve_main(argv: list[str]) -> None:
+    """
+    Entry point for `leximetry serve`.
+    """
+    args = build_serve_parser().parse_args(argv)
+    logging.basicConfig(level=get_log_level(args).upper(), format="%(message)s")
+
+    from clideps.env_vars.dotenv_utils import load_dotenv_paths
+
+    from leximetry.cli.daemon_server import DaemonServer, serve
+
+    try:
+        load_dotenv_paths()
+        with ExitStack() as exit_stack:
+            socket_path = get_socket_path(args)
+            server = DaemonServer(
+                socket_path,
+                args.model,
+                make_cache(args),
+                make_limiter(args),
+                make_tracer(args, exit_stack),
+            )
+            rprint(f"[green]Serving on {socket_path} (Ctrl-C to stop)[/green]")
+            serve(server)
+    except KeyboardInterrupt:
+        rprint()
+        rprint("[yellow]Stopped[/yellow]")
+    except Exception as e:
+        rprint(f"[red]Error: {e}[/red]")
+        sys.exit(2)
+
+
 def main() -> None:
     """
     Main entry point for the CLI.
     """
-    # Create console with our theme
-    console = Console(theme=LEXIMETRY_THEME, width=get_readable_console_width())
+    if sys.argv[1:2] == ["serve"]:
+        serve_main(sys.argv[2:])
+        return
 
     parser = build_parser()
     args = parser.parse_args()
 
+    from leximetry.utils.input_paths import expand_input_paths
+
+    # Per-call events are logged at info level, so show with --verbose.
+    logging.basicConfig(level=get_log_level(args).upper(), format="%(message)s")
+
+    exit_stack = ExitStack()
     try:
+        paths = expand_input_paths(args.input)
+        if evaluate_via_daemon(args, paths):
+            return
+
+        from clideps.env_vars.dotenv_utils import load_dotenv_paths
+
+        from leximetry.eval.chunking import ChunkSettings
+        from leximetry.eval.eval_options import CascadeSettings
+        from leximetry.eval.sampling import SampleSettings
+        from leximetry.eval.usage_stats import UsageStats
+
         load_dotenv_paths()
-        text = Path(args.input).read_text()
 
-        # Calculate document statistics
-        doc = TextDoc.from_text(text)
+        cache = make_cache(args)
+        limiter = make_limiter(args)
+        usage = UsageStats()
+        tracer = make_tracer(args, exit_stack)
+
+        chunk_settings = None
+        if args.chunk_tokens:
+            chunk_settings = ChunkSettings(max_size=args.chunk_tokens, aggregation=args.aggregate)
+
+        sample_settings = None
+        if args.sample:
+            sample_settings = SampleSettings(max_size=args.sample, seed=args.sample_seed)
+
+        cascade = CascadeSettings(args.escalate_model) if args.escalate_model else None
+
+        if args.batch_api:
+            if not args.output:
+                parser.error("--batch-api requires --output to choose a JSONL file")
+            if args.strategy != "per-metric" or cascade or args.samples > 1 or chunk_settings:
+                parser.error(
+                    "--batch-api only supports the per-metric strategy, without "
+                    "--escalate-model, --samples, or --chunk-tokens"
+                )
+            from leximetry.eval.batch_api import evaluate_files_batch_api
+
+            output_path = Path(args.output)
+            summary = evaluate_files_batch_api(
+                paths,
+                output_path,
+                args.model,
+                cache,
+                args.resume,
+                sample_settings,
+                usage,
+                args.strict,
+                args.rubric,
+            )
+            if usage.requests:
+                rprint(usage.summary_str())
+            if cache:
+                rprint(cache.stats_str())
+            rprint(f"[green]{summary.summary_str()}. Results saved to {output_path}[/green]")
+            return
+
+        if args.output or len(paths) > 1:
+            if not args.output:
+                parser.error(f"{len(paths)} input files: use --output to choose a JSONL file")
+            from leximetry.eval.evaluate_batch import evaluate_files
+            from leximetry.eval.packing import PackSettings
+
+            output_path = Path(args.output)
+            summary = evaluate_files(
+                paths,
+                output_path,
+                args.model,
+                cache,
+                args.strategy,
+                limiter,
+                args.resume,
+                chunk_settings,
+                sample_settings,
+                usage,
+                tracer,
+                cascade,
+                args.samples,
+                PackSettings() if args.pack else None,
+                args.strict,
+                args.rubric,
+            )
+            if usage.requests:
+                rprint(usage.summary_str())
+                rprint(tracer.summary().summary_str())
+            if cache:
+                rprint(cache.stats_str())
+            if limiter.throttles or limiter.timeouts or limiter.retries:
+                rprint(limiter.stats_str())
+            rprint(f"[green]{summary.summary_str()}. Results saved to {output_path}[/green]")
+            return
+
+        from leximetry.eval.doc_analysis import DocAnalysis
+        from leximetry.eval.evaluate_text import evaluate_text
+        from leximetry.eval.preflight import read_text_file
+        from leximetry.eval.sampling import sample_text
+
+        # Parsed once for sampling, chunking, and the report.
+        doc = DocAnalysis(read_text_file(paths[0]))
+
+        sample = None
+        eval_text = doc
+        if sample_settings:
+            sample = sample_text(doc, sample_settings)
+            if sample.is_sampled:
+                eval_text = DocAnalysis(sample.text)
+                rprint(sample.summary_str())
 
-        result = evaluate_text(text, args.model)
+        result = evaluate_text(
+            eval_text,
+            args.model,
+            cache,
+            args.strategy,
+            limiter,
+            chunk_settings,
+            usage,
+            tracer,
+            cascade,
+            args.samples,
+            args.strict,
+            args.rubric,
+        )
+        if usage.requests:
+            rprint(usage.summary_str())
+            rprint(tracer.summary().summary_str())
+        if cache:
+            rprint(cache.stats_str())
+        if limiter.throttles or limiter.timeouts or limiter.retries:
+            rprint(limiter.stats_str())
 
         if args.save:
-            # Save to JSON file
-            output_path = Path(args.save)
-            output_path.write_text(result.model_dump_json(indent=2))
-            rprint(f"[green]Results saved to {output_path}[/green]")
+            save_result(
+                Path(args.save),
+                result.model_dump(exclude_none=True),
+                tracer.summary().model_dump(),
+            )
         else:
-            # Print with rich formatting including document stats
-            console.print(format_complete_analysis(result, doc, text))
+            print_report(result, doc, sample)
 
     except FileNotFoundError as e:
         rprint(f"[red]File not found: {e}[/red]")
@@ -120,6 +674,8 @@ def main() -> None:
 
             traceback.print_exc()
         sys.exit(2)
+    finally:
+        exit_stack.close()
 
 
 if __name__ == "__main__":
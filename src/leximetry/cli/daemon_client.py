@@ -0,0 +1,73 @@
+"""
+Client for the `leximetry serve` daemon. Uses only the standard library, so
+forwarding a request costs almost nothing at startup.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any
+
+SOCKET_ENV = "LEXIMETRY_SOCKET"
+
+SOCKET_NAME = "leximetry.sock"
+
+
+class DaemonError(RuntimeError):
+    """
+    The daemon received the request but couldn't evaluate it.
+    """
+
+
+def default_socket_path() -> Path:
+    """
+    The daemon's Unix socket: `$LEXIMETRY_SOCKET` if set, otherwise in
+    `$XDG_RUNTIME_DIR` or, failing that, `~/.cache/leximetry`.
+    """
+    env_path = os.environ.get(SOCKET_ENV)
+    if env_path:
+        return Path(env_path).expanduser()
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / SOCKET_NAME
+    return Path("~/.cache/leximetry").expanduser() / SOCKET_NAME
+
+
+def daemon_request(
+    request: dict[str, Any], socket_path: Path, timeout: float | None = None
+) -> dict[str, Any] | None:
+    """
+    Send one request to the daemon and return its response, or None if no
+    daemon is listening on `socket_path`. Requests and responses are single
+    lines of JSON. Raises `DaemonError` if the daemon reports an error.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError(f"Daemon at {socket_path} closed the connection without a response")
+    response: dict[str, Any] = json.loads(line)
+    if not response.get("ok"):
+        raise DaemonError(response.get("error") or "Unknown daemon error")
+    return response
+
+
+## Tests
+
+
+def test_no_daemon():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        assert daemon_request({"op": "ping"}, Path(tmp_dir) / SOCKET_NAME) is None
@@ -0,0 +1,235 @@
+"""
+The `leximetry serve` daemon: a long-lived process that evaluates texts sent
+over a Unix socket, so repeated evaluations (e.g. from an editor or CI) skip
+startup and reuse the loaded rubric, constructed models, pooled provider
+connections, score cache, and rate limits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field, ValidationError
+
+from leximetry.cli.daemon_client import daemon_request
+from leximetry.eval.call_trace import CallTracer
+from leximetry.eval.chunking import ChunkSettings
+from leximetry.eval.doc_analysis import DocAnalysis
+from leximetry.eval.eval_options import Aggregation, CascadeSettings, EvalStrategy
+from leximetry.eval.evaluate_text import check_text_size, evaluate_text_async
+from leximetry.eval.metrics_model import load_scoring_rubric
+from leximetry.eval.model_registry import get_model
+from leximetry.eval.score_cache import ScoreCache
+from leximetry.utils.aio_limited import CallLimiter
+
+log = logging.getLogger(__name__)
+
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+"""Longest request line accepted, which bounds the size of a text."""
+
+
+class EvaluateRequest(BaseModel):
+    """
+    A request to evaluate one text. The model, strategy, cascade, sampling,
+    chunking, and rubric options are per request. The cache and rate limits are
+    the daemon's. The `rubric` is the path of a rubric JSON file, which the
+    daemon reloads whenever the file changes.
+    """
+
+    text: str
+    model: str | None = None
+    strategy: EvalStrategy = "per-metric"
+    chunk_tokens: int | None = None
+    aggregate: Aggregation = "mean"
+    escalate_model: str | None = None
+    samples: int = Field(default=1, ge=1)
+    strict: bool = False
+    rubric: str | None = None
+
+
+class DaemonServer:
+    """
+    Serves evaluation requests on a Unix socket. Each connection can send any
+    number of requests, one JSON object per line, and gets one JSON response
+    line per request: `{"ok": true, ...}` or `{"ok": false, "error": ...}`.
+    Requests from all connections run concurrently and share one limiter.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        default_model: str,
+        cache: ScoreCache | None = None,
+        limiter: CallLimiter | None = None,
+        tracer: CallTracer | None = None,
+    ):
+        self.socket_path: Path = socket_path
+        self.default_model: str = default_model
+        self.cache: ScoreCache | None = cache
+        self.limiter: CallLimiter = limiter or CallLimiter()
+        self.tracer: CallTracer = tracer or CallTracer()
+        self.requests: int = 0
+        self.start_time: float = time.time()
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        """
+        Warm up the rubric and default model, then listen on the socket,
+        replacing any existing socket file.
+        """
+        load_scoring_rubric()
+        get_model(self.default_model)
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(
+            self._handle_connection, path=str(self.socket_path), limit=MAX_MESSAGE_BYTES
+        )
+        os.chmod(self.socket_path, 0o600)
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.socket_path.unlink(missing_ok=True)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while line := await reader.readline():
+                response = await self.handle(line)
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            log.warning("Dropped daemon connection: %s", e)
+        finally:
+            writer.close()
+
+    async def handle(self, line: bytes) -> dict[str, Any]:
+        try:
+            request = json.loads(line)
+            op = request.pop("op", "evaluate")
+            if op == "ping":
+                return {
+                    "ok": True,
+                    "pid": os.getpid(),
+                    "requests": self.requests,
+                    "uptime": round(time.time() - self.start_time, 1),
+                }
+            if op == "evaluate":
+                return await self.evaluate(EvaluateRequest.model_validate(request))
+            return {"ok": False, "error": f"Unknown daemon operation: {op!r}"}
+        except (json.JSONDecodeError, ValidationError) as e:
+            return {"ok": False, "error": f"Invalid daemon request: {e}"}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    async def evaluate(self, request: EvaluateRequest) -> dict[str, Any]:
+        self.requests += 1
+        analysis = DocAnalysis(request.text)
+        check_text_size(analysis)
+        chunk_settings = None
+        if request.chunk_tokens:
+            chunk_settings = ChunkSettings(
+                max_size=request.chunk_tokens, aggregation=request.aggregate
+            )
+        cascade = CascadeSettings(request.escalate_model) if request.escalate_model else None
+        tracer = self.tracer.child()
+        metrics = await evaluate_text_async(
+            analysis,
+            request.model or self.default_model,
+            self.cache,
+            request.strategy,
+            self.limiter,
+            chunk_settings,
+            tracer=tracer,
+            cascade=cascade,
+            samples=request.samples,
+            strict=request.strict,
+            rubric=request.rubric,
+        )
+        return {
+            "ok": True,
+            "metrics": metrics.model_dump(exclude_none=True),
+            "run_summary": tracer.summary().model_dump(),
+        }
+
+
+async def serve_async(server: DaemonServer) -> None:
+    """
+    Run the daemon until interrupted or sent SIGTERM.
+    """
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    await server.start()
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
+def serve(server: DaemonServer) -> None:
+    """
+    Run the daemon, refusing to start if another daemon is already listening
+    on the same socket.
+    """
+    running = daemon_request({"op": "ping"}, server.socket_path, timeout=5)
+    if running:
+        raise RuntimeError(
+            f"A leximetry daemon (pid {running['pid']}) is already running at {server.socket_path}"
+        )
+    asyncio.run(serve_async(server))
+
+
+## Tests
+
+
+def test_daemon_server():
+    import tempfile
+
+    from leximetry.cli.daemon_client import DaemonError, daemon_request
+
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+
+    async def run(socket_path: Path) -> list[dict[str, Any] | None]:
+        server = DaemonServer(
+            socket_path, "mock:latency=0", limiter=CallLimiter(max_concurrent=8, max_rps=1000)
+        )
+        await server.start()
+        try:
+            requests = [
+                {"op": "evaluate", "text": text},
+                {"op": "evaluate", "text": text, "strategy": "single"},
+                {"op": "ping"},
+            ]
+            responses = [
+                await asyncio.to_thread(daemon_request, request, socket_path)
+                for request in requests
+            ]
+            try:
+                await asyncio.to_thread(daemon_request, {"text": "Too short."}, socket_path)
+                raise AssertionError("Expected a DaemonError")
+            except DaemonError as e:
+                assert "too short" in str(e)
+            return responses
+        finally:
+            await server.close()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        socket_path = Path(tmp_dir) / "test.sock"
+        per_metric, single, ping = asyncio.run(run(socket_path))
+        assert not socket_path.exists()
+
+    assert per_metric and single and ping
+    assert per_metric["run_summary"]["calls"] == 12 and single["run_summary"]["calls"] == 1
+    assert 1 <= per_metric["metrics"]["expression"]["clarity"]["value"] <= 5
+    assert ping["requests"] == 2
@@ -68,7 +68,7 @@ def extract_rubric_to_json(
     markdown_content = prose_metrics_path.read_text(encoding="utf-8")
 
     rubric = parse_scoring_rubric(markdown_content)
-    rubric_dict = rubric.model_dump()
+    rubric_dict = rubric.model_dump(exclude_none=True)
 
     if output_path:
         output_path = Path(output_path)
@@ -0,0 +1,710 @@
+"""
+Bulk scoring through provider batch APIs (OpenAI and Anthropic), which cost
+about half as much as interactive calls and have much higher throughput limits,
+but finish within hours instead of seconds.
+
+Every (document, metric) prompt that isn't already cached is written to a
+JSONL job file, submitted as one or more batch jobs, and polled until done.
+The results are parsed into `Score`s, cached, and assembled into the same
+`BatchRecord`s as an interactive batch run. Models without a batch API run
+through `LocalBatchService`, a file-based stand-in that also lets the whole
+pipeline be tested offline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, Protocol
+
+from pydantic import BaseModel
+from pydantic_ai.models import Model
+from pydantic_ai.usage import Usage
+from strif import iso_timestamp
+
+from leximetry.eval.doc_analysis import DocAnalysis
+from leximetry.eval.evaluate_batch import (
+    BatchRecord,
+    BatchSummary,
+    completed_hashes,
+    file_content_hash,
+    rubric_label,
+)
+from leximetry.eval.evaluate_text import (
+    METRIC_INSTRUCTIONS,
+    check_text_size,
+    metric_cache_key,
+    metric_prompt_parts,
+    model_display_name,
+    run_sync,
+)
+from leximetry.eval.metrics_model import RubricMetrics, Score, ScoringRubric, get_rubric
+from leximetry.eval.model_registry import get_agent, get_model
+from leximetry.eval.preflight import TextRejected, read_text_file
+from leximetry.eval.sampling import SampleSettings, sample_text
+from leximetry.eval.score_cache import ScoreCache
+from leximetry.eval.usage_stats import UsageStats
+from leximetry.utils.aio_limited import CallLimiter, gather_limited
+from leximetry.utils.jsonl_sink import JsonlSink, read_jsonl_records
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+    from openai import AsyncOpenAI
+
+log = logging.getLogger(__name__)
+
+BatchStatus = Literal["in_progress", "completed", "failed"]
+
+MAX_JOB_REQUESTS = 50_000
+"""Requests per batch job (OpenAI's limit; Anthropic's is 100,000)."""
+
+MAX_OUTPUT_TOKENS = 256
+"""Output limit for each request, which Anthropic requires. Scores are short."""
+
+
+class BatchRequest(BaseModel):
+    """
+    One LLM call in a batch job: the instructions and prompt parts of an
+    interactive call, with an ID to match it to its result.
+    """
+
+    custom_id: str
+    instructions: str
+    prompt: list[str]
+
+
+class BatchResult(BaseModel):
+    """
+    The result of one request in a batch job: its `output` text or an `error`.
+    """
+
+    custom_id: str
+    output: str | None = None
+    error: str | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+
+
+class BatchJob(BaseModel):
+    """
+    A submitted job, saved next to its requests file so an interrupted run can
+    resume polling it instead of submitting (and paying for) it again.
+    """
+
+    id: str
+    service: str
+    requests_hash: str
+
+
+class BatchService(Protocol):
+    """
+    A batch API. Jobs are submitted as a JSONL file of `BatchRequest`s, then
+    polled every `poll_interval` seconds until they're no longer in progress.
+    """
+
+    name: str
+    poll_interval: float
+
+    async def submit(self, requests_path: Path) -> str: ...
+
+    async def poll(self, job_id: str) -> BatchStatus: ...
+
+    async def results(self, job_id: str) -> list[BatchResult]: ...
+
+
+class LocalBatchService:
+    """
+    File-based stand-in for a provider batch API, which runs each job's
+    requests with an ordinary (e.g. mock) model. Jobs are directories under
+    `root`, holding the requests, a status file, and the results, so jobs
+    survive restarts like real ones. A job completes on its
+    `polls_to_complete`-th poll.
+    """
+
+    name: str = "local"
+
+    def __init__(
+        self,
+        root: Path,
+        model: Model,
+        polls_to_complete: int = 1,
+        poll_interval: float = 0.1,
+        limiter: CallLimiter | None = None,
+    ):
+        self.root: Path = root
+        self.model: Model = model
+        self.polls_to_complete: int = polls_to_complete
+        self.poll_interval: float = poll_interval
+        self.limiter: CallLimiter = limiter or CallLimiter()
+
+    def _status_path(self, job_id: str) -> Path:
+        return self.root / job_id / "status.json"
+
+    async def submit(self, requests_path: Path) -> str:
+        job_id = f"local-{file_content_hash(requests_path).removeprefix('sha256:')[:16]}"
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(requests_path, job_dir / "requests.jsonl")
+        self._status_path(job_id).write_text(json.dumps({"status": "in_progress", "polls": 0}))
+        return job_id
+
+    async def poll(self, job_id: str) -> BatchStatus:
+        status_path = self._status_path(job_id)
+        state = json.loads(status_path.read_text())
+        if state["status"] == "in_progress":
+            state["polls"] += 1
+            if state["polls"] >= self.polls_to_complete:
+                await self._run(job_id)
+                state["status"] = "completed"
+            status_path.write_text(json.dumps(state))
+        return state["status"]
+
+    async def _run(self, job_id: str) -> None:
+        requests = list(read_jsonl_records(self.root / job_id / "requests.jsonl", BatchRequest))
+
+        async def run_request(request: BatchRequest) -> BatchResult:
+            agent = get_agent(self.model, str, request.instructions)
+            try:
+                result = await agent.run(request.prompt)
+            except Exception as e:
+                return BatchResult(custom_id=request.custom_id, error=f"{type(e).__name__}: {e}")
+            usage = result.usage()
+            return BatchResult(
+                custom_id=request.custom_id,
+                output=result.output,
+                input_tokens=usage.request_tokens or 0,
+                output_tokens=usage.response_tokens or 0,
+            )
+
+        results = await gather_limited(
+            *[lambda request=request: run_request(request) for request in requests],
+            limiter=self.limiter,
+        )
+        with JsonlSink(self.root / job_id / "results.jsonl", sync=False) as sink:
+            for result in results:
+                sink.write(result)
+
+    async def results(self, job_id: str) -> list[BatchResult]:
+        return list(read_jsonl_records(self.root / job_id / "results.jsonl", BatchResult))
+
+
+def openai_request_line(request: BatchRequest, model_name: str) -> dict[str, Any]:
+    """
+    A request in the OpenAI batch input format, for the chat completions API.
+    """
+    return {
+        "custom_id": request.custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model_name,
+            "max_tokens": MAX_OUTPUT_TOKENS,
+            "messages": [
+                {"role": "system", "content": request.instructions},
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": part} for part in request.prompt],
+                },
+            ],
+        },
+    }
+
+
+def parse_openai_result(line: dict[str, Any]) -> BatchResult:
+    """
+    A result from a line of an OpenAI batch output or error file.
+    """
+    custom_id = line["custom_id"]
+    response: dict[str, Any] = line.get("response") or {}
+    body: dict[str, Any] = response.get("body") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        error: Any = line.get("error") or body.get("error") or response
+        return BatchResult(custom_id=custom_id, error=json.dumps(error))
+    usage: dict[str, Any] = body.get("usage") or {}
+    details: dict[str, Any] = usage.get("prompt_tokens_details") or {}
+    return BatchResult(
+        custom_id=custom_id,
+        output=body["choices"][0]["message"]["content"],
+        input_tokens=usage.get("prompt_tokens", 0),
+        output_tokens=usage.get("completion_tokens", 0),
+        cached_tokens=details.get("cached_tokens", 0),
+    )
+
+
+class OpenAIBatchService:
+    """
+    The OpenAI Batch API: the job file is converted to chat completion
+    requests, uploaded, and run within 24 hours.
+    """
+
+    name: str = "openai"
+    poll_interval: float = 30.0
+
+    def __init__(self, client: AsyncOpenAI, model_name: str):
+        self.client: AsyncOpenAI = client
+        self.model_name: str = model_name
+
+    async def submit(self, requests_path: Path) -> str:
+        upload_path = requests_path.with_suffix(".openai.jsonl")
+        with upload_path.open("w", encoding="utf-8") as f:
+            for request in read_jsonl_records(requests_path, BatchRequest):
+                f.write(json.dumps(openai_request_line(request, self.model_name)) + "\n")
+        upload = await self.client.files.create(file=upload_path, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        return batch.id
+
+    async def poll(self, job_id: str) -> BatchStatus:
+        batch = await self.client.batches.retrieve(job_id)
+        if batch.status in ("failed", "cancelled"):
+            return "failed"
+        # Expired jobs still return the results of requests that completed.
+        if batch.status in ("completed", "expired"):
+            return "completed"
+        return "in_progress"
+
+    async def results(self, job_id: str) -> list[BatchResult]:
+        batch = await self.client.batches.retrieve(job_id)
+        results: list[BatchResult] = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self.client.files.content(file_id)
+                results.extend(
+                    parse_openai_result(json.loads(line))
+                    for line in content.text.splitlines()
+                    if line.strip()
+                )
+        return results
+
+
+def anthropic_request(request: BatchRequest, model_name: str) -> dict[str, Any]:
+    """
+    A request in the Anthropic Message Batches format, with the same prompt
+    cache breakpoint after the document as interactive calls.
+    """
+    from anthropic.types.beta import BetaMessageParam
+
+    from leximetry.eval.prompt_caching import mark_cache_breakpoint
+
+    messages: list[BetaMessageParam] = [
+        {"role": "user", "content": [{"type": "text", "text": part} for part in request.prompt]}
+    ]
+    mark_cache_breakpoint(messages)
+    return {
+        "custom_id": request.custom_id,
+        "params": {
+            "model": model_name,
+            "max_tokens": MAX_OUTPUT_TOKENS,
+            "system": request.instructions,
+            "messages": messages,
+        },
+    }
+
+
+class AnthropicBatchService:
+    """
+    The Anthropic Message Batches API: the job's requests are sent in one
+    call and run within 24 hours.
+    """
+
+    name: str = "anthropic"
+    poll_interval: float = 30.0
+
+    def __init__(self, client: AsyncAnthropic, model_name: str):
+        self.client: AsyncAnthropic = client
+        self.model_name: str = model_name
+
+    async def submit(self, requests_path: Path) -> str:
+        requests: list[Any] = [
+            anthropic_request(request, self.model_name)
+            for request in read_jsonl_records(requests_path, BatchRequest)
+        ]
+        batch = await self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    async def poll(self, job_id: str) -> BatchStatus:
+        batch = await self.client.messages.batches.retrieve(job_id)
+        return "completed" if batch.processing_status == "ended" else "in_progress"
+
+    async def results(self, job_id: str) -> list[BatchResult]:
+        results: list[BatchResult] = []
+        async for entry in await self.client.messages.batches.results(job_id):
+            result = entry.result
+            if result.type != "succeeded":
+                error = result.error.error.message if result.type == "errored" else result.type
+                results.append(BatchResult(custom_id=entry.custom_id, error=error))
+                continue
+            message = result.message
+            results.append(
+                BatchResult(
+                    custom_id=entry.custom_id,
+                    output="".join(block.text for block in message.content if block.type == "text"),
+                    input_tokens=message.usage.input_tokens,
+                    output_tokens=message.usage.output_tokens,
+                    cached_tokens=message.usage.cache_read_input_tokens or 0,
+                )
+            )
+        return results
+
+
+def batch_service_for(model: Model, work_dir: Path) -> BatchService:
+    """
+    The provider batch API for a model, or the local stand-in for models whose
+    provider has none (or that run locally, like mock models).
+    """
+    if model.system == "openai":
+        from pydantic_ai.models.openai import OpenAIModel
+
+        if isinstance(model, OpenAIModel):
+            return OpenAIBatchService(model.client, model.model_name)
+    if model.system == "anthropic":
+        from pydantic_ai.models.anthropic import AnthropicModel
+
+        if isinstance(model, AnthropicModel):
+            return AnthropicBatchService(model.client, model.model_name)
+    return LocalBatchService(work_dir / "local", model)
+
+
+async def run_job(service: BatchService, requests_path: Path) -> list[BatchResult]:
+    """
+    Submit a job file, or resume the job already submitted for it, and poll it
+    until it's done.
+    """
+    job_path = requests_path.with_suffix(".job.json")
+    requests_hash = file_content_hash(requests_path)
+    job = None
+    if job_path.exists():
+        job = BatchJob.model_validate_json(job_path.read_text())
+        if (job.service, job.requests_hash) != (service.name, requests_hash):
+            job = None
+    if job:
+        log.warning("Resuming %s batch job %s", service.name, job.id)
+    else:
+        job = BatchJob(
+            id=await service.submit(requests_path),
+            service=service.name,
+            requests_hash=requests_hash,
+        )
+        job_path.write_text(job.model_dump_json())
+        log.warning("Submitted %s batch job %s", service.name, job.id)
+
+    while (status := await service.poll(job.id)) == "in_progress":
+        await asyncio.sleep(service.poll_interval)
+    if status == "failed":
+        raise RuntimeError(f"Batch job {job.id} failed or was cancelled")
+    log.info("Batch job %s completed", job.id)
+    return await service.results(job.id)
+
+
+@dataclass
+class BatchDoc:
+    """
+    A document awaiting batch results. Only its scores are kept, not its text.
+    """
+
+    path: Path
+    content_hash: str
+    sample_fraction: float | None = None
+    scores: dict[str, Score] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+
+async def evaluate_files_batch_api_async(
+    paths: list[Path],
+    output_path: Path,
+    model_name: str | Model = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    resume: bool = False,
+    sample_settings: SampleSettings | None = None,
+    usage: UsageStats | None = None,
+    service: BatchService | None = None,
+    work_dir: Path | None = None,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> BatchSummary:
+    """
+    Like `evaluate_files_async()` with the per-metric strategy, but scoring
+    through a batch API (by default the model provider's, see
+    `batch_service_for()`). Job files and submitted job IDs are kept in
+    `work_dir` (by default next to the output file), so rerunning an
+    interrupted run resumes polling its jobs. Scores are cached as in
+    interactive runs, so cached metrics aren't submitted and batch results
+    are reused by later interactive runs. With `strict`, a malformed reply
+    fails its document instead of being parsed leniently, since batch jobs
+    can't ask the model to correct it. Documents are scored with `rubric` (by
+    default, the built-in rubric).
+    """
+    start_time = time.time()
+    scoring_rubric = get_rubric(rubric)
+    model = get_model(model_name)
+    model_str = model_display_name(model) + rubric_label(scoring_rubric)
+    if work_dir is None:
+        work_dir = output_path.with_name(output_path.name + ".batch")
+    work_dir.mkdir(parents=True, exist_ok=True)
+    if service is None:
+        service = batch_service_for(model, work_dir)
+    summary = BatchSummary(total=len(paths))
+    done_hashes = completed_hashes(output_path, model_str) if resume else set[str]()
+
+    docs: list[BatchDoc] = []
+    # Each request's document, metric key, and cache key, by custom ID.
+    request_keys: dict[str, tuple[BatchDoc, str, str]] = {}
+    part_paths: list[Path] = []
+    part_sink: JsonlSink | None = None
+
+    with JsonlSink(output_path) as sink:
+        for path in paths:
+            try:
+                doc = BatchDoc(path, file_content_hash(path))
+                if doc.content_hash in done_hashes:
+                    summary.skipped += 1
+                    continue
+                analysis = DocAnalysis(read_text_file(path))
+                check_text_size(analysis)
+            except TextRejected as e:
+                log.info("Rejected %s: %s", path, e)
+                summary.rejected += 1
+                sink.write(batch_record(path, "", model_str, start_time, rejected=str(e)))
+                continue
+            except Exception as e:
+                log.warning("Error reading %s: %s", path, e)
+                summary.failed += 1
+                sink.write(batch_record(path, "", model_str, start_time, error=str(e)))
+                continue
+
+            if sample_settings:
+                sample = sample_text(analysis, sample_settings)
+                if sample.is_sampled:
+                    analysis = DocAnalysis(sample.text)
+                    doc.sample_fraction = round(sample.fraction, 4)
+            docs.append(doc)
+
+            for metric in scoring_rubric.metrics:
+                metric_key = metric.name.lower()
+                cache_key = metric_cache_key(analysis, metric, model)
+                cached_score = cache.get(cache_key) if cache else None
+                if cached_score is not None:
+                    doc.scores[metric_key] = cached_score
+                    continue
+                if part_sink is None or len(request_keys) % MAX_JOB_REQUESTS == 0:
+                    if part_sink:
+                        part_sink.close()
+                    part_paths.append(work_dir / f"requests-{len(part_paths)}.jsonl")
+                    part_paths[-1].unlink(missing_ok=True)
+                    part_sink = JsonlSink(part_paths[-1], sync=False)
+                custom_id = f"doc{len(docs) - 1}-{metric_key}"
+                request_keys[custom_id] = (doc, metric_key, cache_key)
+                part_sink.write(
+                    BatchRequest(
+                        custom_id=custom_id,
+                        instructions=METRIC_INSTRUCTIONS,
+                        prompt=metric_prompt_parts(analysis, metric),
+                    )
+                )
+        if part_sink:
+            part_sink.close()
+
+        log.info(
+            "Scoring %s documents with %s batch requests in %s jobs (%s cached scores)",
+            len(docs),
+            len(request_keys),
+            len(part_paths),
+            sum(len(doc.scores) for doc in docs),
+        )
+        job_results = await asyncio.gather(*[run_job(service, path) for path in part_paths])
+
+        for result in (result for results in job_results for result in results):
+            if result.custom_id not in request_keys:
+                continue
+            doc, metric_key, cache_key = request_keys[result.custom_id]
+            if usage:
+                usage.add(
+                    Usage(
+                        requests=1,
+                        request_tokens=result.input_tokens,
+                        response_tokens=result.output_tokens,
+                        details={"cached_tokens": result.cached_tokens},
+                    )
+                )
+            try:
+                if result.output is None:
+                    raise ValueError(result.error or "No output")
+                score = Score.parse(result.output, strict=strict)
+            except ValueError as e:
+                doc.errors.append(f"{metric_key}: {e}")
+                continue
+            doc.scores[metric_key] = score
+            if cache:
+                cache.put(cache_key, score)
+
+        for doc in docs:
+            missing = [
+                metric.name.lower()
+                for metric in scoring_rubric.metrics
+                if metric.name.lower() not in doc.scores
+            ]
+            if missing:
+                errors = doc.errors or [f"No batch result for {', '.join(missing)}"]
+                summary.failed += 1
+                sink.write(
+                    batch_record(
+                        doc.path, doc.content_hash, model_str, start_time, error="; ".join(errors)
+                    )
+                )
+            else:
+                summary.succeeded += 1
+                sink.write(
+                    batch_record(
+                        doc.path,
+                        doc.content_hash,
+                        model_str,
+                        start_time,
+                        metrics=scoring_rubric.metrics_type.from_scores(doc.scores),
+                        sample_fraction=doc.sample_fraction,
+                    )
+                )
+
+    return summary
+
+
+def batch_record(
+    path: Path,
+    content_hash: str,
+    model_str: str,
+    start_time: float,
+    metrics: RubricMetrics | None = None,
+    sample_fraction: float | None = None,
+    rejected: str | None = None,
+    error: str | None = None,
+) -> BatchRecord:
+    return BatchRecord(
+        path=str(path),
+        content_hash=content_hash,
+        model=model_str,
+        timestamp=iso_timestamp(),
+        elapsed=round(time.time() - start_time, 3),
+        metrics=metrics,
+        sample_fraction=sample_fraction,
+        rejected=rejected,
+        error=error,
+    )
+
+
+def evaluate_files_batch_api(
+    paths: list[Path],
+    output_path: Path,
+    model_name: str = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    resume: bool = False,
+    sample_settings: SampleSettings | None = None,
+    usage: UsageStats | None = None,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> BatchSummary:
+    """
+    Synchronous wrapper for evaluate_files_batch_api_async.
+    """
+    return run_sync(
+        evaluate_files_batch_api_async(
+            paths,
+            output_path,
+            model_name,
+            cache,
+            resume,
+            sample_settings,
+            usage,
+            strict=strict,
+            rubric=rubric,
+        ),
+        "evaluate_files_batch_api_async",
+    )
+
+
+## Tests
+
+
+def test_openai_format():
+    request = BatchRequest(custom_id="doc0-clarity", instructions="Score it.", prompt=["A", "B"])
+    line = openai_request_line(request, "gpt-4o-mini")
+    assert line["body"]["messages"][1]["content"][1] == {"type": "text", "text": "B"}
+
+    result = parse_openai_result(
+        {
+            "custom_id": "doc0-clarity",
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "choices": [{"message": {"content": "4 (Clear.)"}}],
+                    "usage": {
+                        "prompt_tokens": 900,
+                        "completion_tokens": 5,
+                        "prompt_tokens_details": {"cached_tokens": 768},
+                    },
+                },
+            },
+            "error": None,
+        }
+    )
+    assert (result.output, result.input_tokens, result.cached_tokens) == ("4 (Clear.)", 900, 768)
+    failed = parse_openai_result(
+        {"custom_id": "doc0-rigor", "response": None, "error": {"code": "server_error"}}
+    )
+    assert failed.output is None and failed.error and "server_error" in failed.error
+
+
+def test_anthropic_format():
+    request = BatchRequest(custom_id="doc0-clarity", instructions="Score it.", prompt=["A", "B"])
+    params = anthropic_request(request, "claude-3-5-haiku-latest")["params"]
+    first, second = params["messages"][0]["content"]
+    assert "cache_control" in first and "cache_control" not in second
+    assert params["system"] == "Score it."
+
+
+def test_local_batch_api():
+    import tempfile
+
+    from leximetry.eval.evaluate_text import evaluate_text_async
+
+    good_text = "The quick brown fox jumps over the lazy dog. " * 20
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp = Path(tmp_dir)
+        (tmp / "good.md").write_text(good_text)
+        (tmp / "other.md").write_text(good_text.replace("fox", "cat"))
+        (tmp / "short.md").write_text("Too short.")
+        paths = [tmp / "good.md", tmp / "other.md", tmp / "short.md"]
+        output_path = tmp / "out.jsonl"
+        cache = ScoreCache(tmp / "cache")
+        model = get_model("mock:latency=0")
+        service = LocalBatchService(tmp / "service", model, polls_to_complete=3, poll_interval=0)
+        usage = UsageStats()
+
+        summary = asyncio.run(
+            evaluate_files_batch_api_async(
+                paths, output_path, model, cache, service=service, usage=usage
+            )
+        )
+        assert (summary.succeeded, summary.rejected) == (2, 1)
+        assert usage.requests == 24
+        records = {Path(r.path).name: r for r in read_jsonl_records(output_path, BatchRecord)}
+        assert records["short.md"].rejected
+        # Batch scores match interactive ones, which are then served from the cache.
+        hits = cache.hits
+        interactive = asyncio.run(evaluate_text_async(good_text, model, cache))
+        assert records["good.md"].metrics == interactive
+        assert cache.hits == hits + 12
+
+        # Resuming skips completed documents without submitting another job.
+        summary = asyncio.run(
+            evaluate_files_batch_api_async(
+                paths, output_path, model, cache, resume=True, service=service
+            )
+        )
+        assert (summary.skipped, summary.rejected) == (2, 1)
+        assert len(list((tmp / "service").iterdir())) == 1
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import logging
+import statistics
+from collections.abc import Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Protocol
+
+from funlog import format_duration
+from prettyfmt import fmt_count_items
+from pydantic import BaseModel
+from typing_extensions import override
+
+from leximetry.utils.jsonl_sink import JsonlSink
+
+if TYPE_CHECKING:
+    from opentelemetry.trace import Tracer
+
+log = logging.getLogger(__name__)
+
+
+class CallEvent(BaseModel):
+    """
+    Timing and token usage for one LLM call attempt scoring one or more
+    metrics, or for a score served from the cache. Times are in seconds:
+    `queue_wait` for a concurrency slot, `limiter_wait` for rate and token
+    limits (both summed over attempts), and `latency` for the model's
+    response. `start_time` is when the request was sent (Unix time). `retries`
+    counts earlier failed attempts, and `error` is set if this attempt failed.
+    `parse_failures` counts replies that didn't parse or validate as scores:
+    ones the model was asked to correct, and ones that were parsed leniently.
+    """
+
+    metrics: list[str]
+    model: str
+    start_time: float
+    cached: bool = False
+    queue_wait: float = 0.0
+    limiter_wait: float = 0.0
+    latency: float = 0.0
+    prompt_bytes: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    parse_failures: int = 0
+    cost: float | None = None
+    error: str | None = None
+
+    def summary_str(self) -> str:
+        metrics = ", ".join(self.metrics)
+        if self.cached:
+            return f"Evaluated {metrics} (cached)"
+        if self.error:
+            return f"Failed {metrics} after {format_duration(self.latency)}: {self.error}"
+        details = [f"prompt {self.prompt_bytes} bytes", f"{self.prompt_tokens} tokens"]
+        if self.cached_tokens:
+            details.append(f"{self.cached_tokens} cached tokens")
+        if self.queue_wait + self.limiter_wait >= 0.01:
+            details.append(f"waited {format_duration(self.queue_wait + self.limiter_wait)}")
+        if self.retries:
+            details.append(fmt_count_items(self.retries, "retry"))
+        if self.parse_failures:
+            details.append(fmt_count_items(self.parse_failures, "parse failure"))
+        return f"Evaluated {metrics} ({', '.join(details)}) in {format_duration(self.latency)}"
+
+
+class RunSummary(BaseModel):
+    """
+    Totals for the LLM calls in a run (or one document of a batch). Latency
+    percentiles are over successful model calls, not cache hits, and
+    `failed_calls` counts failed attempts, including ones that were retried.
+    `parse_failures` counts model replies that didn't parse as scores. `cost`
+    is None if the price of the model isn't known.
+    """
+
+    calls: int = 0
+    cached_calls: int = 0
+    failed_calls: int = 0
+    retries: int = 0
+    parse_failures: int = 0
+    latency_p50: float | None = None
+    latency_p95: float | None = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    total_tokens: int = 0
+    cost: float | None = None
+
+    def summary_str(self) -> str:
+        summary = (
+            f"LLM calls: {self.calls} calls ({self.cached_calls} cached, {self.failed_calls} failed"
+        )
+        if self.parse_failures:
+            summary += f", {fmt_count_items(self.parse_failures, 'parse failure')}"
+        summary += ")"
+        if self.latency_p50 is not None and self.latency_p95 is not None:
+            summary += f", latency p50 {self.latency_p50:.2f}s, p95 {self.latency_p95:.2f}s"
+        if self.cost is not None:
+            summary += f", estimated cost ${self.cost:.4f}"
+        return summary
+
+
+class CallSink(Protocol):
+    """
+    A destination for `CallEvent`s.
+    """
+
+    def emit(self, event: CallEvent) -> None: ...
+
+
+class JsonlTraceSink:
+    """
+    Append each event as a line to a JSONL trace file.
+    """
+
+    def __init__(self, path: Path):
+        self._sink: JsonlSink = JsonlSink(path, sync=False)
+
+    def emit(self, event: CallEvent) -> None:
+        self._sink.write(event)
+
+    def close(self) -> None:
+        self._sink.close()
+
+    def __enter__(self) -> JsonlTraceSink:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class LoggingSink:
+    """
+    Log each event as a readable message, with the event's fields in the log
+    record's `call_event` attribute for structured log handlers.
+    """
+
+    def __init__(self, logger: logging.Logger = log, level: int = logging.INFO):
+        self.logger: logging.Logger = logger
+        self.level: int = level
+
+    def emit(self, event: CallEvent) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(
+                self.level, "%s", event.summary_str(), extra={"call_event": event.model_dump()}
+            )
+
+
+class OtelSink:
+    """
+    Export each model call as an OpenTelemetry span, using the GenAI semantic
+    conventions where they apply. Spans go to the globally configured tracer
+    provider (e.g. set up by the OpenTelemetry SDK or `opentelemetry-instrument`)
+    and are dropped if there is none.
+    """
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._tracer: Tracer = trace.get_tracer("leximetry")
+
+    def emit(self, event: CallEvent) -> None:
+        from opentelemetry.trace import Status, StatusCode
+
+        if event.cached:
+            return
+        attributes: dict[str, str | int | float | list[str]] = {
+            "gen_ai.request.model": event.model,
+            "gen_ai.usage.input_tokens": event.prompt_tokens,
+            "gen_ai.usage.output_tokens": event.completion_tokens,
+            "leximetry.metrics": event.metrics,
+            "leximetry.cached_tokens": event.cached_tokens,
+            "leximetry.queue_wait": event.queue_wait,
+            "leximetry.limiter_wait": event.limiter_wait,
+            "leximetry.retries": event.retries,
+            "leximetry.parse_failures": event.parse_failures,
+        }
+        if event.cost is not None:
+            attributes["leximetry.cost"] = event.cost
+        start_ns = int(event.start_time * 1e9)
+        span = self._tracer.start_span(
+            "leximetry.evaluate", start_time=start_ns, attributes=attributes
+        )
+        if event.error:
+            span.set_status(Status(StatusCode.ERROR, event.error))
+        span.end(end_time=start_ns + int(event.latency * 1e9))
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+class CallTracer:
+    """
+    Records `CallEvent`s, passing each to its sinks and keeping totals for a
+    `RunSummary`. A `child()` tracer keeps separate totals (e.g. for one
+    document in a batch) and also records each event to its parent.
+    """
+
+    def __init__(self, sinks: Sequence[CallSink] = (), parent: CallTracer | None = None):
+        self.sinks: list[CallSink] = list(sinks)
+        self.parent: CallTracer | None = parent
+        self._totals: RunSummary = RunSummary()
+        self._latencies: list[float] = []
+        self._cost_known: bool = True
+
+    def child(self) -> CallTracer:
+        return CallTracer(parent=self)
+
+    def record(self, event: CallEvent) -> None:
+        self.add_to_totals(event)
+        for sink in self.sinks:
+            sink.emit(event)
+        if self.parent:
+            self.parent.record(event)
+
+    def add_to_totals(self, event: CallEvent) -> None:
+        """
+        Count an event in this tracer's totals only, without passing it to sinks
+        or the parent.
+        """
+        totals = self._totals
+        totals.calls += 1
+        totals.parse_failures += event.parse_failures
+        if event.cached:
+            totals.cached_calls += 1
+        elif event.error:
+            totals.failed_calls += 1
+        else:
+            self._latencies.append(event.latency)
+            totals.retries += event.retries
+        totals.prompt_tokens += event.prompt_tokens
+        totals.completion_tokens += event.completion_tokens
+        totals.cached_tokens += event.cached_tokens
+        if event.cost is None and not event.cached:
+            self._cost_known = False
+        else:
+            totals.cost = (totals.cost or 0.0) + (event.cost or 0.0)
+
+    def summary(self) -> RunSummary:
+        latencies = self._latencies
+        return self._totals.model_copy(
+            update={
+                "latency_p50": round(percentile(latencies, 50), 4) if latencies else None,
+                "latency_p95": round(percentile(latencies, 95), 4) if latencies else None,
+                "total_tokens": self._totals.prompt_tokens + self._totals.completion_tokens,
+                "cost": round(self._totals.cost or 0.0, 6) if self._cost_known else None,
+            }
+        )
+
+
+def split_event(event: CallEvent, num_shares: int) -> list[CallEvent]:
+    """
+    Split an event into `num_shares` equal shares of its tokens, parse failures,
+    and cost (with any remainder of a count going to the first shares). Timing
+    is kept as is, since each share waited for the whole call.
+    """
+
+    def split_count(count: int, i: int) -> int:
+        return count // num_shares + (i < count % num_shares)
+
+    return [
+        event.model_copy(
+            update={
+                "prompt_tokens": split_count(event.prompt_tokens, i),
+                "completion_tokens": split_count(event.completion_tokens, i),
+                "cached_tokens": split_count(event.cached_tokens, i),
+                "parse_failures": split_count(event.parse_failures, i),
+                "cost": None if event.cost is None else event.cost / num_shares,
+            }
+        )
+        for i in range(num_shares)
+    ]
+
+
+class SharedCallTracer(CallTracer):
+    """
+    Tracer for calls shared by several documents, like a packed call. Each
+    event is recorded once, to `parent`, and a share of it is added to the
+    totals of each document's tracer in `shares`, so per-document summaries
+    include the documents' part of the call without counting it twice.
+    """
+
+    def __init__(self, parent: CallTracer | None, shares: Sequence[CallTracer]):
+        super().__init__(parent=parent)
+        self.shares: list[CallTracer] = list(shares)
+
+    @override
+    def record(self, event: CallEvent) -> None:
+        if self.shares:
+            for tracer, share in zip(
+                self.shares, split_event(event, len(self.shares)), strict=True
+            ):
+                tracer.add_to_totals(share)
+        super().record(event)
+
+
+## Tests
+
+
+def test_call_tracer():
+    import tempfile
+
+    from leximetry.utils.jsonl_sink import read_jsonl_records
+
+    def event(latency: float, **kwargs: object) -> CallEvent:
+        return CallEvent.model_validate(
+            {
+                "metrics": ["clarity"],
+                "model": "openai:gpt-4o",
+                "start_time": 1.0,
+                "latency": latency,
+                "prompt_tokens": 1000,
+                "completion_tokens": 20,
+                "cost": 0.001,
+                **kwargs,
+            }
+        )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        trace_path = Path(tmp_dir) / "trace.jsonl"
+        with JsonlTraceSink(trace_path) as sink:
+            tracer = CallTracer([sink, LoggingSink()])
+            doc_tracer = tracer.child()
+            for latency in (1.0, 2.0, 3.0, 4.0):
+                doc_tracer.record(event(latency, retries=1))
+            tracer.record(event(10.0, error="ModelHTTPError: 500", parse_failures=3))
+            tracer.record(event(0.0, cached=True, prompt_tokens=0, completion_tokens=0, cost=None))
+
+        events = list(read_jsonl_records(trace_path, CallEvent))
+        assert len(events) == 6
+        assert (
+            events[0].summary_str()
+            == "Evaluated clarity (prompt 0 bytes, 1000 tokens, 1 retry) in 1.00s"
+        )
+
+    doc_summary = doc_tracer.summary()
+    assert (doc_summary.calls, doc_summary.retries, doc_summary.total_tokens) == (4, 4, 4080)
+    assert (doc_summary.latency_p50, doc_summary.latency_p95) == (2.5, 3.85)
+
+    run_summary = tracer.summary()
+    assert (run_summary.calls, run_summary.cached_calls, run_summary.failed_calls) == (6, 1, 1)
+    assert run_summary.latency_p95 == 3.85 and run_summary.cost == 0.005
+    assert run_summary.parse_failures == 3
+    assert run_summary.summary_str() == (
+        "LLM calls: 6 calls (1 cached, 1 failed, 3 parse failures), latency p50 2.50s, p95 3.85s, "
+        "estimated cost $0.0050"
+    )
+
+    unpriced = CallTracer()
+    unpriced.record(event(1.0, cost=None))
+    assert unpriced.summary().cost is None
+
+
+def test_shared_call_tracer():
+    tracer = CallTracer()
+    doc_tracers = [tracer.child() for _ in range(3)]
+    shared = SharedCallTracer(tracer, doc_tracers)
+    shared.record(
+        CallEvent(
+            metrics=["clarity"],
+            model="openai:gpt-4o",
+            start_time=1.0,
+            latency=2.0,
+            prompt_tokens=1000,
+            completion_tokens=20,
+            cost=0.003,
+        )
+    )
+
+    # The run counts the call once, and each document counts its share.
+    run_summary = tracer.summary()
+    assert (run_summary.calls, run_summary.total_tokens, run_summary.cost) == (1, 1020, 0.003)
+    doc_summaries = [doc_tracer.summary() for doc_tracer in doc_tracers]
+    assert [summary.prompt_tokens for summary in doc_summaries] == [334, 333, 333]
+    assert [summary.completion_tokens for summary in doc_summaries] == [7, 7, 6]
+    assert all(summary.calls == 1 and summary.cost == 0.001 for summary in doc_summaries)
+    assert all(summary.latency_p50 == 2.0 for summary in doc_summaries)
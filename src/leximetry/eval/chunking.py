@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from chopdiff.docs import Paragraph, TextUnit
+
+from leximetry.eval.doc_analysis import DocAnalysis, analyze
+from leximetry.eval.eval_options import Aggregation
+from leximetry.eval.metrics_model import Score
+
+DEFAULT_CHUNK_TOKENS = 8000
+
+PARA_SEP = "\n\n"
+
+
+@dataclass(frozen=True)
+class ChunkSettings:
+    """
+    Settings for evaluating long documents in chunks.
+    """
+
+    max_size: int = DEFAULT_CHUNK_TOKENS
+    unit: TextUnit = TextUnit.tiktokens
+    aggregation: Aggregation = "mean"
+    max_notes: int = 3
+
+
+@dataclass(frozen=True)
+class TextChunk:
+    text: str
+    size: int
+
+
+def split_paragraph(para: Paragraph, max_size: int, unit: TextUnit) -> list[TextChunk]:
+    """
+    Split a paragraph that's too large for one chunk at sentence boundaries.
+    A single sentence larger than `max_size` becomes its own chunk.
+    """
+    chunks: list[TextChunk] = []
+    sents: list[str] = []
+    chunk_size = 0
+    for sent in para.sentences:
+        sent_size = sent.size(unit)
+        if sents and chunk_size + sent_size > max_size:
+            chunks.append(TextChunk(" ".join(sents), chunk_size))
+            sents, chunk_size = [], 0
+        sents.append(sent.text)
+        chunk_size += sent_size
+    if sents:
+        chunks.append(TextChunk(" ".join(sents), chunk_size))
+    return chunks
+
+
+def iter_chunks(
+    text: str | DocAnalysis, max_size: int, unit: TextUnit = TextUnit.tiktokens
+) -> Iterator[TextChunk]:
+    """
+    Split text into chunks of at most about `max_size` (in `unit`s), breaking
+    only between paragraphs where possible. Once a chunk is at least half full,
+    a Markdown or HTML header starts a new chunk so sections stay together.
+    Paragraphs too large for a chunk are split between sentences.
+
+    Chunks are generated as the document's paragraphs are read, so a long
+    document can be evaluated without holding all its chunks at once.
+    """
+    paras: list[str] = []
+    chunk_size = 0
+    for para, para_size in analyze(text).sized_paragraphs(unit):
+        if para_size > max_size:
+            if paras:
+                yield TextChunk(PARA_SEP.join(paras), chunk_size)
+                paras, chunk_size = [], 0
+            yield from split_paragraph(para, max_size, unit)
+            continue
+
+        starts_section = para.is_header() and chunk_size >= max_size // 2
+        if paras and (chunk_size + para_size > max_size or starts_section):
+            yield TextChunk(PARA_SEP.join(paras), chunk_size)
+            paras, chunk_size = [], 0
+        paras.append(para.original_text)
+        chunk_size += para_size
+
+    if paras:
+        yield TextChunk(PARA_SEP.join(paras), chunk_size)
+
+
+def chunk_text(
+    text: str | DocAnalysis, max_size: int, unit: TextUnit = TextUnit.tiktokens
+) -> list[TextChunk]:
+    """
+    All the chunks of a text (see `iter_chunks()`).
+    """
+    return list(iter_chunks(text, max_size, unit))
+
+
+def aggregate_scores(
+    chunk_scores: list[tuple[Score, int]], aggregation: Aggregation = "mean", max_notes: int = 3
+) -> Score:
+    """
+    Combine `(score, chunk_size)` pairs into one score, with a size-weighted
+    mean rounded half up, or the min or max. Chunks scored 0 ("cannot
+    assess") are ignored unless no chunk could be assessed. Notes are merged
+    from up to `max_notes` of the chunks that determined the result: the
+    largest chunks for a mean, or the lowest or highest scoring chunks. In a
+    cascaded evaluation, the result is "escalated" if any chunk's score was.
+    With multi-sample scores, the result keeps the largest spread of any chunk.
+    """
+    if not chunk_scores:
+        return Score(value=0, note="Not evaluated")
+
+    assessed = [(score, size) for score, size in chunk_scores if score.value > 0]
+    if not assessed:
+        assessed = chunk_scores
+
+    if aggregation == "mean":
+        total_size = sum(size for _, size in assessed) or len(assessed)
+        weighted = sum(score.value * (size or 1) for score, size in assessed) / total_size
+        # Round half up, so a mean halfway between two scores always takes the
+        # higher one (`round()` rounds half to even, so 2.5 would give 2 but
+        # 3.5 would give 4).
+        value = math.floor(weighted + 0.5)
+        note_order = sorted(assessed, key=lambda pair: -pair[1])
+    elif aggregation == "min":
+        value = min(score.value for score, _ in assessed)
+        note_order = sorted(assessed, key=lambda pair: (pair[0].value, -pair[1]))
+    elif aggregation == "max":
+        value = max(score.value for score, _ in assessed)
+        note_order = sorted(assessed, key=lambda pair: (-pair[0].value, -pair[1]))
+    else:
+        raise ValueError(f"Unknown aggregation: {aggregation!r}")
+
+    notes: list[str] = []
+    for score, _ in note_order:
+        if score.note and score.note not in notes:
+            notes.append(score.note)
+        if len(notes) >= max_notes:
+            break
+
+    tiers = {score.tier for score, _ in assessed}
+    tier = "escalated" if "escalated" in tiers else assessed[0][0].tier
+
+    spreads = [score.spread for score, _ in assessed if score.spread is not None]
+    return Score(
+        value=value,
+        note=" ".join(notes),
+        tier=tier,
+        samples=assessed[0][0].samples,
+        spread=max(spreads) if spreads else None,
+    )
+
+
+## Tests
+
+
+def test_chunk_text():
+    para = "This is a sentence of eight words here. " * 5
+    text = PARA_SEP.join([para.strip()] * 6)
+
+    chunks = chunk_text(text, max_size=100, unit=TextUnit.words)
+    # Each paragraph is 40 words, so two fit per chunk.
+    assert [chunk.size for chunk in chunks] == [80, 80, 80]
+    assert PARA_SEP.join(chunk.text for chunk in chunks) == text
+
+    # A header starts a new chunk once the current one is half full.
+    with_header = PARA_SEP.join([para.strip(), para.strip(), "## Part Two", para.strip()])
+    chunks = chunk_text(with_header, max_size=120, unit=TextUnit.words)
+    assert len(chunks) == 2
+    assert chunks[1].text.startswith("## Part Two")
+
+    # Oversized paragraphs split at sentence boundaries.
+    chunks = chunk_text(para.strip(), max_size=20, unit=TextUnit.words)
+    assert [chunk.size for chunk in chunks] == [16, 16, 8]
+
+
+def test_aggregate_scores():
+    chunk_scores = [
+        (Score(value=5, note="Great start."), 300),
+        (Score(value=2, note="Weak middle."), 100),
+        (Score(value=0, note="Insufficient content"), 10),
+    ]
+    assert aggregate_scores(chunk_scores, "mean") == Score(
+        value=4, note="Great start. Weak middle."
+    )
+    assert aggregate_scores(chunk_scores, "min", max_notes=1) == Score(value=2, note="Weak middle.")
+    assert aggregate_scores(chunk_scores, "max").value == 5
+    assert aggregate_scores([(Score(value=0, note="Empty"), 5)]) == Score(value=0, note="Empty")
+    # Means halfway between scores round up.
+    for low in (2, 3):
+        halves = [(Score(value=low), 100), (Score(value=low + 1), 100)]
+        assert aggregate_scores(halves, "mean").value == low + 1
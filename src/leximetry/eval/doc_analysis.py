@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from functools import cached_property
+
+from chopdiff.docs import Paragraph, TextDoc, TextUnit
+from chopdiff.docs.sizes import size
+from chopdiff.util import tiktoken_len
+
+from leximetry.eval.preflight import normalize_newlines
+
+PARA_BREAK = "\n\n"
+
+
+@dataclass(frozen=True)
+class DocSizes:
+    """
+    Sizes of a document, counted the same way as `TextDoc.size()`.
+    """
+
+    bytes: int
+    lines: int
+    paragraphs: int
+    sentences: int
+    words: int
+
+
+STREAM_BLOCK_CHARS = 1_000_000
+"""
+Texts longer than this are parsed in blocks of about this size, split at
+paragraph breaks, instead of as one `TextDoc`.
+"""
+
+
+def utf8_size(text: str) -> int:
+    """
+    Size of the text in UTF-8 bytes, without encoding a copy of a long text.
+    """
+    if text.isascii():
+        return len(text)
+    return sum(
+        len(text[i : i + STREAM_BLOCK_CHARS].encode("utf-8"))
+        for i in range(0, len(text), STREAM_BLOCK_CHARS)
+    )
+
+
+class DocAnalysis:
+    """
+    A document parsed once, with its sizes computed on first use and memoized,
+    so validation, sampling, chunking, prompt token estimates, and the report
+    all share one parse instead of each re-scanning the text.
+
+    Sizes other than tokens are counted in a single pass over the sentences.
+    Token counts are memoized separately per counting function, since
+    tokenizing is slower and not every run needs it.
+
+    Long texts (over `block_chars`) are streamed instead: they're parsed
+    and tokenized a block at a time, so only one block's parse is held at
+    once (the text itself and per-paragraph sizes are still kept whole).
+    Each pass over their paragraphs parses again, trading some time for
+    memory. Line endings are normalized to `\n` so blocks split at paragraph
+    breaks in CRLF text too.
+    """
+
+    def __init__(self, text: str, block_chars: int = STREAM_BLOCK_CHARS):
+        self.text: str = normalize_newlines(text)
+        self.block_chars: int = block_chars
+        self._para_sizes: dict[TextUnit, list[int]] = {}
+        self._token_counts: dict[Callable[[str], int], int] = {}
+
+    @property
+    def is_streamed(self) -> bool:
+        return len(self.text) > self.block_chars
+
+    @cached_property
+    def doc(self) -> TextDoc:
+        """
+        The whole document parsed at once. Prefer `paragraphs()`, which doesn't
+        hold a parse of long texts in memory.
+        """
+        return TextDoc.from_text(self.text)
+
+    def blocks(self) -> Iterator[str]:
+        """
+        The text in consecutive blocks of about `block_chars`, each ending at a paragraph break (or the end of the text).
+        """
+        start = 0
+        while start < len(self.text):
+            end = self.text.find(PARA_BREAK, start + self.block_chars)
+            end = len(self.text) if end < 0 else end + len(PARA_BREAK)
+            yield self.text[start:end]
+            start = end
+
+    def paragraphs(self) -> Iterator[Paragraph]:
+        if not self.is_streamed:
+            yield from self.doc.paragraphs
+            return
+        for block in self.blocks():
+            yield from TextDoc.from_text(block).paragraphs
+
+    def sized_paragraphs(self, unit: TextUnit) -> Iterator[tuple[Paragraph, int]]:
+        """
+        Each paragraph with its size in `unit`s, memoizing the sizes once all
+        paragraphs have been seen.
+        """
+        known = self._para_sizes.get(unit)
+        if known is not None:
+            yield from zip(self.paragraphs(), known, strict=True)
+            return
+        para_sizes: list[int] = []
+        for para in self.paragraphs():
+            para_sizes.append(para.size(unit))
+            yield para, para_sizes[-1]
+        self._para_sizes[unit] = para_sizes
+
+    @cached_property
+    def sizes(self) -> DocSizes:
+        para_lines: list[int] = []
+        para_sents: list[int] = []
+        para_words: list[int] = []
+        for para in self.paragraphs():
+            para_lines.append(len(para.original_text.splitlines()))
+            para_sents.append(len(para.sentences))
+            para_words.append(sum(size(sent.text, TextUnit.words) for sent in para.sentences))
+        self._para_sizes.setdefault(TextUnit.lines, para_lines)
+        self._para_sizes.setdefault(TextUnit.sentences, para_sents)
+        self._para_sizes.setdefault(TextUnit.words, para_words)
+
+        num_paras = len(para_words)
+        return DocSizes(
+            bytes=utf8_size(self.text),
+            lines=sum(para_lines) + max(num_paras - 1, 0),
+            paragraphs=num_paras,
+            sentences=sum(para_sents),
+            words=sum(para_words),
+        )
+
+    def token_count(self, count_tokens: Callable[[str], int] = tiktoken_len) -> int:
+        """
+        Size of the whole text as counted by `count_tokens` (tiktoken by
+        default). Long texts are counted a block at a time.
+        """
+        if count_tokens not in self._token_counts:
+            self._token_counts[count_tokens] = sum(count_tokens(block) for block in self.blocks())
+        return self._token_counts[count_tokens]
+
+    @property
+    def tiktokens(self) -> int:
+        return self.token_count(tiktoken_len)
+
+    @cached_property
+    def content_hash(self) -> str:
+        """
+        SHA-256 of the text, hashed a block at a time. Memoized, so cache keys
+        for every metric of a document share one pass over the text.
+        """
+        digest = hashlib.sha256()
+        for i in range(0, len(self.text), self.block_chars):
+            digest.update(self.text[i : i + self.block_chars].encode("utf-8"))
+        return digest.hexdigest()
+
+    def para_sizes(self, unit: TextUnit) -> list[int]:
+        """
+        Size of each paragraph in `unit`s, in document order.
+        """
+        if unit in (TextUnit.lines, TextUnit.sentences, TextUnit.words):
+            _ = self.sizes
+        if unit not in self._para_sizes:
+            for _ in self.sized_paragraphs(unit):
+                pass
+        return self._para_sizes[unit]
+
+    def size(self, unit: TextUnit) -> int:
+        if unit == TextUnit.tiktokens:
+            return self.tiktokens
+        if unit == TextUnit.bytes:
+            return self.sizes.bytes
+        if unit == TextUnit.lines:
+            return self.sizes.lines
+        if unit == TextUnit.paragraphs:
+            return self.sizes.paragraphs
+        if unit == TextUnit.sentences:
+            return self.sizes.sentences
+        if unit == TextUnit.words:
+            return self.sizes.words
+        return self.doc.size(unit)
+
+
+def analyze(text: str | DocAnalysis) -> DocAnalysis:
+    """
+    The analysis of a text, reusing it if `text` is already analyzed.
+    """
+    return text if isinstance(text, DocAnalysis) else DocAnalysis(text)
+
+
+## Tests
+
+
+def test_doc_analysis():
+    text = "# Title\n\nThe quick brown fox. It jumps over the lazy dog.\n\nA <b>bold</b> end.\nWith two lines."
+    analysis = analyze(text)
+    assert analyze(analysis) is analysis
+
+    doc = TextDoc.from_text(text)
+    for unit in (
+        TextUnit.bytes,
+        TextUnit.lines,
+        TextUnit.paragraphs,
+        TextUnit.sentences,
+        TextUnit.words,
+    ):
+        assert analysis.size(unit) == doc.size(unit), unit
+    assert analysis.para_sizes(TextUnit.words) == [
+        para.size(TextUnit.words) for para in doc.paragraphs
+    ]
+
+    calls: list[str] = []
+
+    def count_words(s: str) -> int:
+        calls.append(s)
+        return len(s.split())
+
+    assert analysis.token_count(count_words) == analysis.token_count(count_words) == 18
+    assert len(calls) == 1
+
+    assert analysis.content_hash == DocAnalysis(text, block_chars=10).content_hash
+    assert analysis.content_hash != DocAnalysis(text + " ").content_hash
+
+
+def test_streamed_analysis():
+    paras = [f"Paragraph {i} is here. It has two sentences, and “ünïcode”." for i in range(40)]
+    text = "\n\n".join(paras)
+    whole = DocAnalysis(text)
+    streamed = DocAnalysis(text, block_chars=200)
+    assert streamed.is_streamed and not whole.is_streamed
+    blocks = list(streamed.blocks())
+    assert len(blocks) > 5 and "".join(blocks) == text
+    assert streamed.sizes == whole.sizes
+    assert streamed.sizes.bytes == len(text.encode("utf-8"))
+    assert streamed.para_sizes(TextUnit.chars) == whole.para_sizes(TextUnit.chars)
+    assert [para.original_text for para in streamed.paragraphs()] == paras
+    # Streaming never parses the whole document at once.
+    assert "doc" not in streamed.__dict__
+
+    crlf = DocAnalysis(text.replace("\n", "\r\n"), block_chars=200)
+    assert crlf.text == text and len(list(crlf.blocks())) == len(blocks)
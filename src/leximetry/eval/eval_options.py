@@ -0,0 +1,62 @@
+"""
+Option types and defaults shared by the evaluation modules and the CLI. This
+module has no third-party imports, so the CLI can build its argument parser
+(and answer `--help` or `--version`) without loading the evaluation stack.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Literal, get_args
+
+if TYPE_CHECKING:
+    from pydantic_ai.models import Model
+
+EvalStrategy = Literal["per-metric", "per-group", "single"]
+"""
+How to split the rubric into LLM calls: one call per metric, one call per metric
+group (Expression, Style, Groundedness, Impact), or a single call for all metrics.
+"""
+
+EVAL_STRATEGIES: tuple[EvalStrategy, ...] = get_args(EvalStrategy)
+
+Aggregation = Literal["mean", "min", "max"]
+"""
+How per-chunk scores combine into one score: the mean weighted by chunk size,
+or the minimum or maximum over chunks.
+"""
+
+AGGREGATIONS: tuple[Aggregation, ...] = get_args(Aggregation)
+
+
+@dataclass(frozen=True)
+class CascadeSettings:
+    """
+    Cascaded evaluation: screen every metric with the (cheap) main model, then
+    re-score only the metrics the screen is unsure of with `escalate_model`.
+
+    The screen scores each metric twice, with the evaluation strategy and with
+    `check_strategy` (by default "single", or "per-metric" if the evaluation
+    strategy is "single"). A metric is unsure if its two screen scores differ
+    by more than `max_disagreement`. The two prompts differ, so disagreement
+    shows where the cheap model's judgment is unstable, and the check costs
+    about one extra cheap call per document with the default strategies.
+    """
+
+    escalate_model: str | Model
+    check_strategy: EvalStrategy | None = None
+    max_disagreement: int = 0
+
+    def check_strategy_for(self, strategy: EvalStrategy) -> EvalStrategy:
+        if self.check_strategy:
+            if self.check_strategy == strategy:
+                raise ValueError(
+                    f"Cascade check strategy must differ from the evaluation strategy: {strategy!r}"
+                )
+            return self.check_strategy
+        return "per-metric" if strategy == "single" else "single"
+
+
+DEFAULT_SAMPLE_TOKENS = 4000
+
+CACHE_DIR_ENV = "LEXIMETRY_CACHE_DIR"
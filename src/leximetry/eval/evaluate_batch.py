@@ -0,0 +1,601 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator, Iterable
+from contextlib import aclosing
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, SerializeAsAny
+from pydantic_ai.models import Model
+from strif import hash_file, hash_string, iso_timestamp
+
+from leximetry.eval.call_trace import CallTracer, RunSummary
+from leximetry.eval.chunking import ChunkSettings
+from leximetry.eval.doc_analysis import DocAnalysis
+from leximetry.eval.eval_options import CascadeSettings, EvalStrategy
+from leximetry.eval.evaluate_text import (
+    check_text_size,
+    evaluate_text_async,
+    model_display_name,
+    run_sync,
+)
+from leximetry.eval.metrics_model import (
+    ProseMetrics,
+    RubricMetrics,
+    ScoringRubric,
+    get_rubric,
+    load_scoring_rubric,
+)
+from leximetry.eval.model_registry import get_model
+from leximetry.eval.packing import PackSettings, TextPacker
+from leximetry.eval.preflight import TextRejected, read_text_file
+from leximetry.eval.sampling import SampleSettings, sample_text
+from leximetry.eval.score_cache import ScoreCache
+from leximetry.eval.usage_stats import UsageStats
+from leximetry.utils.aio_limited import CallLimiter
+from leximetry.utils.jsonl_sink import JsonlSink, read_jsonl_records
+
+log = logging.getLogger(__name__)
+
+
+class BatchRecord(BaseModel):
+    """
+    One JSONL output record per input document. Exactly one of `metrics`,
+    `rejected` (why the input wasn't evaluated, e.g. too short or binary), or
+    `error` is set. `content_hash` identifies the document text so runs can be
+    resumed even if files move, and `elapsed` is the wall-clock seconds spent
+    on the document. `sample_fraction` is set if only a sample was scored.
+    `calls` summarizes the document's LLM calls, if they were traced.
+    Metrics scored with a custom rubric read back as `RubricMetrics` with
+    the rubric's groups as extra fields.
+    """
+
+    path: str
+    content_hash: str
+    model: str
+    timestamp: str
+    elapsed: float
+    metrics: SerializeAsAny[ProseMetrics | RubricMetrics] | None = None
+    sample_fraction: float | None = None
+    calls: RunSummary | None = None
+    rejected: str | None = None
+    error: str | None = None
+
+
+class BatchRecordKey(BaseModel):
+    """
+    The fields of a `BatchRecord` needed to resume a run. Reading records as
+    these skips validating every record's metrics and call summary.
+    """
+
+    content_hash: str
+    model: str
+    metrics: Any = None
+
+
+def content_hash(text: str) -> str:
+    return hash_string(text, algorithm="sha256").with_prefix
+
+
+def file_content_hash(path: Path) -> str:
+    """
+    Hash of a file's bytes, read in blocks. This equals `content_hash()` of
+    the file's text only if it has `\n` line endings, since reading the text
+    normalizes newlines, but it's stable for resuming runs over the same files.
+    """
+    return hash_file(path, algorithm="sha256").with_prefix
+
+
+def completed_hashes(output_path: Path, model: str) -> set[str]:
+    """
+    Content hashes of documents that already have a successful record for
+    this model in an existing output file. The file is streamed a line at a
+    time, keeping only the hashes.
+    """
+    return {
+        record.content_hash
+        for record in read_jsonl_records(output_path, BatchRecordKey)
+        if record.metrics is not None and record.model == model
+    }
+
+
+@dataclass
+class BatchSummary:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    rejected: int = 0
+    skipped: int = 0
+
+    def summary_str(self) -> str:
+        summary = (
+            f"Evaluated {self.total} documents: {self.succeeded} succeeded, {self.failed} failed"
+        )
+        if self.rejected:
+            summary += f", {self.rejected} rejected as too short or not text"
+        if self.skipped:
+            summary += f", {self.skipped} skipped as already done"
+        return summary
+
+
+def make_packer(
+    model: Model,
+    pack_settings: PackSettings | None,
+    cache: ScoreCache | None,
+    limiter: CallLimiter,
+    usage: UsageStats | None,
+    tracer: CallTracer | None,
+    cascade: CascadeSettings | None,
+    samples: int,
+    strict: bool,
+    rubric: ScoringRubric,
+) -> TextPacker | None:
+    if not pack_settings:
+        return None
+    if cascade or samples > 1:
+        raise ValueError("Packing short documents doesn't support cascades or multiple samples")
+    return TextPacker(model, pack_settings, cache, limiter, usage, tracer, strict, rubric)
+
+
+def rubric_label(rubric: ScoringRubric) -> str:
+    """
+    Noted in the model of batch records scored with a custom rubric, so
+    resuming only reuses records scored with the same rubric.
+    """
+    if rubric.content_hash == load_scoring_rubric().content_hash:
+        return ""
+    return f" (rubric {rubric.content_hash[:12]})"
+
+
+@dataclass(frozen=True)
+class TextResult:
+    """
+    The result for the text at `index` in the input: its `metrics`, or the
+    `error` that stopped its evaluation.
+    """
+
+    index: int
+    metrics: RubricMetrics | None = None
+    error: Exception | None = None
+
+
+async def iter_evaluate_texts(
+    texts: Iterable[str],
+    model_name: str | Model = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    chunk_settings: ChunkSettings | None = None,
+    max_docs_in_flight: int | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    cascade: CascadeSettings | None = None,
+    samples: int = 1,
+    pack_settings: PackSettings | None = None,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> AsyncGenerator[TextResult, None]:
+    """
+    Evaluate many texts concurrently in the caller's event loop, yielding a
+    `TextResult` for each as soon as it completes (so not in input order).
+    A failure on one text is yielded as its result and doesn't stop the others.
+
+    All LLM calls share one `limiter`, which may be shared with other work in
+    the same loop. Texts are read from `texts` lazily and at most
+    `max_docs_in_flight` (default twice the call concurrency) are evaluated at
+    a time, so `texts` can be a large or unbounded stream. Closing the
+    iterator early cancels texts still in flight. With `pack_settings`, short
+    texts are scored several at a time (see `TextPacker`). The `rubric` is
+    loaded once and used for all texts.
+    """
+    scoring_rubric = get_rubric(rubric)
+    if limiter is None:
+        limiter = CallLimiter()
+    if max_docs_in_flight is None:
+        max_docs_in_flight = 2 * limiter.max_concurrent
+    model = get_model(model_name)
+    packer = make_packer(
+        model,
+        pack_settings,
+        cache,
+        limiter,
+        usage,
+        tracer,
+        cascade,
+        samples,
+        strict,
+        scoring_rubric,
+    )
+
+    async def evaluate(index: int, text: str) -> TextResult:
+        try:
+            analysis = DocAnalysis(text)
+            check_text_size(analysis)
+            if packer and packer.fits(analysis):
+                return TextResult(index, metrics=await packer.evaluate(analysis))
+            metrics = await evaluate_text_async(
+                analysis,
+                model,
+                cache,
+                strategy,
+                limiter,
+                chunk_settings,
+                usage,
+                tracer,
+                cascade,
+                samples,
+                strict,
+                scoring_rubric,
+            )
+            return TextResult(index, metrics=metrics)
+        except Exception as e:
+            return TextResult(index, error=e)
+
+    indexed_texts = enumerate(texts)
+    pending: set[asyncio.Task[TextResult]] = set()
+    try:
+        while True:
+            for index, text in islice(indexed_texts, max_docs_in_flight - len(pending)):
+                pending.add(asyncio.create_task(evaluate(index, text)))
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def evaluate_texts_async(
+    texts: Iterable[str],
+    model_name: str | Model = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    chunk_settings: ChunkSettings | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    cascade: CascadeSettings | None = None,
+    samples: int = 1,
+    pack_settings: PackSettings | None = None,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> list[RubricMetrics]:
+    """
+    Evaluate many texts concurrently in the caller's event loop and return
+    their metrics in input order. Raises the first error, cancelling the
+    remaining texts. Use `iter_evaluate_texts()` to get results as they
+    complete or to handle errors per text.
+    """
+    results: dict[int, RubricMetrics] = {}
+    async with aclosing(
+        iter_evaluate_texts(
+            texts,
+            model_name,
+            cache,
+            strategy,
+            limiter,
+            chunk_settings,
+            None,
+            usage,
+            tracer,
+            cascade,
+            samples,
+            pack_settings,
+            strict,
+            rubric,
+        )
+    ) as text_results:
+        async for result in text_results:
+            if result.error:
+                raise result.error
+            assert result.metrics
+            results[result.index] = result.metrics
+    return [results[index] for index in range(len(results))]
+
+
+async def evaluate_files_async(
+    paths: list[Path],
+    output_path: Path,
+    model_name: str | Model = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    resume: bool = False,
+    chunk_settings: ChunkSettings | None = None,
+    sample_settings: SampleSettings | None = None,
+    max_docs_in_flight: int | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    cascade: CascadeSettings | None = None,
+    samples: int = 1,
+    pack_settings: PackSettings | None = None,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> BatchSummary:
+    """
+    Evaluate many files in one process, appending a `BatchRecord` line to the
+    JSONL `output_path` as each document finishes. Existing records in the
+    output file are never overwritten. With `resume`, documents whose content
+    already has a successful record for this model are skipped, so an
+    interrupted run only redoes the remaining work.
+
+    All LLM calls for all documents share one `limiter`, so concurrency and rate
+    limits are global. Documents themselves are started at most
+    `max_docs_in_flight` at a time (default twice the call concurrency) so
+    memory stays bounded on large corpora. A failure on one document is recorded
+    in its output record and doesn't stop the batch. Files that are too short
+    or aren't text are rejected by cheap pre-flight checks, before parsing or
+    any LLM call, and are recorded and counted as rejected. With a `tracer`, each
+    record includes a summary of the document's LLM calls. With `cascade`, the
+    record's model names both the screening and the escalation model, and
+    with `samples` over 1 it notes the number of samples, so resuming only
+    reuses records scored the same way. The same goes for a custom `rubric`,
+    which is loaded once for the batch. With `pack_settings`, short documents
+    are scored several at a time (see `TextPacker`).
+    """
+    scoring_rubric = get_rubric(rubric)
+    if limiter is None:
+        limiter = CallLimiter()
+    if max_docs_in_flight is None:
+        max_docs_in_flight = 2 * limiter.max_concurrent
+
+    model = get_model(model_name)
+    model_str = model_display_name(model)
+    if cascade:
+        model_str += f" > {model_display_name(get_model(cascade.escalate_model))}"
+    if samples > 1:
+        model_str += f" ({samples} samples)"
+    model_str += rubric_label(scoring_rubric)
+    packer = make_packer(
+        model,
+        pack_settings,
+        cache,
+        limiter,
+        usage,
+        tracer,
+        cascade,
+        samples,
+        strict,
+        scoring_rubric,
+    )
+    doc_slots = asyncio.Semaphore(max_docs_in_flight)
+    summary = BatchSummary(total=len(paths))
+    done_hashes = completed_hashes(output_path, model_str) if resume else set[str]()
+
+    with JsonlSink(output_path) as sink:
+
+        async def evaluate_file(path: Path) -> None:
+            async with doc_slots:
+                start_time = time.time()
+                metrics = None
+                sample_fraction = None
+                rejected = None
+                error = None
+                doc_hash = ""
+                doc_tracer = tracer.child() if tracer else None
+                try:
+                    # Hash first, so completed documents are skipped without
+                    # decoding or analyzing them.
+                    doc_hash = file_content_hash(path)
+                    if doc_hash in done_hashes:
+                        summary.skipped += 1
+                        return
+                    analysis = DocAnalysis(read_text_file(path))
+                    check_text_size(analysis)
+                    if sample_settings:
+                        sample = sample_text(analysis, sample_settings)
+                        if sample.is_sampled:
+                            analysis = DocAnalysis(sample.text)
+                            sample_fraction = round(sample.fraction, 4)
+                    if packer and packer.fits(analysis):
+                        metrics = await packer.evaluate(analysis, doc_tracer)
+                    else:
+                        metrics = await evaluate_text_async(
+                            analysis,
+                            model,
+                            cache,
+                            strategy,
+                            limiter,
+                            chunk_settings,
+                            usage,
+                            doc_tracer,
+                            cascade,
+                            samples,
+                            strict,
+                            scoring_rubric,
+                        )
+                    summary.succeeded += 1
+                except TextRejected as e:
+                    log.info("Rejected %s: %s", path, e)
+                    rejected = str(e)
+                    summary.rejected += 1
+                except Exception as e:
+                    log.warning("Error evaluating %s: %s", path, e)
+                    error = str(e)
+                    summary.failed += 1
+
+            sink.write(
+                BatchRecord(
+                    path=str(path),
+                    content_hash=doc_hash,
+                    model=model_str,
+                    timestamp=iso_timestamp(),
+                    elapsed=round(time.time() - start_time, 3),
+                    metrics=metrics,
+                    sample_fraction=sample_fraction,
+                    calls=doc_tracer.summary() if doc_tracer else None,
+                    rejected=rejected,
+                    error=error,
+                )
+            )
+
+        await asyncio.gather(*[evaluate_file(path) for path in paths])
+
+    return summary
+
+
+def evaluate_files(
+    paths: list[Path],
+    output_path: Path,
+    model_name: str = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    resume: bool = False,
+    chunk_settings: ChunkSettings | None = None,
+    sample_settings: SampleSettings | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    cascade: CascadeSettings | None = None,
+    samples: int = 1,
+    pack_settings: PackSettings | None = None,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> BatchSummary:
+    """
+    Synchronous wrapper for evaluate_files_async.
+    """
+    return run_sync(
+        evaluate_files_async(
+            paths,
+            output_path,
+            model_name,
+            cache,
+            strategy,
+            limiter,
+            resume,
+            chunk_settings,
+            sample_settings,
+            usage=usage,
+            tracer=tracer,
+            cascade=cascade,
+            samples=samples,
+            pack_settings=pack_settings,
+            strict=strict,
+            rubric=rubric,
+        ),
+        "evaluate_files_async",
+    )
+
+
+## Tests
+
+
+def test_evaluate_files():
+    import tempfile
+
+    from pydantic_ai.models.test import TestModel
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        good = root / "good.txt"
+        good.write_text("The quick brown fox jumps over the lazy dog. " * 20)
+        short = root / "short.txt"
+        short.write_text("Too short.")
+        binary = root / "image.png"
+        binary.write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR")
+        output_path = root / "out.jsonl"
+
+        tracer = CallTracer()
+        summary = asyncio.run(
+            evaluate_files_async(
+                [good, short, binary],
+                output_path,
+                TestModel(custom_output_text="3 (Fine)"),
+                limiter=CallLimiter(max_concurrent=4, max_rps=1000),
+                tracer=tracer,
+            )
+        )
+        assert (summary.total, summary.succeeded, summary.failed, summary.rejected) == (3, 1, 0, 2)
+
+        records = {
+            record.path: record
+            for record in map(BatchRecord.model_validate_json, output_path.read_text().splitlines())
+        }
+        assert len(records) == 3
+        good_metrics = records[str(good)].metrics
+        assert good_metrics and good_metrics.all_scores()["clarity"].value == 3
+        short_rejected = records[str(short)].rejected
+        assert short_rejected and "too short" in short_rejected
+        binary_rejected = records[str(binary)].rejected
+        assert binary_rejected and "Binary" in binary_rejected and not records[str(binary)].error
+        assert records[str(good)].content_hash == content_hash(good.read_text())
+        assert file_content_hash(good) == content_hash(good.read_text())
+        good_calls = records[str(good)].calls
+        assert good_calls and good_calls.calls == 12 and good_calls.cost == 0.0
+        assert tracer.summary().calls == 12
+
+        # Resuming skips the completed document but rechecks the rejected ones.
+        resumed = asyncio.run(
+            evaluate_files_async(
+                [good, short, binary],
+                output_path,
+                TestModel(custom_output_text="3 (Fine)"),
+                limiter=CallLimiter(max_concurrent=4, max_rps=1000),
+                resume=True,
+            )
+        )
+        assert (resumed.succeeded, resumed.rejected, resumed.skipped) == (0, 2, 1)
+        assert completed_hashes(output_path, records[str(good)].model) == {
+            content_hash(good.read_text())
+        }
+        assert len(output_path.read_text().splitlines()) == 5
+
+
+def test_evaluate_texts_in_running_loop():
+    from leximetry.eval.evaluate_text import evaluate_text
+
+    good = "The quick brown fox jumps over the lazy dog. " * 20
+    texts = [good, "Too short.", good.replace("fox", "cat")]
+
+    async def run() -> tuple[list[TextResult], list[RubricMetrics]]:
+        # Called from inside a running loop, as in an async web server.
+        limiter = CallLimiter(max_concurrent=8, max_rps=1000)
+        try:
+            evaluate_text(good, "mock:latency=0")
+            raise AssertionError("Expected a RuntimeError")
+        except RuntimeError as e:
+            assert "evaluate_text_async" in str(e)
+
+        results = [
+            result async for result in iter_evaluate_texts(texts, "mock:latency=0", limiter=limiter)
+        ]
+        metrics = await evaluate_texts_async([good, good], "mock:latency=0", limiter=limiter)
+        try:
+            await evaluate_texts_async(texts, "mock:latency=0", limiter=limiter)
+            raise AssertionError("Expected a ValueError")
+        except ValueError as e:
+            assert "too short" in str(e)
+        return results, metrics
+
+    results, metrics = asyncio.run(run())
+    by_index = {result.index: result for result in results}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[0].metrics and by_index[2].metrics and not by_index[0].error
+    assert isinstance(by_index[1].error, ValueError) and by_index[1].metrics is None
+    assert metrics[0] == metrics[1] == by_index[0].metrics
+
+
+def test_custom_rubric_records():
+    from leximetry.eval.metrics_model import MetricRubric, Score
+
+    rubric = ScoringRubric(
+        metrics=[MetricRubric(name="Tone", description="Tone.", values={5: "Friendly"})]
+    )
+    metrics = rubric.metrics_type.from_scores({"tone": Score(value=4, note="Warm.")})
+    record = BatchRecord(
+        path="doc.txt", content_hash="", model="m", timestamp="", elapsed=0, metrics=metrics
+    )
+    # Read back without the rubric, the scores are kept and validate with it.
+    read_back = BatchRecord.model_validate_json(record.model_dump_json())
+    assert read_back.metrics and not read_back.metrics.all_scores()
+    assert rubric.metrics_type.model_validate(read_back.metrics.model_dump()) == metrics
+    assert rubric_label(rubric) and not rubric_label(load_scoring_rubric())
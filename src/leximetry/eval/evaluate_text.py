@@ -1,160 +1,1303 @@
 import asyncio
+import logging
 import time
+from collections.abc import Callable, Coroutine, Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain, islice
+from pathlib import Path
 from textwrap import dedent
+from typing import TypeVar, cast
+from weakref import WeakKeyDictionary
 
-from chopdiff.docs import TextDoc, TextUnit
-from funlog import format_duration
-from pydantic_ai import Agent
-from pydantic_ai.models import Model, infer_model
-from rich import print as rprint
+from chopdiff.util import tiktoken_len
+from pydantic import BaseModel
+from pydantic_ai import Agent, capture_run_messages
+from pydantic_ai.exceptions import UnexpectedModelBehavior
+from pydantic_ai.messages import ModelMessage, ModelRequest, RetryPromptPart
+from pydantic_ai.models import Model
 
+from leximetry.eval.call_trace import CallEvent, CallTracer
+from leximetry.eval.chunking import ChunkSettings, TextChunk, aggregate_scores, iter_chunks
+from leximetry.eval.doc_analysis import DocAnalysis, analyze
+from leximetry.eval.eval_options import CascadeSettings, EvalStrategy
 from leximetry.eval.metrics_model import (
-    Expression,
-    Groundedness,
-    Impact,
     MetricRubric,
     ProseMetrics,
+    RubricMetrics,
     Score,
-    Style,
+    ScoreParseError,
+    ScoringRubric,
+    get_rubric,
     load_scoring_rubric,
 )
-from leximetry.utils.aio_limited import gather_limited
+from leximetry.eval.model_pricing import estimate_cost
+from leximetry.eval.model_registry import get_agent, get_model
+from leximetry.eval.preflight import preflight_text
+from leximetry.eval.score_cache import ScoreCache, score_cache_key
+from leximetry.eval.usage_stats import UsageStats, cached_input_tokens
+from leximetry.utils.aio_limited import CallLimiter, current_call_timing, gather_limited
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PROMPT_VERSION = 2
+"""
+Version of how prompts are assembled, included in every score cache key. Bump
+it for changes that alter prompts without changing the template strings, so
+scores cached from older prompts aren't reused.
+"""
+
+DOCUMENT_PROMPT_TEMPLATE = dedent("""
+    TEXT TO EVALUATE:
+
+    {text}
+""")
+"""
+The document comes first in every prompt, so all calls for a document share a
+long common prefix (instructions plus document) that providers can serve from
+their prompt caches. Only the metric-specific part at the end differs.
+"""
+
+METRIC_INSTRUCTIONS = dedent("""
+    You are evaluating metrics about a text excerpt. The text comes first, followed by the metric to evaluate and its scoring scale.
+
+    Return your response in the exact format: SCORE (REASON) where SCORE is 0-5 and REASON is a brief explanation:
+    - The score as a single digit (0-5) that best describes the text using the metric's scoring scale
+    - A brief parenthetical note with one or two sentences mentioning the reason for the score
+
+    If there isn't enough text to assess the metric, return "0 (Insufficient content)".
+
+    Examples:
+    - "5 (Well written. No language errors.)"
+    - "3 (Contains speculations about the author's cat as well as factual content.)"
+    - "1 (Technical paper with clear structure.)"
+""").strip()
+
+METRIC_PROMPT_TEMPLATE = dedent("""
+    Evaluate the text above for the metric "{metric_name}".
+
+    METRIC DESCRIPTION: {metric_description}
+
+    SCORING SCALE:
+    {values_desc}
+
+    Provide a result in the form "SCORE (REASON)".
+""")
+
+
+def model_display_name(model: Model) -> str:
+    """
+    Stable name for a model, including the provider, e.g. "openai:gpt-4o".
+    """
+    return f"{model.system}:{model.model_name}"
+
+
+def template_key(*templates: str) -> str:
+    """
+    The prompt templates a cache key depends on, with the prompt version.
+    """
+    return f"Prompt version {PROMPT_VERSION}\n" + "".join(templates)
+
+
+PROMPT_CACHE_SIZE = 256
+"""
+Most metric and group prompt parts memoized at once. Bounded, since a daemon
+that reloads changed rubrics would otherwise keep every old rubric's prompts.
+"""
+
+_document_prompts: WeakKeyDictionary[DocAnalysis, str] = WeakKeyDictionary()
+
+
+def format_document_prompt(text: str | DocAnalysis) -> str:
+    """
+    The document part of a prompt. For an analyzed document it's built once
+    and the same string is shared by all of the document's calls, until the
+    analysis is released.
+    """
+    if not isinstance(text, DocAnalysis):
+        return DOCUMENT_PROMPT_TEMPLATE.format(text=text)
+    prompt = _document_prompts.get(text)
+    if prompt is None:
+        prompt = _document_prompts[text] = DOCUMENT_PROMPT_TEMPLATE.format(text=text.text)
+    return prompt
+
+
+def format_values_desc(metric: MetricRubric) -> str:
+    return "\n".join([f"{score}: {desc}" for score, desc in metric.values.items()])
+
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def format_metric_prompt(metric: MetricRubric) -> str:
+    """
+    The metric part of a single-metric prompt. Memoized, since it only depends
+    on the (immutable) rubric.
+    """
+    return METRIC_PROMPT_TEMPLATE.format(
+        metric_name=metric.name,
+        metric_description=metric.description,
+        values_desc=format_values_desc(metric),
+    )
+
+
+def metric_prompt_parts(text: str | DocAnalysis, metric: MetricRubric) -> list[str]:
+    """
+    The prompt to score one metric: the document first and the metric last, as
+    separate parts so the document can be marked as a cache breakpoint where
+    the provider supports it.
+    """
+    return [format_document_prompt(text), format_metric_prompt(metric)]
+
+
+def sample_suffix(sample: int) -> str:
+    """
+    Distinguishes the cache keys of repeated samples. The first sample has
+    no suffix, so it shares cached scores with single-sample runs.
+    """
+    return f"\nSample {sample}" if sample else ""
+
+
+def metric_cache_key(
+    text: str | DocAnalysis, metric: MetricRubric, model: Model, sample: int = 0
+) -> str:
+    template = template_key(METRIC_INSTRUCTIONS, DOCUMENT_PROMPT_TEMPLATE, METRIC_PROMPT_TEMPLATE)
+    return score_cache_key(
+        text, metric, template + sample_suffix(sample), model_display_name(model)
+    )
+
+
+MAX_PARSE_RETRIES = 2
+"""
+In strict mode, how many times a reply that doesn't validate as a score is
+sent back to the model to correct before the call fails.
+"""
+
+
+def count_retry_prompts(messages: list[ModelMessage]) -> int:
+    """
+    The number of replies in a run that the model was asked to correct.
+    """
+    return sum(
+        isinstance(part, RetryPromptPart)
+        for message in messages
+        if isinstance(message, ModelRequest)
+        for part in message.parts
+    )
+
+
+def is_well_formed_score(output: str) -> bool:
+    try:
+        Score.parse(output, strict=True)
+        return True
+    except ScoreParseError:
+        return False
+
+
+def record_cached(metric_keys: list[str], model: Model, tracer: CallTracer | None) -> None:
+    if tracer:
+        tracer.record(
+            CallEvent(
+                metrics=metric_keys,
+                model=model_display_name(model),
+                start_time=time.time(),
+                cached=True,
+            )
+        )
+
+
+async def run_agent(
+    agent: Agent[None, T],
+    prompt: list[str],
+    model: Model,
+    metric_keys: list[str],
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    is_well_formed: Callable[[T], bool] | None = None,
+) -> T:
+    """
+    Run one LLM call and return its output, adding its token usage to `usage`
+    and recording a `CallEvent` with its timing, usage, and estimated cost (or
+    its error) to `tracer`. The event counts the replies the model was asked
+    to correct as parse failures, plus the final output if `is_well_formed`
+    rejects it.
+    """
+    timing = current_call_timing.get()
+    event = CallEvent(
+        metrics=metric_keys,
+        model=model_display_name(model),
+        start_time=time.time(),
+        queue_wait=round(timing.queue_wait, 4) if timing else 0.0,
+        limiter_wait=round(timing.limiter_wait, 4) if timing else 0.0,
+        retries=max(0, timing.attempts - 1) if timing else 0,
+        prompt_bytes=sum(len(part.encode("utf-8")) for part in prompt),
+    )
+    start = time.perf_counter()
+    with capture_run_messages() as messages:
+        try:
+            result = await agent.run(prompt)
+        except Exception as e:
+            if tracer:
+                event.latency = round(time.perf_counter() - start, 4)
+                event.error = f"{type(e).__name__}: {e}"
+                # Output retries ran out, so the last reply was invalid too.
+                event.parse_failures = count_retry_prompts(messages) + isinstance(
+                    e, UnexpectedModelBehavior
+                )
+                tracer.record(event)
+            raise
+
+    run_usage = result.usage()
+    if usage:
+        usage.add(run_usage)
+    if tracer:
+        event.latency = round(time.perf_counter() - start, 4)
+        event.prompt_tokens = run_usage.request_tokens or 0
+        event.completion_tokens = run_usage.response_tokens or 0
+        event.cached_tokens = cached_input_tokens(run_usage)
+        event.cost = estimate_cost(
+            model, event.prompt_tokens, event.completion_tokens, event.cached_tokens
+        )
+        event.parse_failures = count_retry_prompts(result.all_messages())
+        if is_well_formed and not is_well_formed(result.output):
+            event.parse_failures += 1
+        tracer.record(event)
+    return result.output
 
 
 async def evaluate_single_metric(
-    text: str, metric: MetricRubric, model: Model
+    text: str | DocAnalysis,
+    metric: MetricRubric,
+    model: Model,
+    cache: ScoreCache | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    sample: int = 0,
+    strict: bool = False,
 ) -> tuple[str, Score]:
     """
     Evaluate text for a single metric and return `(metric_name, Score)`.
-    """
-    start_time = time.time()
-    # Format the metric values for the prompt
-    values_desc = "\n".join([f"{score}: {desc}" for score, desc in metric.values.items()])
-
-    prompt = dedent(f"""
-        Evaluate this text for the metric "{metric.name}".
-        
-        METRIC DESCRIPTION: {metric.description}
-        
-        SCORING SCALE:
-        {values_desc}
-        
-        TEXT TO EVALUATE:
-        {text}
-        
-        Provide a result in the form "SCORE (REASON)":
-        - The score as a single digit (0-5) that best describes the text using the scoring scale above
-        - A brief parenthetical note with one or two sentences mentioning the reason for the score
-        
-        If there isn't enough text to assess this metric, return "0 (Insufficient content)".
-        
-        Examples:
-        - "5 (Well written. No language errors.)"
-        - "3 (Contains speculations about the author's cat as well as factual content.)"
-        - "1 (Technical paper with clear structure.)"
-    """)
-
-    # Create a simple agent for single metric evaluation
-    single_metric_agent = Agent(
-        model=model,
-        output_type=str,
-        instructions="You are evaluating metrics about a text excerpt. "
-        "Return your response in the exact format: SCORE (REASON) where SCORE is 0-5 and REASON is a brief explanation.",
-    )
-
-    result = await single_metric_agent.run(prompt)
+    Pass a `DocAnalysis` to share its prompt part and content hash across
+    calls for the same document. If a `cache` is given, previously computed
+    scores for the same text, metric, prompt, model, and `sample` number are
+    reused instead of calling the model.
+    Token usage is added to `usage`, and a `CallEvent` for the call is recorded
+    to `tracer`, if given.
 
-    # Parse the LLM response into a Score object
-    score = Score.parse(result.output)
+    The model replies in text, which is parsed leniently. With `strict`, it
+    replies with a structured `Score` instead, and replies that don't validate
+    are sent back to correct (see `MAX_PARSE_RETRIES`).
+    """
+    if strict:
+        [pair] = await evaluate_metric_group(
+            text, [metric], Score, model, cache, usage, tracer, sample, strict
+        )
+        return pair
 
     # Map metric name to lowercase for consistent lookup
     metric_key = metric.name.lower()
 
-    elapsed = time.time() - start_time
-    print(
-        f"Evaluated {metric_key} (prompt {len(prompt.encode('utf-8'))} bytes) in {format_duration(elapsed)}"
+    cache_key = None
+    if cache:
+        cache_key = metric_cache_key(text, metric, model, sample)
+        cached_score = cache.get(cache_key)
+        if cached_score is not None:
+            record_cached([metric_key], model, tracer)
+            return metric_key, cached_score
+
+    prompt = metric_prompt_parts(text, metric)
+
+    # Simple agent for single metric evaluation, shared by all metrics and documents
+    single_metric_agent = get_agent(model, str, METRIC_INSTRUCTIONS)
+
+    output = await run_agent(
+        single_metric_agent, prompt, model, [metric_key], usage, tracer, is_well_formed_score
     )
+
+    # Parse the LLM response into a Score object
+    score = Score.parse(output)
+    if not is_well_formed_score(output):
+        log.warning(
+            "Guessed %s score %s from malformed output: %r", metric_key, score.value, output
+        )
+
+    if cache and cache_key:
+        cache.put(cache_key, score)
+
     return metric_key, score
 
 
-async def evaluate_text_async(text: str, model_name: str = "gpt-4o-mini") -> ProseMetrics:
+GROUP_INSTRUCTIONS = dedent("""
+    You are evaluating metrics about a text excerpt. The text comes first, followed by the
+    metrics to evaluate and their scoring scales.
+    Score every requested metric independently, each on its own scoring scale.
+
+    For each metric, provide:
+    - value: the score as a single digit (0-5) that best describes the text using that
+      metric's scoring scale
+    - note: one or two sentences mentioning the reason for the score
+
+    If there isn't enough text to assess a metric, give it the value 0 and the note
+    "Insufficient content".
+""").strip()
+
+GROUP_PROMPT_TEMPLATE = dedent("""
+    Evaluate the text above for each of the following metrics.
+
+    {metrics_desc}
+""")
+
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def format_metric_desc(metric: MetricRubric) -> str:
+    """
+    Describe one metric and its scoring scale for a multi-metric prompt.
+    Memoized, like `format_metric_prompt()`.
+    """
+    return (
+        f"METRIC: {metric.name.lower()}\n"
+        f"DESCRIPTION: {metric.description}\n"
+        f"SCORING SCALE:\n{format_values_desc(metric)}"
+    )
+
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def _format_group_prompt(metrics: tuple[MetricRubric, ...]) -> str:
+    return GROUP_PROMPT_TEMPLATE.format(
+        metrics_desc="\n\n".join(format_metric_desc(metric) for metric in metrics),
+    )
+
+
+def format_group_prompt(metrics: list[MetricRubric]) -> str:
+    return _format_group_prompt(tuple(metrics))
+
+
+def group_cache_key(
+    text: str | DocAnalysis,
+    metric: MetricRubric,
+    output_type: type[BaseModel],
+    model: Model,
+    sample: int = 0,
+) -> str:
+    template = template_key(
+        GROUP_INSTRUCTIONS, DOCUMENT_PROMPT_TEMPLATE, GROUP_PROMPT_TEMPLATE, output_type.__name__
+    )
+    return score_cache_key(
+        text, metric, template + sample_suffix(sample), model_display_name(model)
+    )
+
+
+def collect_scores(output: BaseModel) -> dict[str, Score]:
+    """
+    Collect all `Score`s the model actually filled in from a structured output,
+    which is either a single group or a full `RubricMetrics`.
+    """
+    scores: dict[str, Score] = {}
+    for field_name in output.model_fields_set:
+        value = getattr(output, field_name)
+        if isinstance(value, Score):
+            scores[field_name] = value
+        elif isinstance(value, BaseModel):
+            scores.update(collect_scores(value))
+    return scores
+
+
+async def evaluate_metric_group(
+    text: str | DocAnalysis,
+    metrics: list[MetricRubric],
+    output_type: type[BaseModel],
+    model: Model,
+    cache: ScoreCache | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    sample: int = 0,
+    strict: bool = False,
+) -> list[tuple[str, Score]]:
+    """
+    Evaluate text for several metrics in a single call, using a structured
+    `output_type` (a metric group model or `RubricMetrics`) whose fields are the
+    lowercase metric names, or `Score` for a single metric. Returns a
+    `(metric_name, Score)` pair per metric. With `strict`, output that doesn't
+    validate is sent back to correct more times.
+    """
+    metric_keys = [metric.name.lower() for metric in metrics]
+
+    cache_keys: dict[str, str] = {}
+    if cache:
+        cache_keys = {
+            metric.name.lower(): group_cache_key(text, metric, output_type, model, sample)
+            for metric in metrics
+        }
+        cached_scores = {key: cache.get(cache_key) for key, cache_key in cache_keys.items()}
+        if all(score is not None for score in cached_scores.values()):
+            record_cached(metric_keys, model, tracer)
+            return [(key, cast(Score, cached_scores[key])) for key in metric_keys]
+
+    prompt = [format_document_prompt(text), format_group_prompt(metrics)]
+
+    group_agent = get_agent(
+        model, output_type, GROUP_INSTRUCTIONS, MAX_PARSE_RETRIES if strict else None
+    )
+
+    output = await run_agent(group_agent, prompt, model, metric_keys, usage, tracer)
+    scores = {metric_keys[0]: output} if isinstance(output, Score) else collect_scores(output)
+
+    results: list[tuple[str, Score]] = []
+    for key in metric_keys:
+        score = scores.get(key)
+        if score is None:
+            score = Score(value=0, note="Not evaluated")
+        elif cache:
+            cache.put(cache_keys[key], score)
+        results.append((key, score))
+
+    return results
+
+
+COMPLETION_TOKENS_PER_METRIC = 60
+"""Rough estimate of output tokens for one score and its note."""
+
+
+@dataclass(frozen=True)
+class MetricCall:
+    """
+    One planned LLM call scoring one or more metrics. `run` starts the call and
+    can be called again to retry it. `tokens` is the estimated prompt plus
+    completion tokens, or 0 if not estimated or if all its scores are cached.
+    """
+
+    run: Callable[[], Coroutine[None, None, list[tuple[str, Score]]]]
+    tokens: int = 0
+
+
+def plan_metric_tasks(
+    text: str | DocAnalysis,
+    scoring_rubric: ScoringRubric,
+    model: Model,
+    strategy: EvalStrategy,
+    cache: ScoreCache | None = None,
+    count_tokens: Callable[[str], int] | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    sample: int = 0,
+    strict: bool = False,
+) -> list[MetricCall]:
+    """
+    Build the LLM calls needed to score every rubric metric with the given strategy.
+    If `count_tokens` is given, it's used to estimate each call's token cost.
+    The `sample` number distinguishes repeated samples of the same calls, and
+    `strict` selects strict parsing (see `evaluate_single_metric()`).
+    """
+    analysis = analyze(text)
+    rubric_metrics = {metric.name.lower(): metric for metric in scoring_rubric.metrics}
+    doc_tokens = 0
+    if count_tokens:
+        # Counts for the document itself are memoized, as they're shared by all strategies.
+        doc_tokens = count_tokens(format_document_prompt("")) + analysis.token_count(count_tokens)
+
+    def estimate_tokens(instructions: str, metrics_prompt: str, num_metrics: int) -> int:
+        if not count_tokens:
+            return 0
+        prompt_tokens = count_tokens(instructions) + doc_tokens + count_tokens(metrics_prompt)
+        return prompt_tokens + COMPLETION_TOKENS_PER_METRIC * num_metrics
+
+    def single_metric_call(metric: MetricRubric) -> MetricCall:
+        async def call() -> list[tuple[str, Score]]:
+            return [
+                await evaluate_single_metric(
+                    analysis, metric, model, cache, usage, tracer, sample, strict
+                )
+            ]
+
+        if strict:
+            cache_key = group_cache_key(analysis, metric, Score, model, sample)
+            tokens = estimate_tokens(GROUP_INSTRUCTIONS, format_group_prompt([metric]), 1)
+        else:
+            cache_key = metric_cache_key(analysis, metric, model, sample)
+            tokens = estimate_tokens(METRIC_INSTRUCTIONS, format_metric_prompt(metric), 1)
+        if cache and cache.contains(cache_key):
+            return MetricCall(call)
+        return MetricCall(call, tokens)
+
+    def group_call(metrics: list[MetricRubric], output_type: type[BaseModel]) -> MetricCall:
+        def call() -> Coroutine[None, None, list[tuple[str, Score]]]:
+            return evaluate_metric_group(
+                analysis, metrics, output_type, model, cache, usage, tracer, sample, strict
+            )
+
+        if cache and all(
+            cache.contains(group_cache_key(analysis, metric, output_type, model, sample))
+            for metric in metrics
+        ):
+            return MetricCall(call)
+        tokens = estimate_tokens(GROUP_INSTRUCTIONS, format_group_prompt(metrics), len(metrics))
+        return MetricCall(call, tokens)
+
+    if strategy == "per-metric":
+        return [single_metric_call(metric) for metric in scoring_rubric.metrics]
+    elif strategy == "per-group":
+        tasks: list[MetricCall] = []
+        metrics_type = scoring_rubric.metrics_type
+        for group_name, metric_names in metrics_type.group_metrics().items():
+            group_type = cast(type[BaseModel], metrics_type.model_fields[group_name].annotation)
+            group_metrics = [
+                rubric_metrics[name] for name in metric_names if name in rubric_metrics
+            ]
+            if group_metrics:
+                tasks.append(group_call(group_metrics, group_type))
+        return tasks
+    elif strategy == "single":
+        return [group_call(scoring_rubric.metrics, scoring_rubric.metrics_type)]
+    else:
+        raise ValueError(f"Unknown evaluation strategy: {strategy!r}")
+
+
+async def run_metric_tasks(
+    tasks: list[MetricCall], limiter: CallLimiter | None = None
+) -> dict[str, Score]:
     """
-    Evaluate text by calling the LLM once for each metric and assembling results.
-    The `model_name` is a Pydantic model name like "gpt-4o-mini" or "claude-3-5-sonnet-latest".
+    Run planned metric calls with rate limiting and collect all their scores.
     """
-    if not text.strip():
+    results = await gather_limited(
+        *[task.run for task in tasks],
+        limiter=limiter,
+        tokens=[task.tokens for task in tasks],
+    )
+    return dict(pair for pairs in results for pair in pairs)
+
+
+async def score_metrics(
+    text: str | DocAnalysis,
+    scoring_rubric: ScoringRubric,
+    model: Model,
+    strategy: EvalStrategy,
+    cache: ScoreCache | None = None,
+    limiter: CallLimiter | None = None,
+    count_tokens: Callable[[str], int] | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    samples: int = 1,
+    strict: bool = False,
+) -> dict[str, Score]:
+    """
+    Score every rubric metric with the given strategy. With `samples` over 1,
+    each call is repeated and each metric gets the median of its samples (see
+    `Score.median()`). The first sample of each call runs before the others,
+    whose prompts are identical, so providers can serve the others' prompts
+    from their prompt caches.
+    """
+    analysis = analyze(text)
+
+    def plan(sample: int) -> list[MetricCall]:
+        return plan_metric_tasks(
+            analysis,
+            scoring_rubric,
+            model,
+            strategy,
+            cache,
+            count_tokens,
+            usage,
+            tracer,
+            sample,
+            strict,
+        )
+
+    first = await run_metric_tasks(plan(0), limiter)
+    if samples <= 1:
+        return first
+
+    more_tasks = [task for sample in range(1, samples) for task in plan(sample)]
+    results = await gather_limited(
+        *[task.run for task in more_tasks],
+        limiter=limiter,
+        tokens=[task.tokens for task in more_tasks],
+    )
+    sample_scores = {key: [score] for key, score in first.items()}
+    for key, score in (pair for pairs in results for pair in pairs):
+        sample_scores[key].append(score)
+    return {key: Score.median(scores) for key, scores in sample_scores.items()}
+
+
+def unsure_metrics(
+    scores: dict[str, Score], check_scores: dict[str, Score], max_disagreement: int = 0
+) -> list[str]:
+    """
+    Metrics whose screen and check scores differ by more than `max_disagreement`.
+    """
+    return [
+        key
+        for key, score in scores.items()
+        if key not in check_scores or abs(score.value - check_scores[key].value) > max_disagreement
+    ]
+
+
+async def evaluate_cascaded(
+    text: str | DocAnalysis,
+    scoring_rubric: ScoringRubric,
+    model: Model,
+    cascade: CascadeSettings,
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    count_tokens: Callable[[str], int] | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    samples: int = 1,
+    strict: bool = False,
+) -> dict[str, Score]:
+    """
+    Score all metrics with the cheap `model` using both the evaluation strategy
+    and the cascade's check strategy, then re-score the metrics where the two
+    disagree with the cascade's escalation model, one call per metric. Each
+    score's `tier` records which model produced it. With `samples`, the screen
+    and escalated scores (but not the check) are medians of that many samples.
+    """
+    check_strategy = cascade.check_strategy_for(strategy)
+    analysis = analyze(text)
+    check_tasks = plan_metric_tasks(
+        analysis,
+        scoring_rubric,
+        model,
+        check_strategy,
+        cache,
+        count_tokens,
+        usage,
+        tracer,
+        strict=strict,
+    )
+    scores, check_scores = await asyncio.gather(
+        score_metrics(
+            analysis,
+            scoring_rubric,
+            model,
+            strategy,
+            cache,
+            limiter,
+            count_tokens,
+            usage,
+            tracer,
+            samples,
+            strict,
+        ),
+        run_metric_tasks(check_tasks, limiter),
+    )
+    scores = {key: score.model_copy(update={"tier": "screen"}) for key, score in scores.items()}
+
+    unsure = unsure_metrics(scores, check_scores, cascade.max_disagreement)
+    if not unsure:
+        return scores
+
+    escalate_model = get_model(cascade.escalate_model)
+    log.info(
+        "Escalating %s of %s metrics to %s: %s",
+        len(unsure),
+        len(scores),
+        model_display_name(escalate_model),
+        ", ".join(unsure),
+    )
+    unsure_rubric = ScoringRubric(
+        metrics=[metric for metric in scoring_rubric.metrics if metric.name.lower() in unsure]
+    )
+    escalated = await score_metrics(
+        analysis,
+        unsure_rubric,
+        escalate_model,
+        "per-metric",
+        cache,
+        limiter,
+        count_tokens,
+        usage,
+        tracer,
+        samples,
+        strict,
+    )
+    scores.update(
+        {key: score.model_copy(update={"tier": "escalated"}) for key, score in escalated.items()}
+    )
+    return scores
+
+
+def check_text_size(text: str | DocAnalysis) -> None:
+    """
+    Raise `TextRejected` (a `ValueError`) if the text is too short to evaluate
+    meaningfully. Doesn't parse the text (see `preflight_text()`).
+    """
+    preflight_text(text.text if isinstance(text, DocAnalysis) else text)
+
+
+async def evaluate_chunks_async(
+    chunks: Iterable[TextChunk],
+    model: Model,
+    settings: ChunkSettings,
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    cascade: CascadeSettings | None = None,
+    samples: int = 1,
+    strict: bool = False,
+    rubric: ScoringRubric | None = None,
+) -> RubricMetrics:
+    """
+    Evaluate each chunk of a long document concurrently and aggregate the
+    per-chunk scores by chunk size using `settings.aggregation`. Chunks are
+    read from `chunks` lazily and at most `limiter.max_concurrent` are evaluated
+    at a time, so only their scores are kept for the whole document.
+    """
+    log.info(
+        "Evaluating chunks of up to %s %s (aggregation: %s)",
+        settings.max_size,
+        settings.unit.value,
+        settings.aggregation,
+    )
+    if limiter is None:
+        limiter = CallLimiter()
+
+    async def evaluate_chunk(index: int, chunk: TextChunk) -> tuple[int, dict[str, Score], int]:
+        metrics = await evaluate_text_async(
+            chunk.text,
+            model,
+            cache,
+            strategy,
+            limiter,
+            usage=usage,
+            tracer=tracer,
+            cascade=cascade,
+            samples=samples,
+            strict=strict,
+            rubric=rubric,
+        )
+        return index, metrics.all_scores(), chunk.size
+
+    indexed_chunks = enumerate(chunks)
+    results: list[tuple[int, dict[str, Score], int]] = []
+    pending: set[asyncio.Task[tuple[int, dict[str, Score], int]]] = set()
+    try:
+        while True:
+            for index, chunk in islice(indexed_chunks, limiter.max_concurrent - len(pending)):
+                pending.add(asyncio.create_task(evaluate_chunk(index, chunk)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            results.extend(task.result() for task in done)
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results.sort(key=lambda result: result[0])
+    log.info("Evaluated %s chunks", len(results))
+    scores = {
+        metric_name: aggregate_scores(
+            [(chunk_scores[metric_name], size) for _, chunk_scores, size in results],
+            settings.aggregation,
+            settings.max_notes,
+        )
+        for metric_name in results[0][1]
+    }
+    return get_rubric(rubric).metrics_type.from_scores(scores)
+
+
+async def evaluate_text_async(
+    text: str | DocAnalysis,
+    model_name: str | Model = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    chunk_settings: ChunkSettings | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    cascade: CascadeSettings | None = None,
+    samples: int = 1,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> RubricMetrics:
+    """
+    Evaluate text by calling the LLM for the rubric metrics and assembling results.
+    The `model_name` is a Pydantic model name like "gpt-4o-mini" or "claude-3-5-sonnet-latest"
+    (or an already constructed `Model`).
+    The `strategy` controls whether each metric, each metric group, or the whole
+    rubric is scored in one call. Scores found in the optional `cache` are reused
+    and new ones are added to it. Pass a shared `limiter` to draw LLM calls from
+    a global concurrency and rate budget, e.g. when evaluating many documents.
+    With `chunk_settings`, texts longer than one chunk are split and evaluated
+    chunk by chunk, and the chunk scores are aggregated. LLM token usage,
+    including prompt cache hits, is added to `usage` if given, and a `CallEvent`
+    for each LLM call or cache hit is recorded to `tracer`. With `cascade`, the
+    model screens all metrics and only those it's unsure of are re-scored with
+    a stronger model (see `CascadeSettings`). With `samples` over 1, each
+    metric is scored that many times and gets the median score, with the
+    spread of the samples recorded on the `Score`. With `strict`, the model
+    gives structured scores, and malformed ones are sent back to correct
+    instead of being guessed at. The `rubric` is a rubric JSON file or a
+    `ScoringRubric` (by default, the built-in rubric), and the result is its
+    `metrics_type`, which is `ProseMetrics` for the default groups. The
+    `text` may be a `DocAnalysis` so a document parsed for validation or
+    reporting isn't parsed again.
+    """
+    scoring_rubric = get_rubric(rubric)
+    analysis = analyze(text)
+    if not analysis.text.strip():
         raise ValueError("No text provided for evaluation")
+    if samples < 1:
+        raise ValueError(f"Number of samples must be at least 1: {samples}")
 
-    rprint(f"Evaluating text with model: {model_name}")
-    rprint(f"Text length: {len(text)} characters")
+    if chunk_settings:
+        chunks = iter_chunks(analysis, chunk_settings.max_size, chunk_settings.unit)
+        first_chunks = list(islice(chunks, 2))
+        if len(first_chunks) > 1:
+            return await evaluate_chunks_async(
+                chain(first_chunks, chunks),
+                get_model(model_name),
+                chunk_settings,
+                cache,
+                strategy,
+                limiter,
+                usage,
+                tracer,
+                cascade,
+                samples,
+                strict,
+                scoring_rubric,
+            )
 
     try:
-        # Load the scoring rubric
-        scoring_rubric = load_scoring_rubric()
-
-        # Create the model
-        model = infer_model(model_name)
-
-        rprint(f"Starting evaluation for {len(scoring_rubric.metrics)} metrics...")
-
-        # Evaluate each metric individually (can be parallelized)
-        metric_tasks = [
-            evaluate_single_metric(text, metric, model) for metric in scoring_rubric.metrics
-        ]
-
-        # Run all metric evaluations with rate limiting
-        metric_results = await gather_limited(*metric_tasks)
-
-        # Assemble results into ProseMetrics object
-        scores = dict(metric_results)
-
-        # Create ProseMetrics instance with the scores mapped to the correct structure
-        prose_metrics = ProseMetrics(
-            expression=Expression(
-                clarity=scores.get("clarity", Score(value=0, note="Not evaluated")),
-                coherence=scores.get("coherence", Score(value=0, note="Not evaluated")),
-                sincerity=scores.get("sincerity", Score(value=0, note="Not evaluated")),
-            ),
-            style=Style(
-                narrativity=scores.get("narrativity", Score(value=0, note="Not evaluated")),
-                subjectivity=scores.get("subjectivity", Score(value=0, note="Not evaluated")),
-                warmth=scores.get("warmth", Score(value=0, note="Not evaluated")),
-            ),
-            groundedness=Groundedness(
-                factuality=scores.get("factuality", Score(value=0, note="Not evaluated")),
-                rigor=scores.get("rigor", Score(value=0, note="Not evaluated")),
-                depth=scores.get("depth", Score(value=0, note="Not evaluated")),
-            ),
-            impact=Impact(
-                accessibility=scores.get("accessibility", Score(value=0, note="Not evaluated")),
-                longevity=scores.get("longevity", Score(value=0, note="Not evaluated")),
-                sensitivity=scores.get("sensitivity", Score(value=0, note="Not evaluated")),
-            ),
+        # Look up or create the model
+        model = get_model(model_name)
+
+        log.info(
+            "Evaluating %s characters of text for %s metrics with %s (strategy: %s)",
+            len(analysis.text),
+            len(scoring_rubric.metrics),
+            model_display_name(model),
+            strategy,
         )
 
-        rprint("Evaluation complete!")
-        rprint()
+        count_tokens = tiktoken_len if limiter and limiter.max_tpm else None
+        if cascade:
+            scores = await evaluate_cascaded(
+                analysis,
+                scoring_rubric,
+                model,
+                cascade,
+                cache,
+                strategy,
+                limiter,
+                count_tokens,
+                usage,
+                tracer,
+                samples,
+                strict,
+            )
+        else:
+            # Run all metric evaluations with rate limiting
+            scores = await score_metrics(
+                analysis,
+                scoring_rubric,
+                model,
+                strategy,
+                cache,
+                limiter,
+                count_tokens,
+                usage,
+                tracer,
+                samples,
+                strict,
+            )
 
-        return prose_metrics
+        # Assemble results into the rubric's metrics model
+        return scoring_rubric.metrics_type.from_scores(scores)
 
     except Exception as e:
-        error_msg = f"Error during evaluation: {str(e)}"
-        rprint(f"[red]{error_msg}[/red]")
+        log.error("Error during evaluation: %s", e)
         raise
 
 
-def evaluate_text(text: str, model: str = "gpt-4o-mini") -> ProseMetrics:
+def run_sync(coro: Coroutine[None, None, T], async_name: str) -> T:
+    """
+    Run a coroutine in a new event loop, for synchronous wrappers. Raises a
+    `RuntimeError` naming the async function to use instead if called from a
+    running event loop (e.g. in an async web server).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError(
+        f"Can't run synchronously inside a running event loop: use `await {async_name}()` instead"
+    )
+
+
+def evaluate_text(
+    text: str | DocAnalysis,
+    model: str = "gpt-4o-mini",
+    cache: ScoreCache | None = None,
+    strategy: EvalStrategy = "per-metric",
+    limiter: CallLimiter | None = None,
+    chunk_settings: ChunkSettings | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    cascade: CascadeSettings | None = None,
+    samples: int = 1,
+    strict: bool = False,
+    rubric: str | Path | ScoringRubric | None = None,
+) -> RubricMetrics:
     """
-    Synchronous wrapper for evaluate_text_async.
+    Synchronous wrapper for evaluate_text_async. Can't be called from a running
+    event loop: use `evaluate_text_async()` there instead.
     """
+    analysis = analyze(text)
+    check_text_size(analysis)
+
+    return run_sync(
+        evaluate_text_async(
+            analysis,
+            model,
+            cache,
+            strategy,
+            limiter,
+            chunk_settings,
+            usage,
+            tracer,
+            cascade,
+            samples,
+            strict,
+            rubric,
+        ),
+        "evaluate_text_async",
+    )
+
+
+## Tests
+
+
+def test_evaluate_strategies():
+    from pydantic_ai.models.test import TestModel
+
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    rubric = load_scoring_rubric()
+
+    per_metric = plan_metric_tasks(
+        text, rubric, TestModel(custom_output_text="4 (Clear)"), "per-metric"
+    )
+    assert len(per_metric) == 12
+    results = asyncio.run(gather_limited(*[task.run for task in per_metric]))
+    assert dict(pair for pairs in results for pair in pairs)["clarity"] == Score(
+        value=4, note="Clear"
+    )
+
+    group_args = {"clarity": {"value": 3, "note": "Fine"}, "coherence": {"value": 2, "note": ""}}
+    per_group = plan_metric_tasks(
+        text, rubric, TestModel(custom_output_args=group_args), "per-group"
+    )
+    assert len(per_group) == 4
+    scores = dict(asyncio.run(per_group[0].run()))
+    assert scores["clarity"] == Score(value=3, note="Fine")
+    # Metrics the model leaves out are marked, not silently scored.
+    assert scores["sincerity"] == Score(value=0, note="Not evaluated")
+
+    single_args = {
+        "expression": group_args,
+        "style": {},
+        "groundedness": {},
+        "impact": {"longevity": {"value": 5, "note": "Timeless"}},
+    }
+    single = plan_metric_tasks(text, rubric, TestModel(custom_output_args=single_args), "single")
+    assert len(single) == 1
+    metrics = ProseMetrics.from_scores(dict(asyncio.run(single[0].run())))
+    assert metrics.expression.clarity.value == 3
+    assert metrics.impact.longevity == Score(value=5, note="Timeless")
+    assert metrics.style.warmth.note == "Not evaluated"
+
+
+def test_prompt_prefix_layout():
+    """All calls for a document share a prefix: instructions, then the document."""
+    from pydantic_ai.messages import (
+        ModelMessage,
+        ModelRequest,
+        ModelResponse,
+        TextPart,
+        UserPromptPart,
+    )
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+    prompts: list[list[str]] = []
+
+    def record_prompt(messages: list[ModelMessage], _info: AgentInfo) -> ModelResponse:
+        request = messages[-1]
+        assert isinstance(request, ModelRequest) and request.instructions == METRIC_INSTRUCTIONS
+        part = request.parts[-1]
+        assert isinstance(part, UserPromptPart) and not isinstance(part.content, str)
+        prompts.append([str(item) for item in part.content])
+        return ModelResponse(parts=[TextPart("3 (Fine.)")])
+
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    usage = UsageStats()
+    tracer = CallTracer()
+    asyncio.run(
+        evaluate_text_async(
+            text,
+            FunctionModel(record_prompt),
+            limiter=CallLimiter(12, 1000),
+            usage=usage,
+            tracer=tracer,
+        )
+    )
+
+    assert len(prompts) == 12 and usage.requests == 12
+    calls = tracer.summary()
+    assert calls.calls == 12 and calls.prompt_tokens == usage.input_tokens
+    assert {prompt[0] for prompt in prompts} == {format_document_prompt(text)}
+    assert len({prompt[1] for prompt in prompts}) == 12
+    assert all(prompt[1].strip().startswith("Evaluate the text above") for prompt in prompts)
+
+
+def test_prompt_memoization():
+    from leximetry.eval.mock_model import MockModel, MockSettings
+
+    model = MockModel(MockSettings(latency=0))
+    clarity, coherence = load_scoring_rubric().metrics[:2]
+    same_clarity = MetricRubric.model_validate(clarity.model_dump())
+    assert format_metric_prompt(same_clarity) is format_metric_prompt(clarity)
+    assert format_group_prompt([clarity]) is format_group_prompt([same_clarity])
+
+    analysis = DocAnalysis("Some text to evaluate.")
+    assert metric_prompt_parts(analysis, clarity)[0] is metric_prompt_parts(analysis, coherence)[0]
+    assert metric_prompt_parts(analysis, clarity) == metric_prompt_parts(analysis.text, clarity)
+
+    key = metric_cache_key(analysis, clarity, model)
+    assert key == metric_cache_key(analysis.text, same_clarity, model)
+    assert template_key("Template").startswith(f"Prompt version {PROMPT_VERSION}\n")
+
+
+def test_plan_token_estimates():
+    import tempfile
+
+    from pydantic_ai.models.test import TestModel
+
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    rubric = load_scoring_rubric()
+    model = TestModel()
+
+    def count_words(s: str) -> int:
+        return len(s.split())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ScoreCache(Path(tmp_dir))
+        clarity = rubric.metrics[0]
+        cache.put(metric_cache_key(text, clarity, model), Score(value=4, note="Clear"))
+
+        per_metric = plan_metric_tasks(text, rubric, model, "per-metric", cache, count_words)
+        # Cached calls cost nothing; others cost at least the text plus the answer.
+        assert per_metric[0].tokens == 0
+        assert all(task.tokens > 180 + COMPLETION_TOKENS_PER_METRIC for task in per_metric[1:])
+
+        single = plan_metric_tasks(text, rubric, model, "single", cache, count_words)
+        assert single[0].tokens > max(task.tokens for task in per_metric)
+        assert plan_metric_tasks(text, rubric, model, "single")[0].tokens == 0
+
+
+def test_evaluate_chunked():
+    from chopdiff.docs import TextUnit
+    from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+    def score_by_chunk(messages: list[ModelMessage], _info: AgentInfo) -> ModelResponse:
+        # Chunks about zebras score 5 and chunks about otters score 1.
+        prompt = str(messages[-1].parts[-1])
+        if "zebra" in prompt:
+            return ModelResponse(parts=[TextPart("5 (About zebras.)")])
+        return ModelResponse(parts=[TextPart("1 (About otters.)")])
+
+    zebras = "The zebra sat on the mat all day long. " * 15
+    otters = "The otter swam in the river. " * 5
+    text = f"{zebras.strip()}\n\n{otters.strip()}"
+    settings = ChunkSettings(max_size=100, unit=TextUnit.words)
+
+    metrics = asyncio.run(
+        evaluate_text_async(
+            text,
+            FunctionModel(score_by_chunk),
+            limiter=CallLimiter(12, 1000),
+            chunk_settings=settings,
+        )
+    )
+    # 135 words score 5 and 30 words score 1, so the weighted mean rounds to 4.
+    assert metrics.all_scores()["clarity"] == Score(value=4, note="About zebras. About otters.")
+
+    min_settings = ChunkSettings(max_size=100, unit=TextUnit.words, aggregation="min")
+    metrics = asyncio.run(
+        evaluate_text_async(
+            text,
+            FunctionModel(score_by_chunk),
+            limiter=CallLimiter(12, 1000),
+            chunk_settings=min_settings,
+        )
+    )
+    assert metrics.all_scores()["longevity"].value == 1
+
+
+def test_evaluate_cascaded():
+    import json
+
+    from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+    from pydantic_ai.models.test import TestModel
+
+    # The cheap model gives 3 per metric, but its single-call check agrees only
+    # on clarity and coherence, so the other 10 metrics are escalated.
+    def cheap(_messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        if info.output_tools:
+            check_args = {
+                "expression": {"clarity": {"value": 3}, "coherence": {"value": 3}},
+                "style": {},
+                "groundedness": {},
+                "impact": {"longevity": {"value": 1}},
+            }
+            return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, check_args)])
+        return ModelResponse(parts=[TextPart("3 (Cheap.)")])
+
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    tracer = CallTracer()
+    metrics = asyncio.run(
+        evaluate_text_async(
+            text,
+            FunctionModel(cheap),
+            limiter=CallLimiter(12, 1000),
+            tracer=tracer,
+            cascade=CascadeSettings(TestModel(custom_output_text="5 (Strong.)")),
+        )
+    )
+    assert metrics.all_scores()["clarity"] == Score(value=3, note="Cheap.", tier="screen")
+    assert metrics.all_scores()["longevity"] == Score(value=5, note="Strong.", tier="escalated")
+    # 12 screen calls, 1 check call, and 10 escalated calls.
+    assert tracer.summary().calls == 23
+    assert "tier" not in json.dumps(Score.model_json_schema())
+
+
+def test_evaluate_samples():
+    import tempfile
+
+    from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+    # The first sample of each metric gives 3 and the other two give 4 and 2.
+    calls: list[int] = []
+
+    def varying(_messages: list[ModelMessage], _info: AgentInfo) -> ModelResponse:
+        calls.append(len(calls))
+        value = 3 if len(calls) <= 12 else 4 if len(calls) <= 24 else 2
+        return ModelResponse(parts=[TextPart(f"{value} (Sample {len(calls)}.)")])
+
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ScoreCache(Path(tmp_dir))
+        metrics = asyncio.run(
+            evaluate_text_async(
+                text, FunctionModel(varying), cache, limiter=CallLimiter(1, 1000), samples=3
+            )
+        )
+        assert len(calls) == 36
+        for score in metrics.all_scores().values():
+            assert (score.value, score.samples, score.spread) == (3, 3, 0.82)
+            assert score.note.startswith("Sample ")
+
+        # All samples are cached, and the first is shared with single-sample runs.
+        asyncio.run(evaluate_text_async(text, FunctionModel(varying), cache, samples=3))
+        single = asyncio.run(evaluate_text_async(text, FunctionModel(varying), cache))
+        assert len(calls) == 36
+        assert (
+            single.all_scores()["clarity"].value == 3
+            and single.all_scores()["clarity"].spread is None
+        )
+
+
+def test_strict_parsing():
+    from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+
+    # Free-form replies are parsed leniently, but counted as parse failures.
+    def chatty(_messages: list[ModelMessage], _info: AgentInfo) -> ModelResponse:
+        return ModelResponse(parts=[TextPart("On a scale of 1-5, I'd say 4")])
+
+    tracer = CallTracer()
+    metrics = asyncio.run(evaluate_text_async(text, FunctionModel(chatty), tracer=tracer))
+    assert metrics.all_scores()["clarity"].value == 1
+    assert tracer.summary().parse_failures == 12
+
+    # Out of range replies are capped, not fatal, but also count as parse failures.
+    def overeager(_messages: list[ModelMessage], _info: AgentInfo) -> ModelResponse:
+        return ModelResponse(parts=[TextPart("7 (Superb.)")])
+
+    tracer = CallTracer()
+    metrics = asyncio.run(evaluate_text_async(text, FunctionModel(overeager), tracer=tracer))
+    assert all(score == Score(value=5, note="Superb.") for score in metrics.all_scores().values())
+    assert tracer.summary().parse_failures == 12
+
+    # In strict mode, an out-of-range structured score is sent back once to correct.
+    def correctable(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        value = 4 if count_retry_prompts(messages) else 7
+        args = {"value": value, "note": "Corrected."}
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, args)])
+
+    tracer = CallTracer()
+    metrics = asyncio.run(
+        evaluate_text_async(text, FunctionModel(correctable), tracer=tracer, strict=True)
+    )
+    assert metrics.all_scores()["clarity"] == Score(value=4, note="Corrected.")
+    summary = tracer.summary()
+    assert (summary.calls, summary.failed_calls, summary.parse_failures) == (12, 0, 12)
+
+    # Replies that never validate fail after a bounded number of retries.
+    def hopeless(_messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        args = {"value": 9, "note": "Too high."}
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, args)])
+
+    tracer = CallTracer()
+    metric = load_scoring_rubric().metrics[0]
+    try:
+        asyncio.run(
+            evaluate_single_metric(
+                text, metric, FunctionModel(hopeless), tracer=tracer, strict=True
+            )
+        )
+        raise AssertionError("Expected strict parsing to fail")
+    except UnexpectedModelBehavior:
+        pass
+    assert tracer.summary().parse_failures == MAX_PARSE_RETRIES + 1
+
+
+def test_custom_rubric():
+    import json
+    import tempfile
 
-    doc = TextDoc.from_text(text)
-    if doc.size(TextUnit.words) < 50:
-        raise ValueError("Text is < 50 words so too short to evaluate")
-    if doc.size(TextUnit.sentences) < 3:
-        raise ValueError("Text is < 3 sentences so too short to evaluate")
+    from leximetry.eval.mock_model import MockModel, MockSettings
 
-    return asyncio.run(evaluate_text_async(text, model))
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    metric = {"description": "Is it about foxes?", "values": {"0": "No", "5": "Entirely"}}
+    rubric_data = {
+        "metrics": [{**metric, "name": "Foxes"}, {**metric, "name": "Dogs"}],
+        "groups": {"animals": ["foxes"], "more_animals": ["dogs"]},
+    }
+    strategies: list[tuple[EvalStrategy, int]] = [
+        ("per-metric", 2),
+        ("per-group", 2),
+        ("single", 1),
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "rubric.json"
+        path.write_text(json.dumps(rubric_data))
+        for strategy, calls in strategies:
+            model = MockModel(MockSettings(latency=0))
+            metrics = asyncio.run(evaluate_text_async(text, model, strategy=strategy, rubric=path))
+            assert model.calls == calls
+            assert not isinstance(metrics, ProseMetrics)
+            assert metrics.group_metrics() == {"animals": ["foxes"], "more_animals": ["dogs"]}
+            assert all(score.value > 0 for score in metrics.all_scores().values())
 
 
 if __name__ == "__main__":
@@ -1,11 +1,36 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import keyword
 import re
-from functools import cache
+import statistics
+from functools import cached_property
 from pathlib import Path
-
-from pydantic import BaseModel, Field
+from typing import Any, ClassVar, Literal, Self, cast
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    ValidationError,
+    create_model,
+    model_validator,
+)
+from pydantic.json_schema import SkipJsonSchema
+from typing_extensions import override
+
+ScoreTier = Literal["screen", "escalated"]
+"""
+In a cascaded evaluation, whether a score is from the cheap screening model or
+was escalated to the stronger model.
+"""
+
+
+class ScoreParseError(ValueError):
+    """
+    Model output that isn't a well-formed score.
+    """
 
 
 class Score(BaseModel):
@@ -15,11 +40,38 @@ class Score(BaseModel):
 
     value: int = Field(..., ge=0, le=5)
     note: str = Field(default="")
+    # Set by cascaded or multi-sample evaluation, and left out of the schema
+    # the LLM fills in. `spread` is the standard deviation of the samples.
+    tier: SkipJsonSchema[ScoreTier | None] = None
+    samples: SkipJsonSchema[int | None] = None
+    spread: SkipJsonSchema[float | None] = None
+
+    @classmethod
+    def median(cls, samples: list[Score]) -> Score:
+        """
+        Combine repeated samples of one score into the median value (the lower
+        median for an even count, so odd counts are best) with the note of a
+        sample that has that value. Records the number of samples and their
+        spread. Samples scored 0 ("cannot assess") are ignored unless all are.
+        """
+        assessed = [score for score in samples if score.value > 0] or samples
+        values = [score.value for score in assessed]
+        value = statistics.median_low(values)
+        return cls(
+            value=value,
+            note=next(score.note for score in assessed if score.value == value),
+            tier=assessed[0].tier,
+            samples=len(samples),
+            spread=round(statistics.pstdev(values), 2),
+        )
 
     @classmethod
-    def parse(cls, text: str) -> Score:
+    def parse(cls, text: str, strict: bool = False) -> Score:
         """
         Parse score from LLM output in format "SCORE (EXPLANATION)" or just "SCORE".
+        Otherwise the first number in the text is taken as the score, or with
+        `strict`, a `ScoreParseError` is raised instead of guessing. Scores
+        above 5 are capped at 5, or with `strict`, raise a `ScoreParseError`.
 
         Examples:
         - "5 (Well written. No language errors.)"
@@ -28,24 +80,27 @@ class Score(BaseModel):
         - "4 (Clear reasoning but some gaps)"
         """
         text = text.strip()
+        try:
+            return cls._parse(text, strict)
+        except ValidationError as e:
+            raise ScoreParseError(f"Score out of range 0 to 5: {text!r}") from e
 
-        # Try to match "SCORE (EXPLANATION)" format
-        match = re.match(r"^(\d+)\s*\(([^)]*)\)\s*$", text)
+    @classmethod
+    def _parse(cls, text: str, strict: bool) -> Score:
+        # Try to match "SCORE (EXPLANATION)" format, or just a number
+        match = re.match(r"^(\d+)\s*(?:\((.*)\))?$", text, re.DOTALL)
         if match:
             value = int(match.group(1))
-            note = match.group(2).strip()
-            return cls(value=value, note=note)
+            note = (match.group(2) or "").strip()
+            return cls(value=value if strict else min(value, 5), note=note)
 
-        # Try to match just a number
-        match = re.match(r"^(\d+)\s*$", text)
-        if match:
-            value = int(match.group(1))
-            return cls(value=value, note="")
+        if strict:
+            raise ScoreParseError(f"Not a score in the form SCORE (REASON): {text!r}")
 
         # Try to extract first number if format is unclear
         numbers = re.findall(r"\d+", text)
         if numbers:
-            value = int(numbers[0])
+            value = min(int(numbers[0]), 5)
             # Try to extract text after the number as explanation
             # Remove everything up to and including the first number and any following punctuation/spaces
             remaining = re.sub(r"^.*?\d+\s*[:\-\(\)\s]*", "", text).strip()
@@ -81,11 +136,64 @@ class Impact(BaseModel):
     longevity: Score = Field(default_factory=lambda: Score(value=0))
 
 
-class ProseMetrics(BaseModel):
+class RubricMetrics(BaseModel):
+    """
+    Base for the metrics model of a rubric, whose fields are the metric groups,
+    each a model with a `Score` field per (lowercase) metric name.
+    `ProseMetrics` is the model for the default rubric, and other rubrics get
+    a model built from their groups (see `ScoringRubric.metrics_type`).
+
+    Groups not in the model are kept as extra fields, so results scored with
+    a different rubric can still be read back (e.g. from batch output) and
+    validated with that rubric's `metrics_type`.
+    """
+
+    model_config: ClassVar[ConfigDict] = ConfigDict(extra="allow")
+
+    @classmethod
+    def group_metrics(cls) -> dict[str, list[str]]:
+        """
+        Group names and the (lowercase) metric names in each group.
+        """
+        groups: dict[str, list[str]] = {}
+        for group_name, field_info in cls.model_fields.items():
+            group_type = cast(type[BaseModel], field_info.annotation)
+            groups[group_name] = list(group_type.model_fields.keys())
+        return groups
+
+    @classmethod
+    def from_scores(cls, scores: dict[str, Score], missing_note: str = "Not evaluated") -> Self:
+        """
+        Assemble from a flat dict of lowercase metric name to `Score`.
+        Metrics missing from `scores` get a 0 score with `missing_note`.
+        """
+        groups: dict[str, dict[str, Score]] = {}
+        for group_name, metric_names in cls.group_metrics().items():
+            groups[group_name] = {
+                metric_name: scores.get(metric_name, Score(value=0, note=missing_note))
+                for metric_name in metric_names
+            }
+        return cls.model_validate(groups)
+
+    def all_scores(self) -> dict[str, Score]:
+        """
+        Flat dict of lowercase metric name to `Score`.
+        """
+        scores: dict[str, Score] = {}
+        for group_name, metric_names in self.group_metrics().items():
+            group = getattr(self, group_name)
+            for metric_name in metric_names:
+                scores[metric_name] = getattr(group, metric_name)
+        return scores
+
+
+class ProseMetrics(RubricMetrics):
     """
     Abstract metrics for prose. See `leximetry.md` for more details.
     """
 
+    model_config: ClassVar[ConfigDict] = ConfigDict(extra="ignore")
+
     expression: Expression
     style: Style
     groundedness: Groundedness
@@ -94,31 +202,167 @@ class ProseMetrics(BaseModel):
 
 class MetricRubric(BaseModel):
     """
-    Rubric definition for a single metric.
+    Rubric definition for a single metric. Rubrics are immutable and hash by
+    content, so prompts built from a metric can be memoized per metric.
     """
 
+    model_config: ClassVar[ConfigDict] = ConfigDict(frozen=True)
+
     name: str
     description: str
     values: dict[int, str]  # value number (0-5) -> description
 
+    @cached_property
+    def content_hash(self) -> str:
+        """
+        SHA-256 of the rubric's content, computed once and used in cache keys.
+        """
+        return hashlib.sha256(self.model_dump_json().encode("utf-8")).hexdigest()
+
+    @override
+    def __hash__(self) -> int:
+        return hash(self.content_hash)
+
+
+DEFAULT_GROUP = "metrics"
+"""Group for the metrics of a rubric that doesn't define groups."""
+
 
 class ScoringRubric(BaseModel):
     """
-    Complete scoring rubric containing all metric definitions.
+    Complete scoring rubric containing all metric definitions, optionally
+    grouped by `groups` (group name to lowercase metric names). Without
+    `groups`, the metrics are grouped as in `ProseMetrics` if they're all
+    among its metrics, and otherwise put in one group.
     """
 
+    model_config: ClassVar[ConfigDict] = ConfigDict(frozen=True)
+
     metrics: list[MetricRubric]
+    groups: dict[str, list[str]] | None = None
+
+    @model_validator(mode="after")
+    def _check_metrics(self) -> Self:
+        names = [metric.name.lower() for metric in self.metrics]
+        if not names:
+            raise ValueError("Rubric has no metrics")
+        for metric, name in zip(self.metrics, names, strict=True):
+            if not name.isidentifier() or keyword.iskeyword(name) or name.startswith("_"):
+                raise ValueError(f"Metric name must be a simple identifier: {metric.name!r}")
+            if names.count(name) > 1:
+                raise ValueError(f"Duplicate metric name: {metric.name!r}")
+            if not metric.values or not set(metric.values) <= set(range(6)):
+                raise ValueError(f"Metric {metric.name!r} must describe values from 0 to 5")
+        if self.groups is not None:
+            grouped = [name for group in self.groups.values() for name in group]
+            if sorted(grouped) != sorted(names):
+                raise ValueError(
+                    f"Rubric groups must list each metric exactly once: {sorted(grouped)} "
+                    f"doesn't match {sorted(names)}"
+                )
+            for group_name in self.groups:
+                if not group_name.isidentifier() or keyword.iskeyword(group_name):
+                    raise ValueError(f"Group name must be a simple identifier: {group_name!r}")
+        return self
+
+    @cached_property
+    def content_hash(self) -> str:
+        return hashlib.sha256(self.model_dump_json().encode("utf-8")).hexdigest()
+
+    @override
+    def __hash__(self) -> int:
+        return hash(self.content_hash)
+
+    def group_metrics(self) -> dict[str, list[str]]:
+        """
+        Group names and the (lowercase) metric names in each group.
+        """
+        if self.groups is not None:
+            return self.groups
+        names = {metric.name.lower() for metric in self.metrics}
+        default_groups = {
+            group_name: [name for name in metric_names if name in names]
+            for group_name, metric_names in ProseMetrics.group_metrics().items()
+        }
+        if sum(map(len, default_groups.values())) == len(names):
+            return {group_name: group for group_name, group in default_groups.items() if group}
+        return {DEFAULT_GROUP: [metric.name.lower() for metric in self.metrics]}
+
+    @cached_property
+    def metrics_type(self) -> type[RubricMetrics]:
+        """
+        The metrics model for this rubric: `ProseMetrics` if it has the default
+        groups, or otherwise a model built from its groups, once per rubric.
+        """
+        groups = self.group_metrics()
+        if groups == ProseMetrics.group_metrics():
+            return ProseMetrics
+        group_fields: dict[str, Any] = {}
+        for group_name, metric_names in groups.items():
+            metric_fields: dict[str, Any] = {
+                name: (Score, Field(default_factory=lambda: Score(value=0)))
+                for name in metric_names
+            }
+            group_type = create_model(group_name.title().replace("_", ""), **metric_fields)
+            group_fields[group_name] = (group_type, ...)
+        return create_model("RubricMetrics", __base__=RubricMetrics, **group_fields)
+
+
+class RubricError(ValueError):
+    """
+    A rubric file that can't be read or isn't a valid rubric.
+    """
+
+
+DEFAULT_RUBRIC_PATH = Path(__file__).parent.parent / "docs" / "scoring_rubric.json"
+
+_loaded_rubrics: dict[Path, tuple[int, ScoringRubric]] = {}
+"""Rubric files by path, with their mtime when loaded."""
 
+MAX_CACHED_RUBRICS = 32
+"""Most parsed rubrics kept by content, so repeated reloads don't grow forever."""
 
-@cache
-def load_scoring_rubric() -> ScoringRubric:
+_rubrics_by_hash: dict[str, ScoringRubric] = {}
+"""Parsed rubrics by the SHA-256 of their file content, oldest first."""
+
+
+def load_scoring_rubric(path: Path | None = None) -> ScoringRubric:
+    """
+    Load a scoring rubric from a JSON file, by default the built-in rubric.
+    The file is reloaded when its mtime changes, so long-running processes
+    pick up edits, and files with the same content share one parsed rubric
+    (and its memoized prompts). Raises `RubricError` if the file can't be
+    read or isn't a valid rubric.
     """
-    Load the scoring rubric from the JSON file.
+    path = path or DEFAULT_RUBRIC_PATH
+    try:
+        mtime = path.stat().st_mtime_ns
+        loaded = _loaded_rubrics.get(path)
+        if loaded and loaded[0] == mtime:
+            return loaded[1]
+        data = path.read_bytes()
+        data_hash = hashlib.sha256(data).hexdigest()
+        rubric = _rubrics_by_hash.get(data_hash)
+        if rubric is None:
+            rubric = ScoringRubric.model_validate_json(data)
+            _ = rubric.metrics_type
+            _rubrics_by_hash[data_hash] = rubric
+            if len(_rubrics_by_hash) > MAX_CACHED_RUBRICS:
+                del _rubrics_by_hash[next(iter(_rubrics_by_hash))]
+    except (OSError, ValueError, TypeError) as e:
+        raise RubricError(f"Invalid scoring rubric {path}: {e}") from e
+    _loaded_rubrics[path] = (mtime, rubric)
+    return rubric
+
+
+def get_rubric(rubric: str | Path | ScoringRubric | None = None) -> ScoringRubric:
     """
-    current_file = Path(__file__)
-    rubric_path = current_file.parent.parent / "docs" / "scoring_rubric.json"
-    rubric_data = json.loads(rubric_path.read_text())
-    return ScoringRubric.model_validate(rubric_data)
+    A rubric given as a JSON file path (see `load_scoring_rubric()`), as a
+    `ScoringRubric`, or `None` for the default rubric.
+    """
+    if isinstance(rubric, ScoringRubric):
+        return rubric
+    return load_scoring_rubric(Path(rubric) if rubric else None)
 
 
 ## Tests
@@ -156,6 +400,22 @@ def test_score_parsing():
     assert score6.value == 0
     assert score6.note == "unclear input"
 
+    # Parentheses within the explanation
+    assert Score.parse("4 (Clear (mostly).)") == Score(value=4, note="Clear (mostly).")
+
+    # Strict parsing doesn't guess
+    assert Score.parse("3 (Fine.)", strict=True) == Score(value=3, note="Fine.")
+    for text in ("On a scale of 1-5, I'd say 4", "unclear input", "7 (Great.)"):
+        try:
+            Score.parse(text, strict=True)
+            raise AssertionError(f"Expected ScoreParseError for {text!r}")
+        except ScoreParseError:
+            pass
+
+    # Out of range scores are capped when not strict
+    assert Score.parse("7 (Great.)") == Score(value=5, note="Great.")
+    assert Score.parse("Score: 9 - excellent") == Score(value=5, note="excellent")
+
 
 def test_prose_metrics():
     """Test serialization and deserialization of ProseMetrics."""
@@ -195,3 +455,90 @@ def test_prose_metrics():
     assert reconstructed.expression.clarity.note == "Clear writing"
     assert reconstructed.groundedness.factuality.value == 3
     assert reconstructed.style.narrativity.note == "Mostly factual"
+
+
+def test_prose_metrics_from_scores():
+    """Test assembling ProseMetrics from a flat dict of scores."""
+    scores = {"clarity": Score(value=4, note="Clear"), "depth": Score(value=2, note="Brief")}
+    metrics = ProseMetrics.from_scores(scores)
+    assert metrics.expression.clarity == Score(value=4, note="Clear")
+    assert metrics.groundedness.depth == Score(value=2, note="Brief")
+    assert metrics.impact.longevity == Score(value=0, note="Not evaluated")
+
+    all_scores = metrics.all_scores()
+    assert len(all_scores) == 12
+    assert all_scores["clarity"].value == 4
+    assert ProseMetrics.from_scores(all_scores) == metrics
+
+
+def test_score_median():
+    samples = [Score(value=4, note="Good"), Score(value=2, note="Weak"), Score(value=4, note="Ok")]
+    assert Score.median(samples) == Score(value=4, note="Good", samples=3, spread=0.94)
+    assert Score.median([Score(value=3), Score(value=4)]).value == 3
+    # A sample that couldn't assess the metric doesn't drag the median down.
+    assert Score.median([Score(value=0), Score(value=5), Score(value=5)]).spread == 0.0
+    assert Score.median([Score(value=0, note="Insufficient content")] * 2).value == 0
+    assert "spread" not in json.dumps(Score.model_json_schema())
+
+
+def test_load_scoring_rubric():
+    import os
+    import tempfile
+
+    default = load_scoring_rubric()
+    assert load_scoring_rubric() is default and get_rubric() is default
+    assert default.metrics_type is ProseMetrics
+    assert ScoringRubric(metrics=default.metrics[:3]).group_metrics() == {
+        "expression": ["clarity", "coherence", "sincerity"]
+    }
+
+    tone = {
+        "name": "Tone",
+        "description": "Is the tone friendly?",
+        "values": {"0": "Cannot assess", "5": "Very friendly"},
+    }
+    jargon = {**tone, "name": "Jargon", "description": "How much jargon is there?"}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "rubric.json"
+        path.write_text(json.dumps({"metrics": [tone]}))
+        rubric = get_rubric(str(path))
+        assert load_scoring_rubric(path) is rubric
+        metrics = rubric.metrics_type.from_scores({"tone": Score(value=4)})
+        assert metrics.all_scores() == {"tone": Score(value=4)}
+        assert metrics.model_dump(exclude_none=True) == {
+            "metrics": {"tone": {"value": 4, "note": ""}}
+        }
+
+        # Same content in another file shares the parsed rubric.
+        copy_path = Path(tmp_dir) / "copy.json"
+        copy_path.write_text(path.read_text())
+        assert load_scoring_rubric(copy_path) is rubric
+
+        # Edits are picked up when the mtime changes.
+        path.write_text(
+            json.dumps({"metrics": [tone, jargon], "groups": {"voice": ["tone", "jargon"]}})
+        )
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        reloaded = load_scoring_rubric(path)
+        assert reloaded is not rubric
+        assert reloaded.metrics_type.group_metrics() == {"voice": ["tone", "jargon"]}
+
+        invalid_rubrics: list[tuple[str, dict[str, Any]]] = [
+            ("exactly once", {"metrics": [tone, jargon], "groups": {"voice": ["tone"]}}),
+            ("Duplicate", {"metrics": [tone, tone]}),
+            ("identifier", {"metrics": [{**tone, "name": "Word choice"}]}),
+            ("0 to 5", {"metrics": [{**tone, "values": {"7": "Off the scale"}}]}),
+            ("no metrics", {"metrics": []}),
+        ]
+        for problem, data in invalid_rubrics:
+            path.write_text(json.dumps(data))
+            try:
+                load_scoring_rubric(path)
+                raise AssertionError(f"Expected a RubricError for {problem}")
+            except RubricError as e:
+                assert problem in str(e), (problem, e)
+        try:
+            load_scoring_rubric(Path(tmp_dir) / "missing.json")
+            raise AssertionError("Expected a RubricError")
+        except RubricError as e:
+            assert "missing.json" in str(e)
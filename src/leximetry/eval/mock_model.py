@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import re
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, fields, replace
+from typing import Any, Literal, get_args
+
+import httpx
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    TextPart,
+    ToolCallPart,
+    UserPromptPart,
+)
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+from strif import hash_string
+from typing_extensions import override
+
+MOCK_PROVIDER = "mock"
+
+LatencyDist = Literal["fixed", "uniform", "lognormal", "exponential"]
+
+LATENCY_DISTS: tuple[LatencyDist, ...] = get_args(LatencyDist)
+
+
+@dataclass(frozen=True)
+class MockSettings:
+    """
+    Behavior of the offline mock model. Latency is in seconds: fixed, uniform
+    within `latency * (1 ± jitter)`, lognormal with median `latency` and shape
+    `jitter`, or exponential with mean `latency`. Each call fails with an HTTP
+    500 with probability `error_rate` or an HTTP 429 with `Retry-After:
+    retry_after` with probability `throttle_rate`. Random draws are seeded per
+    call from `seed`, the prompt, and how many times that prompt was sent, and
+    scores depend only on the prompt, so runs are repeatable however
+    concurrent calls interleave.
+    """
+
+    latency: float = 0.05
+    dist: LatencyDist = "lognormal"
+    jitter: float = 0.5
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    seed: int = 0
+
+    @classmethod
+    def from_spec(cls, spec: str) -> MockSettings:
+        """
+        Parse settings from a spec like "latency=0.2,dist=fixed,throttle_rate=0.05".
+        """
+        settings = cls()
+        if not spec:
+            return settings
+        field_types: dict[str, Callable[[str], Any]] = {
+            field.name: type(getattr(settings, field.name)) for field in fields(cls)
+        }
+        values: dict[str, Any] = {}
+        for item in spec.split(","):
+            key, sep, value = item.partition("=")
+            key = key.strip()
+            if not sep or key not in field_types:
+                raise ValueError(
+                    f"Invalid mock model setting {item!r}: expected key=value with key one of "
+                    f"{', '.join(field_types)}"
+                )
+            values[key] = field_types[key](value.strip())
+        if values.get("dist", settings.dist) not in LATENCY_DISTS:
+            raise ValueError(f"Unknown mock latency distribution: {values['dist']!r}")
+        return replace(settings, **values)
+
+    def draw_latency(self, rng: random.Random) -> float:
+        if self.dist == "fixed":
+            return self.latency
+        elif self.dist == "uniform":
+            return max(0.0, rng.uniform(1 - self.jitter, 1 + self.jitter) * self.latency)
+        elif self.dist == "lognormal":
+            return rng.lognormvariate(math.log(self.latency), self.jitter) if self.latency else 0.0
+        else:
+            return rng.expovariate(1 / self.latency) if self.latency else 0.0
+
+
+def mock_score(prompt: str, key: str) -> tuple[int, str]:
+    """
+    A deterministic score from 1 to 5 for a prompt and metric key.
+    """
+    digest = hash_string(f"{key}\n{prompt}", algorithm="sha256").hex
+    value = int(digest[:8], 16) % 5 + 1
+    return value, f"Mock score {digest[:6]}."
+
+
+def mock_output_args(schema: dict[str, Any], prompt: str, defs: dict[str, Any], path: str) -> Any:
+    """
+    Fill in an output tool's JSON schema with deterministic mock scores, for
+    every object that looks like a `Score` (has `value` and `note`). A list of
+    scores gets one score for each document ID in a packed prompt.
+    """
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].split("/")[-1]]
+    if schema.get("type") == "array":
+        return [
+            {"id": doc_id, **mock_output_args(schema["items"], prompt, defs, f"{path}.{doc_id}")}
+            for doc_id in re.findall(r'<document id="([^"]+)">', prompt)
+        ]
+    properties: dict[str, Any] = schema.get("properties", {})
+    if "value" in properties and "note" in properties:
+        value, note = mock_score(prompt, path)
+        return {"value": value, "note": note}
+    return {
+        name: mock_output_args(prop, prompt, defs, f"{path}.{name}")
+        for name, prop in properties.items()
+    }
+
+
+def throttle_error(model_name: str, retry_after: float) -> ModelHTTPError:
+    """
+    An HTTP 429 error shaped like a provider's: a `ModelHTTPError` raised from an
+    HTTP error whose response carries a `Retry-After` header.
+    """
+    request = httpx.Request("POST", "https://mock.invalid/v1/chat")
+    response = httpx.Response(429, headers={"retry-after": str(retry_after)}, request=request)
+    error = ModelHTTPError(429, model_name, body={"error": "mock rate limit"})
+    error.__cause__ = httpx.HTTPStatusError(
+        "429 Too Many Requests", request=request, response=response
+    )
+    return error
+
+
+class MockModel(FunctionModel):
+    """
+    Offline stand-in for an LLM, for tests, benchmarks, and load tests without an
+    API key. Select it with a model name like "mock" or "mock:latency=0.2".
+    """
+
+    def __init__(self, settings: MockSettings | None = None, spec: str = ""):
+        self.settings: MockSettings = settings or MockSettings()
+        self.calls: int = 0
+        self._attempts: Counter[str] = Counter()
+        super().__init__(self._respond, model_name=spec or "default")
+
+    @property
+    @override
+    def system(self) -> str:
+        return MOCK_PROVIDER
+
+    @classmethod
+    def from_name(cls, model_name: str) -> MockModel:
+        spec = model_name.removeprefix(MOCK_PROVIDER).removeprefix(":")
+        return cls(MockSettings.from_spec(spec), spec)
+
+    def _call_rng(self, prompt: str) -> random.Random:
+        """
+        A generator for one call, so retries of a prompt draw differently but no
+        call's draws depend on the order of other concurrent calls.
+        """
+        attempt = self._attempts[prompt]
+        self._attempts[prompt] += 1
+        digest = hash_string(f"{self.settings.seed}\n{attempt}\n{prompt}", algorithm="sha256")
+        return random.Random(digest.hex)
+
+    async def _respond(self, messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        self.calls += 1
+        settings = self.settings
+        prompt = _last_user_prompt(messages)
+        rng = self._call_rng(prompt)
+        await asyncio.sleep(settings.draw_latency(rng))
+
+        draw = rng.random()
+        if draw < settings.throttle_rate:
+            raise throttle_error(self.model_name, settings.retry_after)
+        if draw < settings.throttle_rate + settings.error_rate:
+            raise ModelHTTPError(500, self.model_name, body={"error": "mock server error"})
+
+        if info.output_tools:
+            tool = info.output_tools[0]
+            schema = tool.parameters_json_schema
+            args = mock_output_args(schema, prompt, schema.get("$defs", {}), "")
+            return ModelResponse(parts=[ToolCallPart(tool.name, args)])
+        value, note = mock_score(prompt, "text")
+        return ModelResponse(parts=[TextPart(f"{value} ({note})")])
+
+
+def _last_user_prompt(messages: list[ModelMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, UserPromptPart):
+                    content = part.content
+                    return content if isinstance(content, str) else "\n".join(map(str, content))
+    return ""
+
+
+## Tests
+
+
+def test_mock_settings():
+    settings = MockSettings.from_spec("latency=0.2,dist=fixed,throttle_rate=0.1,seed=3")
+    assert settings == MockSettings(latency=0.2, dist="fixed", throttle_rate=0.1, seed=3)
+    assert MockSettings.from_spec("") == MockSettings()
+    for bad_spec in ("latency", "speed=3", "dist=zipf"):
+        try:
+            MockSettings.from_spec(bad_spec)
+            raise AssertionError(f"Expected ValueError for {bad_spec!r}")
+        except ValueError:
+            pass
+
+
+def test_mock_model():
+    from pydantic_ai import Agent
+
+    from leximetry.eval.metrics_model import ProseMetrics, Score
+
+    model = MockModel.from_name("mock:latency=0,dist=fixed")
+    assert (model.system, model.model_name) == ("mock", "latency=0,dist=fixed")
+
+    text_agent = Agent(model, output_type=str)
+    first = text_agent.run_sync(["Some document.", "Some metric."]).output
+    assert Score.parse(first).value in range(1, 6)
+    assert text_agent.run_sync(["Some document.", "Some metric."]).output == first
+    assert text_agent.run_sync(["Another document.", "Some metric."]).output != first
+
+    metrics = Agent(model, output_type=ProseMetrics).run_sync("Some document.").output
+    assert all(1 <= score.value <= 5 for score in metrics.all_scores().values())
+
+
+def test_mock_model_errors():
+    from pydantic_ai import Agent
+
+    from leximetry.utils.aio_limited import classify_error, retry_after_seconds
+
+    model = MockModel(MockSettings(latency=0, throttle_rate=1.0, retry_after=2.5))
+    try:
+        Agent(model, output_type=str).run_sync("Some document.")
+        raise AssertionError("Expected a throttle error")
+    except ModelHTTPError as e:
+        assert classify_error(e) == "throttle"
+        assert retry_after_seconds(e) == 2.5
+
+
+def test_mock_model_draws():
+    import asyncio
+
+    from pydantic_ai import Agent
+
+    # Errors for each prompt are the same whatever order the calls run in.
+    prompts = [f"Document {i}." for i in range(20)]
+
+    async def failures(order: list[str]) -> set[str]:
+        agent = Agent(MockModel(MockSettings(latency=0, error_rate=0.5)), output_type=str)
+        results = await asyncio.gather(
+            *[agent.run(prompt) for prompt in order], return_exceptions=True
+        )
+        return {
+            prompt
+            for prompt, result in zip(order, results, strict=True)
+            if isinstance(result, ModelHTTPError)
+        }
+
+    failed = asyncio.run(failures(prompts))
+    assert 0 < len(failed) < len(prompts)
+    assert asyncio.run(failures(prompts[::-1])) == failed
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from pydantic_ai.models import Model
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """
+    List prices in USD per million tokens. `cached_input` applies to input
+    tokens read from the provider's prompt cache.
+    """
+
+    input: float
+    output: float
+    cached_input: float
+
+
+FREE = ModelPrice(0.0, 0.0, 0.0)
+
+FREE_SYSTEMS = ("mock", "test", "function")
+"""Model systems (providers) that run locally and cost nothing."""
+
+MODEL_PRICES: dict[str, ModelPrice] = {
+    "gpt-4o-mini": ModelPrice(0.15, 0.60, 0.075),
+    "gpt-4o": ModelPrice(2.50, 10.00, 1.25),
+    "gpt-4.1-nano": ModelPrice(0.10, 0.40, 0.025),
+    "gpt-4.1-mini": ModelPrice(0.40, 1.60, 0.10),
+    "gpt-4.1": ModelPrice(2.00, 8.00, 0.50),
+    "o4-mini": ModelPrice(1.10, 4.40, 0.275),
+    "o3-mini": ModelPrice(1.10, 4.40, 0.55),
+    "o3": ModelPrice(2.00, 8.00, 0.50),
+    "claude-3-haiku": ModelPrice(0.25, 1.25, 0.03),
+    "claude-3-5-haiku": ModelPrice(0.80, 4.00, 0.08),
+    "claude-3-5-sonnet": ModelPrice(3.00, 15.00, 0.30),
+    "claude-3-7-sonnet": ModelPrice(3.00, 15.00, 0.30),
+    "claude-sonnet-4": ModelPrice(3.00, 15.00, 0.30),
+    "claude-4-sonnet": ModelPrice(3.00, 15.00, 0.30),
+    "claude-opus-4": ModelPrice(15.00, 75.00, 1.50),
+    "claude-4-opus": ModelPrice(15.00, 75.00, 1.50),
+    "gemini-2.0-flash-lite": ModelPrice(0.075, 0.30, 0.01875),
+    "gemini-2.0-flash": ModelPrice(0.10, 0.40, 0.025),
+    "gemini-2.5-flash": ModelPrice(0.30, 2.50, 0.075),
+    "gemini-2.5-pro": ModelPrice(1.25, 10.00, 0.31),
+}
+"""
+Approximate list prices by model name prefix (the longest matching prefix
+wins), for cost estimates only. Anthropic cache writes, long-context tiers,
+and batch discounts aren't modeled.
+"""
+
+
+def model_price(model: Model) -> ModelPrice | None:
+    """
+    The price for a model, or None if it isn't known.
+    """
+    if model.system in FREE_SYSTEMS:
+        return FREE
+    matches = [prefix for prefix in MODEL_PRICES if model.model_name.startswith(prefix)]
+    return MODEL_PRICES[max(matches, key=len)] if matches else None
+
+
+def estimate_cost(
+    model: Model, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0
+) -> float | None:
+    """
+    Estimated cost in USD of a call, or None if the model's price isn't known.
+    `prompt_tokens` includes any `cached_tokens`.
+    """
+    price = model_price(model)
+    if price is None:
+        return None
+    uncached_tokens = prompt_tokens - cached_tokens
+    return (
+        uncached_tokens * price.input
+        + cached_tokens * price.cached_input
+        + completion_tokens * price.output
+    ) / 1_000_000
+
+
+## Tests
+
+
+def test_estimate_cost():
+    from pydantic_ai.models.openai import OpenAIModel
+    from pydantic_ai.models.test import TestModel
+    from pydantic_ai.providers.openai import OpenAIProvider
+
+    provider = OpenAIProvider(api_key="test-key")
+    mini = OpenAIModel("gpt-4o-mini", provider=provider)
+    assert model_price(mini) == MODEL_PRICES["gpt-4o-mini"]
+    assert (
+        model_price(OpenAIModel("gpt-4o-2024-08-06", provider=provider)) == MODEL_PRICES["gpt-4o"]
+    )
+    assert model_price(OpenAIModel("some-new-model", provider=provider)) is None
+
+    cost = estimate_cost(
+        mini, prompt_tokens=2_000_000, completion_tokens=1_000_000, cached_tokens=1_000_000
+    )
+    assert cost is not None and abs(cost - (0.15 + 0.075 + 0.60)) < 1e-9
+    assert estimate_cost(TestModel(), 1000, 100) == 0.0
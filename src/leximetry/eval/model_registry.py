@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, TypeVar, cast
+
+from pydantic_ai import Agent
+from pydantic_ai.models import Model, infer_model
+
+from leximetry.eval.provider_limits import provider_for_model
+
+T = TypeVar("T")
+
+_models: dict[str, Model] = {}
+
+MAX_AGENTS = 256
+"""
+Most agents kept at once. Least recently used agents beyond this are dropped,
+so callers passing many short-lived `Model`s don't grow the registry forever.
+"""
+
+_agents: OrderedDict[tuple[int, type[Any], str, int | None], Agent[None, Any]] = OrderedDict()
+"""
+Agents keyed by model identity, output type, instructions, and output retries,
+in least recently used order. Models are unhashable dataclasses, so they're
+keyed by id. Each agent holds a reference to its model, so a model's id can't be
+reused while its agents are registered, and dropping an agent drops its key.
+"""
+
+
+def get_model(model_name: str | Model) -> Model:
+    """
+    The model for a name like "gpt-4o-mini", constructed once per process and
+    then reused, so the provider client and its pooled keep-alive HTTP
+    connections are shared by every call and document. A `Model` passed in is
+    returned as is.
+    """
+    if isinstance(model_name, Model):
+        return model_name
+    model = _models.get(model_name)
+    if model is None:
+        model = _models[model_name] = _make_model(model_name)
+    return model
+
+
+def _make_model(model_name: str) -> Model:
+    """
+    Like `infer_model()`, but Anthropic models get prompt cache breakpoints, and
+    "mock" models are offline stand-ins.
+    """
+    # Imported here so only the provider SDK actually in use is loaded.
+    provider = provider_for_model(model_name)
+    if provider == "mock":
+        from leximetry.eval.mock_model import MockModel
+
+        return MockModel.from_name(model_name)
+    if provider == "anthropic":
+        from leximetry.eval.prompt_caching import CachingAnthropicModel
+
+        return CachingAnthropicModel(model_name.removeprefix("anthropic:"), provider="anthropic")
+    return infer_model(model_name)
+
+
+def get_agent(
+    model: Model, output_type: type[T], instructions: str, output_retries: int | None = None
+) -> Agent[None, T]:
+    """
+    An agent for a model, output type, and instructions, constructed on first
+    use and reused after. Agents hold no per-run state, so one agent can serve
+    any number of concurrent runs. Structured output that doesn't validate is
+    sent back to the model to correct up to `output_retries` times (default 1).
+    """
+    key = (id(model), output_type, instructions, output_retries)
+    agent = _agents.get(key)
+    if agent is None:
+        agent = _agents[key] = Agent(
+            model=model,
+            output_type=output_type,
+            instructions=instructions,
+            output_retries=output_retries,
+        )
+        if len(_agents) > MAX_AGENTS:
+            _agents.popitem(last=False)
+    else:
+        _agents.move_to_end(key)
+    return cast(Agent[None, T], agent)
+
+
+def clear_registry() -> None:
+    _models.clear()
+    _agents.clear()
+
+
+## Tests
+
+
+def test_registry_reuse():
+    from pydantic_ai.models.test import TestModel
+
+    from leximetry.eval.mock_model import MockModel
+    from leximetry.eval.prompt_caching import CachingAnthropicModel
+
+    assert get_model("test") is get_model("test")
+    assert isinstance(get_model("mock:latency=0"), MockModel)
+    assert isinstance(get_model("anthropic:claude-3-5-haiku-latest"), CachingAnthropicModel)
+    model = TestModel()
+    assert get_model(model) is model
+
+    agent = get_agent(model, str, "Be brief.")
+    assert get_agent(model, str, "Be brief.") is agent
+    assert get_agent(model, str, "Be thorough.") is not agent
+    assert get_agent(model, int, "Be brief.") is not agent
+    assert get_agent(model, str, "Be brief.", output_retries=2) is not agent
+    assert get_agent(TestModel(), str, "Be brief.") is not agent
+
+    # Agents for short-lived models are dropped once the registry is full.
+    for i in range(MAX_AGENTS):
+        get_agent(TestModel(), str, f"Prompt {i}.")
+        assert get_agent(model, str, "Be brief.") is agent
+    assert len(_agents) == MAX_AGENTS
+    clear_registry()
@@ -0,0 +1,417 @@
+"""
+Scoring several short documents in one LLM call per metric. For short texts,
+most of each prompt is the instructions and the metric's rubric, so packing
+documents shares that overhead between them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from functools import partial
+from textwrap import dedent
+
+from chopdiff.docs import TextUnit
+from pydantic import BaseModel, Field
+from pydantic_ai.models import Model
+
+from leximetry.eval.call_trace import CallTracer, SharedCallTracer
+from leximetry.eval.doc_analysis import DocAnalysis
+from leximetry.eval.evaluate_text import (
+    MAX_PARSE_RETRIES,
+    evaluate_single_metric,
+    format_metric_desc,
+    model_display_name,
+    record_cached,
+    run_agent,
+    template_key,
+)
+from leximetry.eval.metrics_model import (
+    MetricRubric,
+    RubricMetrics,
+    Score,
+    ScoringRubric,
+    get_rubric,
+    load_scoring_rubric,
+)
+from leximetry.eval.model_registry import get_agent
+from leximetry.eval.score_cache import ScoreCache, score_cache_key
+from leximetry.eval.usage_stats import UsageStats
+from leximetry.utils.aio_limited import CallLimiter, gather_limited
+
+log = logging.getLogger(__name__)
+
+PACK_INSTRUCTIONS = dedent("""
+    You are evaluating one metric for each of several separate text excerpts. The metric and its scoring scale come first, followed by the texts, each between <document id="..."> and </document> tags.
+    Score each text independently, as if it were the only one, without comparing the texts to each other.
+
+    Return one score for every document, with:
+    - id: the document's id, exactly as given
+    - value: the score as a single digit (0-5) that best describes that text using the metric's scoring scale
+    - note: one or two sentences mentioning the reason for the score
+
+    If there isn't enough text to assess the metric for a document, give it the value 0 and the note "Insufficient content".
+""").strip()
+
+PACK_METRIC_TEMPLATE = dedent("""
+    Evaluate each of the texts below for this metric.
+
+    {metric_desc}
+""")
+
+PACK_DOCUMENT_TEMPLATE = '<document id="{doc_id}">\n{text}\n</document>'
+
+
+@dataclass(frozen=True)
+class PackSettings:
+    """
+    Documents of up to `max_doc_words` words are packed, up to `max_docs` per
+    call. A partly filled pack waits `linger` seconds for more documents
+    before it's sent.
+    """
+
+    max_docs: int = 8
+    max_doc_words: int = 300
+    linger: float = 0.05
+
+
+class PackedScore(BaseModel):
+    id: str
+    value: int = Field(..., ge=0, le=5)
+    note: str = Field(default="")
+
+
+class PackedScores(BaseModel):
+    """
+    Structured output for a packed call: one score per document.
+    """
+
+    scores: list[PackedScore]
+
+
+def doc_id(index: int) -> str:
+    return f"doc{index + 1}"
+
+
+def format_pack_metric_prompt(metric: MetricRubric) -> str:
+    return PACK_METRIC_TEMPLATE.format(metric_desc=format_metric_desc(metric))
+
+
+def format_pack_documents(texts: list[str]) -> str:
+    """
+    The texts, each delimited with its ID. Closing tags inside a text are
+    broken up so they can't end its document early.
+    """
+    return "\n\n".join(
+        PACK_DOCUMENT_TEMPLATE.format(
+            doc_id=doc_id(i), text=text.replace("</document>", "</ document>")
+        )
+        for i, text in enumerate(texts)
+    )
+
+
+def pack_cache_key(text: str, metric: MetricRubric, model: Model) -> str:
+    template = template_key(PACK_INSTRUCTIONS, PACK_METRIC_TEMPLATE, PACK_DOCUMENT_TEMPLATE)
+    return score_cache_key(text, metric, template, model_display_name(model))
+
+
+async def evaluate_packed_metric(
+    texts: list[str],
+    metric: MetricRubric,
+    model: Model,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    strict: bool = False,
+) -> list[Score]:
+    """
+    Score several texts for one metric in a single call, returning a score
+    per text. Raises `ValueError` if the output doesn't have exactly one score
+    for each text's ID. With `strict`, output that doesn't validate is sent
+    back to correct more times.
+    """
+    # Metric first and documents last, so packs for the same metric share a
+    # cacheable prompt prefix.
+    prompt = [format_pack_metric_prompt(metric), format_pack_documents(texts)]
+    pack_agent = get_agent(
+        model, PackedScores, PACK_INSTRUCTIONS, MAX_PARSE_RETRIES if strict else None
+    )
+    output = await run_agent(pack_agent, prompt, model, [metric.name.lower()], usage, tracer)
+
+    ids = [doc_id(i) for i in range(len(texts))]
+    by_id = {score.id: score for score in output.scores}
+    if len(output.scores) != len(ids) or set(by_id) != set(ids):
+        raise ValueError(
+            f"Packed scores don't match the documents: expected {ids}, "
+            f"got {[score.id for score in output.scores]}"
+        )
+    return [Score(value=by_id[id].value, note=by_id[id].note) for id in ids]
+
+
+async def evaluate_pack(
+    texts: list[str],
+    scoring_rubric: ScoringRubric,
+    model: Model,
+    cache: ScoreCache | None = None,
+    limiter: CallLimiter | None = None,
+    usage: UsageStats | None = None,
+    tracer: CallTracer | None = None,
+    strict: bool = False,
+    doc_tracers: list[CallTracer | None] | None = None,
+) -> list[dict[str, Score] | BaseException]:
+    """
+    Score every rubric metric for several texts, with one packed call per
+    metric for the texts whose scores aren't cached. If a packed call fails
+    or its output doesn't validate, its texts are scored with per-document
+    calls instead. Returns the scores of each text, by metric name, or the
+    exception if one of its per-document calls failed, so one bad document
+    doesn't fail the rest of its pack.
+
+    Calls are recorded to `tracer`. With `doc_tracers` (one per text, usually
+    children of `tracer`), each text's cached scores and per-document calls
+    are recorded to its own tracer instead, and its share of each packed call
+    is added to that tracer's totals.
+    """
+
+    def text_tracer(i: int) -> CallTracer | None:
+        return (doc_tracers[i] if doc_tracers else None) or tracer
+
+    results: list[dict[str, Score]] = [{} for _ in texts]
+    errors: dict[int, BaseException] = {}
+    packs: list[tuple[MetricRubric, list[int]]] = []
+    for metric in scoring_rubric.metrics:
+        metric_key = metric.name.lower()
+        uncached: list[int] = []
+        for i, text in enumerate(texts):
+            cached_score = cache.get(pack_cache_key(text, metric, model)) if cache else None
+            if cached_score is not None:
+                record_cached([metric_key], model, text_tracer(i))
+                results[i][metric_key] = cached_score
+            else:
+                uncached.append(i)
+        if uncached:
+            packs.append((metric, uncached))
+
+    async def run_pack(metric: MetricRubric, indexes: list[int]) -> list[Score]:
+        shares = [doc_tracers[i] for i in indexes] if doc_tracers else []
+        pack_tracer = SharedCallTracer(tracer, [t for t in shares if t]) if any(shares) else tracer
+        return await evaluate_packed_metric(
+            [texts[i] for i in indexes], metric, model, usage, pack_tracer, strict
+        )
+
+    outcomes = await gather_limited(
+        *[partial(run_pack, metric, indexes) for metric, indexes in packs],
+        limiter=limiter,
+        return_exceptions=True,
+    )
+
+    fallbacks: list[tuple[MetricRubric, int]] = []
+    for (metric, indexes), outcome in zip(packs, outcomes, strict=True):
+        if isinstance(outcome, BaseException):
+            log.info(
+                "Packed %s call for %s documents failed, scoring them one by one: %s",
+                metric.name,
+                len(indexes),
+                outcome,
+            )
+            fallbacks.extend((metric, i) for i in indexes)
+            continue
+        for i, score in zip(indexes, outcome, strict=True):
+            results[i][metric.name.lower()] = score
+            if cache:
+                cache.put(pack_cache_key(texts[i], metric, model), score)
+
+    fallback_scores = await gather_limited(
+        *[
+            lambda metric=metric, i=i: evaluate_single_metric(
+                texts[i], metric, model, cache, usage, text_tracer(i), strict=strict
+            )
+            for metric, i in fallbacks
+        ],
+        limiter=limiter,
+        return_exceptions=True,
+    )
+    for (_, i), outcome in zip(fallbacks, fallback_scores, strict=True):
+        if isinstance(outcome, BaseException):
+            errors.setdefault(i, outcome)
+        else:
+            metric_key, score = outcome
+            results[i][metric_key] = score
+    return [errors.get(i, scores) for i, scores in enumerate(results)]
+
+
+PendingDoc = tuple[str, asyncio.Future[RubricMetrics], CallTracer | None]
+"""A document waiting to be packed: its text, result, and tracer."""
+
+
+class TextPacker:
+    """
+    Collects short documents evaluated concurrently (e.g. by a batch run) into
+    packs and scores each pack with `evaluate_pack()`. Callers just await
+    `evaluate()` for their document. A pack is sent when it's full, or
+    `settings.linger` seconds after its first document arrived. Documents
+    are scored with `rubric` (by default, the built-in rubric). Each
+    document's calls, and its share of packed calls, are recorded to the
+    tracer passed with it, if any, or else to `tracer`.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        settings: PackSettings,
+        cache: ScoreCache | None = None,
+        limiter: CallLimiter | None = None,
+        usage: UsageStats | None = None,
+        tracer: CallTracer | None = None,
+        strict: bool = False,
+        rubric: ScoringRubric | None = None,
+    ):
+        self.model: Model = model
+        self.settings: PackSettings = settings
+        self.cache: ScoreCache | None = cache
+        self.limiter: CallLimiter | None = limiter
+        self.usage: UsageStats | None = usage
+        self.tracer: CallTracer | None = tracer
+        self.strict: bool = strict
+        self.rubric: ScoringRubric = get_rubric(rubric)
+        self._pending: list[PendingDoc] = []
+        self._flush_timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def fits(self, analysis: DocAnalysis) -> bool:
+        return analysis.size(TextUnit.words) <= self.settings.max_doc_words
+
+    async def evaluate(
+        self, analysis: DocAnalysis, tracer: CallTracer | None = None
+    ) -> RubricMetrics:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[RubricMetrics] = loop.create_future()
+        self._pending.append((analysis.text, future, tracer))
+        if len(self._pending) >= self.settings.max_docs:
+            self._flush()
+        elif self._flush_timer is None:
+            self._flush_timer = loop.call_later(self.settings.linger, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        pack, self._pending = self._pending, []
+        if pack:
+            task = asyncio.create_task(self._evaluate(pack))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate(self, pack: list[PendingDoc]) -> None:
+        log.info("Evaluating a pack of %s short documents", len(pack))
+        try:
+            results = await evaluate_pack(
+                [text for text, _, _ in pack],
+                self.rubric,
+                self.model,
+                self.cache,
+                self.limiter,
+                self.usage,
+                self.tracer,
+                self.strict,
+                [tracer for _, _, tracer in pack],
+            )
+        except Exception as e:
+            for _, future, _ in pack:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), scores in zip(pack, results, strict=True):
+            if future.done():
+                continue
+            if isinstance(scores, BaseException):
+                future.set_exception(scores)
+            else:
+                future.set_result(self.rubric.metrics_type.from_scores(scores))
+
+
+## Tests
+
+
+def test_evaluate_pack():
+    import re
+
+    from pydantic_ai.messages import ModelMessage, ModelResponse, TextPart, ToolCallPart
+    from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+    from leximetry.eval.mock_model import _last_user_prompt  # pyright: ignore[reportPrivateUsage]
+
+    calls: list[str] = []
+
+    # Packed calls score each document by its ID, except that clarity leaves
+    # one out, so clarity falls back to per-document calls. With `fail_text`,
+    # per-document calls for that text fail.
+    fail_text = None
+
+    def packing(messages: list[ModelMessage], info: AgentInfo) -> ModelResponse:
+        prompt = _last_user_prompt(messages)
+        if not info.output_tools:
+            calls.append("single")
+            if fail_text and fail_text in prompt:
+                raise RuntimeError("Single call failed")
+            return ModelResponse(parts=[TextPart("1 (Single.)")])
+        calls.append("pack")
+        ids = re.findall(r'<document id="(\w+)">', prompt)
+        if "METRIC: clarity" in prompt:
+            ids = ids[:-1]
+        scores = [{"id": id, "value": int(id[-1]) + 1, "note": f"For {id}."} for id in ids]
+        return ModelResponse(parts=[ToolCallPart(info.output_tools[0].name, {"scores": scores})])
+
+    texts = [f"Short text number {i}. It has a few words. </document> Done." for i in range(3)]
+    results = asyncio.run(
+        evaluate_pack(texts, load_scoring_rubric(), FunctionModel(packing), limiter=CallLimiter())
+    )
+    assert calls.count("pack") == 12 and calls.count("single") == 3
+    assert [r["coherence"] for r in results if not isinstance(r, BaseException)] == [
+        Score(value=i + 2, note=f"For doc{i + 1}.") for i in range(3)
+    ]
+    assert all(
+        not isinstance(r, BaseException) and r["clarity"] == Score(value=1, note="Single.")
+        for r in results
+    )
+
+    # A failed per-document fallback only fails its own document.
+    fail_text = texts[1]
+    results = asyncio.run(
+        evaluate_pack(texts, load_scoring_rubric(), FunctionModel(packing), limiter=CallLimiter())
+    )
+    assert isinstance(results[1], RuntimeError)
+    assert all(not isinstance(results[i], BaseException) for i in (0, 2))
+
+
+def test_text_packer():
+    from leximetry.eval.mock_model import MockModel, MockSettings
+
+    model = MockModel(MockSettings(latency=0))
+    settings = PackSettings(max_docs=3)
+    texts = [f"Text {i} is short. It is still a text. It ends here." for i in range(5)]
+    tracer = CallTracer()
+    doc_tracers = [tracer.child() for _ in texts]
+
+    async def run() -> list[RubricMetrics]:
+        packer = TextPacker(model, settings, limiter=CallLimiter(), tracer=tracer)
+        assert all(packer.fits(DocAnalysis(text)) for text in texts)
+        return await asyncio.gather(
+            *[
+                packer.evaluate(DocAnalysis(text), doc_tracer)
+                for text, doc_tracer in zip(texts, doc_tracers, strict=True)
+            ]
+        )
+
+    results = asyncio.run(run())
+    # A full pack of 3 and a lingering pack of 2, each scored in 12 calls.
+    assert model.calls == 24
+    assert all(score.value > 0 for r in results for score in r.all_scores().values())
+
+    # The run counts each packed call once, and each document its share.
+    run_summary = tracer.summary()
+    doc_summaries = [doc_tracer.summary() for doc_tracer in doc_tracers]
+    assert run_summary.calls == 24
+    assert all(summary.calls == 12 and summary.prompt_tokens > 0 for summary in doc_summaries)
+    assert sum(summary.total_tokens for summary in doc_summaries) == run_summary.total_tokens
@@ -0,0 +1,170 @@
+"""
+Cheap checks that reject input not worth evaluating (too short, binary, or not
+UTF-8 text) before parsing it or calling an LLM. Uses only the standard library.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from pathlib import Path
+
+MIN_WORDS = 50
+
+MIN_SENTENCES = 3
+
+SNIFF_BYTES = 8192
+"""Bytes read from the start of a file to detect binary content."""
+
+READ_BLOCK_BYTES = 1024 * 1024
+"""Bytes decoded at a time when reading a text file."""
+
+_TOKEN_PATTERN = re.compile(r"\n[^\S\n]*\n\s*|\S+")
+"""A paragraph break or a word."""
+
+_SENTENCE_END = re.compile(r"[.!?…][\"'”’)\]]*$")
+
+
+class TextRejected(ValueError):
+    """
+    Input that isn't evaluated because it's too short or isn't text.
+    """
+
+
+def preflight_text(
+    text: str, min_words: int = MIN_WORDS, min_sentences: int = MIN_SENTENCES
+) -> None:
+    """
+    Raise `TextRejected` if the text has fewer than `min_words` words or
+    `min_sentences` sentences. Scans the text incrementally and stops as soon
+    as both thresholds are met, so long texts cost almost nothing to accept.
+
+    Words are whitespace-separated and sentences end with terminal punctuation
+    or a paragraph break, which closely approximates the full parse.
+    """
+    words = 0
+    sentences = 0
+    words_in_sentence = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if token.isspace():
+            if words_in_sentence:
+                sentences += 1
+                words_in_sentence = 0
+        else:
+            words += 1
+            words_in_sentence += 1
+            if _SENTENCE_END.search(token):
+                sentences += 1
+                words_in_sentence = 0
+        if words >= min_words and sentences >= min_sentences:
+            return
+    if words_in_sentence:
+        sentences += 1
+
+    if words < min_words:
+        raise TextRejected(f"Text is < {min_words} words so too short to evaluate")
+    if sentences < min_sentences:
+        raise TextRejected(f"Text is < {min_sentences} sentences so too short to evaluate")
+
+
+def normalize_newlines(text: str) -> str:
+    """
+    Translate `\r\n` and `\r` line endings to `\n`, as `Path.read_text()`
+    does, so paragraph breaks in Windows-authored files are recognized.
+    """
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def read_text_file(path: Path, block_bytes: int = READ_BLOCK_BYTES) -> str:
+    """
+    Read a UTF-8 text file, raising `TextRejected` without reading the rest of
+    the file if its start looks binary (contains NUL bytes), or if it isn't
+    valid UTF-8. Line endings are normalized to `\n`, as with
+    `Path.read_text()`. The file is decoded and normalized a block at a time,
+    so no copy of the file's bytes or of the unnormalized text is held, and
+    peak memory is the decoded blocks plus the joined text.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    parts: list[str] = []
+    pending_cr = ""
+    offset = 0
+    with open(path, "rb") as f:
+        if b"\0" in f.read(SNIFF_BYTES):
+            raise TextRejected(f"Binary file, not text: {path}")
+        f.seek(0)
+        block = f.read(block_bytes)
+        while True:
+            final = not block
+            try:
+                text = pending_cr + decoder.decode(block, final=final)
+            except UnicodeDecodeError as e:
+                position = offset + e.start
+                raise TextRejected(f"Not UTF-8 text ({e.reason} at byte {position}): {path}") from e
+            # A `\r` ending a block may start a `\r\n` split across blocks.
+            pending_cr = "\r" if text.endswith("\r") and not final else ""
+            parts.append(normalize_newlines(text[: len(text) - len(pending_cr)]))
+            if final:
+                break
+            offset += len(block)
+            block = f.read(block_bytes)
+    return "".join(parts)
+
+
+## Tests
+
+
+def test_preflight_text():
+    sentence = "The quick brown fox jumps over the lazy dog. "
+    preflight_text(sentence * 6)
+    # Paragraphs without terminal punctuation still count as sentences.
+    preflight_text("\n\n".join(["word " * 20] * 3))
+
+    for text, problem in [
+        ("Too short.", "words"),
+        ("word " * 100 + ".", "sentences"),
+        ("A long sentence " * 20 + "ends. And then, “another.” Done", None),
+    ]:
+        try:
+            preflight_text(text)
+            assert problem is None, text
+        except TextRejected as e:
+            assert problem and problem in str(e), (text, e)
+
+
+def test_read_text_file():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        text_path = Path(tmp_dir) / "doc.md"
+        text_path.write_text("Héllo wörld.", encoding="utf-8")
+        assert read_text_file(text_path) == "Héllo wörld."
+        text_path.write_text("")
+        assert read_text_file(text_path) == ""
+
+        # Windows and old Mac line endings read the same as `read_text()`.
+        paras = ["First paragraph.", "Second paragraph.", "Third one.\rEnds here."]
+        text_path.write_bytes("\r\n\r\n".join(paras).encode("utf-8"))
+        text = read_text_file(text_path)
+        assert text == text_path.read_text() and "\r" not in text
+        assert text.count("\n\n") == 2
+
+        # Line endings and multibyte characters split across blocks.
+        mixed = "Ünïcödé line.\r\n" * 50 + "Old Mac.\r" * 50 + "Last line ü."
+        text_path.write_bytes(mixed.encode("utf-8"))
+        for block_bytes in (1, 2, 3, 7, 64):
+            assert read_text_file(text_path, block_bytes) == text_path.read_text()
+
+        for name, data, reason in [
+            ("image.png", b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR", "Binary"),
+            ("latin1.txt", "Héllo".encode("latin-1"), "Not UTF-8"),
+        ]:
+            path = Path(tmp_dir) / name
+            path.write_bytes(data)
+            try:
+                read_text_file(path)
+                raise AssertionError(f"Expected {name} to be rejected")
+            except TextRejected as e:
+                assert reason in str(e)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Any
+
+from anthropic.types.beta import BetaMessageParam
+from pydantic_ai.messages import ModelMessage
+from pydantic_ai.models.anthropic import AnthropicModel
+from typing_extensions import override
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def mark_cache_breakpoint(messages: list[BetaMessageParam]) -> None:
+    """
+    Mark the end of the first user content block as an Anthropic prompt cache
+    breakpoint. Our prompts put the document in that block, so the tools,
+    instructions, and document are cached and shared by every metric call.
+    """
+    for message in messages:
+        content = message["content"]
+        if message["role"] == "user" and not isinstance(content, str) and content:
+            block: Any = next(iter(content))
+            block["cache_control"] = CACHE_CONTROL
+            return
+
+
+class CachingAnthropicModel(AnthropicModel):
+    """
+    Anthropic model that sets a prompt cache breakpoint after the document, since
+    Anthropic (unlike OpenAI) only caches prompt prefixes marked explicitly.
+
+    pydantic-ai has no public setting for cache breakpoints yet, so this hooks
+    the private `_map_message()`. The pydantic-ai version is capped in
+    pyproject.toml, and `test_map_message_hook` checks the hook still exists.
+    """
+
+    @override
+    async def _map_message(
+        self, messages: list[ModelMessage]
+    ) -> tuple[str, list[BetaMessageParam]]:
+        system_prompt, anthropic_messages = await super()._map_message(messages)
+        mark_cache_breakpoint(anthropic_messages)
+        return system_prompt, anthropic_messages
+
+
+## Tests
+
+
+def test_map_message_hook():
+    import inspect
+
+    hook = getattr(AnthropicModel, "_map_message", None)
+    assert hook is not None and inspect.iscoroutinefunction(hook)
+    assert list(inspect.signature(hook).parameters) == ["self", "messages"]
+
+
+def test_caching_anthropic_model():
+    import asyncio
+
+    from pydantic_ai.messages import ModelRequest, UserPromptPart
+    from pydantic_ai.providers.anthropic import AnthropicProvider
+
+    model = CachingAnthropicModel(
+        "claude-3-5-haiku-latest", provider=AnthropicProvider(api_key="test-key")
+    )
+    request = ModelRequest(parts=[UserPromptPart(["The document.", "The metric."])])
+    _system, messages = asyncio.run(model._map_message([request]))  # pyright: ignore[reportPrivateUsage]
+
+    [message] = messages
+    assert not isinstance(message["content"], str)
+    first, second = list(message["content"])
+    assert first == {"type": "text", "text": "The document.", "cache_control": CACHE_CONTROL}
+    assert "cache_control" not in second
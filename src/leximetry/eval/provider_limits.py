@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from leximetry.utils.aio_limited import DEFAULT_MAX_CONCURRENT, DEFAULT_MAX_RPS
+
+
+@dataclass(frozen=True)
+class ProviderLimits:
+    """
+    Default ceilings on concurrent calls and requests per second for a provider.
+    The limiter adapts below these, so they should be near what a typical
+    account's quota allows rather than conservative.
+    """
+
+    max_concurrent: int
+    max_rps: float
+
+
+DEFAULT_LIMITS = ProviderLimits(DEFAULT_MAX_CONCURRENT, DEFAULT_MAX_RPS)
+
+PROVIDER_LIMITS: dict[str, ProviderLimits] = {
+    "openai": ProviderLimits(8, 8.0),
+    "anthropic": ProviderLimits(4, 2.0),
+    "google-gla": ProviderLimits(4, 4.0),
+    "google-vertex": ProviderLimits(4, 4.0),
+    "groq": ProviderLimits(4, 4.0),
+    "test": ProviderLimits(32, 1000.0),
+    "mock": ProviderLimits(32, 1000.0),
+}
+
+
+def provider_for_model(model_name: str) -> str | None:
+    """
+    The provider for a model name, using the same rules as pydantic_ai's
+    `infer_model()`: an explicit "provider:model" prefix, or a known model
+    name prefix.
+    """
+    if model_name in ("test", "mock"):
+        return model_name
+    if ":" in model_name:
+        return model_name.split(":", 1)[0]
+    if model_name.startswith(("gpt", "o1", "o3")):
+        return "openai"
+    if model_name.startswith("claude"):
+        return "anthropic"
+    if model_name.startswith("gemini"):
+        return "google-gla"
+    return None
+
+
+def default_limits(model_name: str) -> ProviderLimits:
+    provider = provider_for_model(model_name)
+    return PROVIDER_LIMITS.get(provider or "", DEFAULT_LIMITS)
+
+
+## Tests
+
+
+def test_default_limits():
+    assert provider_for_model("gpt-4o-mini") == "openai"
+    assert provider_for_model("anthropic:claude-3-5-haiku-latest") == "anthropic"
+    assert default_limits("claude-4-sonnet-latest") == PROVIDER_LIMITS["anthropic"]
+    assert default_limits("mistral:mistral-large-latest") == DEFAULT_LIMITS
+    assert provider_for_model("mock") == provider_for_model("mock:latency=1") == "mock"
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
+from itertools import zip_longest
 from textwrap import wrap
 from typing import TYPE_CHECKING, Any, cast
 
-from chopdiff.docs import TextDoc
 from rich.align import Align
 from rich.box import Box
 from rich.columns import Columns
@@ -12,10 +12,12 @@ from rich.panel import Panel
 from rich.text import Text
 
 from leximetry.cli.rich_styles import COLOR_SCHEME, GROUP_HEADERS, LEXIMETRY_THEME
+from leximetry.eval.doc_analysis import DocAnalysis
 from leximetry.eval.size_stats import REPORT_WIDTH, format_doc_stats
 
 if TYPE_CHECKING:
-    from leximetry.eval.metrics_model import ProseMetrics, Score
+    from leximetry.eval.metrics_model import RubricMetrics, Score
+    from leximetry.eval.sampling import TextSample
 
 METRICS_TITLE = "Leximetry"
 
@@ -24,7 +26,7 @@ FILLED_SYMBOL = "◆"
 EMPTY_SYMBOL = " "
 
 
-def get_group_metrics(prose_metrics: ProseMetrics) -> dict[str, list[str]]:
+def get_group_metrics(prose_metrics: RubricMetrics) -> dict[str, list[str]]:
     """Get group names and their metrics from the model structure."""
     groups: dict[str, list[str]] = {}
     model_fields = cast(dict[str, Any], type(prose_metrics).model_fields)
@@ -36,6 +38,25 @@ def get_group_metrics(prose_metrics: ProseMetrics) -> dict[str, list[str]]:
     return groups
 
 
+def group_title(group_name: str) -> str:
+    if group_name in GROUP_HEADERS:
+        return GROUP_HEADERS[group_name][0]
+    return group_name.replace("_", " ").title()
+
+
+def metric_title(metric_name: str) -> str:
+    return metric_name.replace("_", " ").title()
+
+
+def paired_groups(group_names: list[str]) -> list[tuple[str | None, str | None]]:
+    """
+    Groups laid out in two columns, the first half of the groups on the left
+    and the rest on the right, as pairs of groups shown side by side.
+    """
+    half = (len(group_names) + 1) // 2
+    return list(zip_longest(group_names[:half], group_names[half:]))
+
+
 def format_score_viz(value: int, char: str = FILLED_SYMBOL, reversed: bool = False) -> str:
     """
     Format score as a bar showing filled and empty positions out of 5.
@@ -50,9 +71,24 @@ def format_score_viz(value: int, char: str = FILLED_SYMBOL, reversed: bool = Fal
         return filled + empty
 
 
-def collect_notes(prose_metrics: ProseMetrics) -> list[tuple[str, str]]:
+def format_score_value(score: Score) -> str:
+    """
+    The score's value, with the spread of its samples if it's a median of
+    several samples, e.g. "3 ±0.47".
     """
-    Collect all notes from the prose metrics.
+    if score.spread is None:
+        return str(score.value)
+    return f"{score.value} ±{score.spread:g}"
+
+
+def format_spread(score: Score) -> str:
+    return f"(±{score.spread:g} over {score.samples} samples)" if score.spread else ""
+
+
+def collect_notes(prose_metrics: RubricMetrics) -> list[tuple[str, str]]:
+    """
+    Collect all notes from the prose metrics, noting the spread of scores
+    whose samples disagreed.
     """
     notes: list[tuple[str, str]] = []
 
@@ -61,13 +97,16 @@ def collect_notes(prose_metrics: ProseMetrics) -> list[tuple[str, str]]:
         group = getattr(prose_metrics, group_name)
         for metric_name in metric_names:
             score = getattr(group, metric_name)
-            if score.note:
-                notes.append((metric_name.title(), score.note))
+            note = " ".join(part for part in (score.note, format_spread(score)) if part)
+            if note:
+                notes.append((metric_title(metric_name), note))
 
     return notes
 
 
-def format_notes_section(notes: list[tuple[str, str]]) -> RenderableType | None:
+def format_notes_section(
+    notes: list[tuple[str, str]], groups: dict[str, list[str]]
+) -> RenderableType | None:
     """
     Format the notes section in horizontally paired columns with balanced heights and group headings.
     """
@@ -77,21 +116,20 @@ def format_notes_section(notes: list[tuple[str, str]]) -> RenderableType | None:
     # Create a dict for easy lookup
     notes_dict = {metric_name: note for metric_name, note in notes}
 
-    # Define the horizontal pairs based on model structure
-    grid_rows = [
-        # Group headers for first section
-        ("__EXPRESSION_HEADER", "__GROUNDEDNESS_HEADER"),
-        # Expression vs Groundedness metrics
-        ("Clarity", "Factuality"),
-        ("Coherence", "Rigor"),
-        ("Sincerity", "Depth"),
-        # Group headers for second section
-        ("__STYLE_HEADER", "__IMPACT_HEADER"),
-        # Style vs Impact metrics
-        ("Subjectivity", "Sensitivity"),
-        ("Narrativity", "Accessibility"),
-        ("Warmth", "Longevity"),
-    ]
+    # Define the horizontal pairs based on model structure: each pair of
+    # groups gets a row of headers, then a row per metric
+    grid_rows: list[tuple[str, str]] = []
+    for left_group, right_group in paired_groups(list(groups)):
+        grid_rows.append(
+            (
+                f"__{left_group.upper()}_HEADER" if left_group else "",
+                f"__{right_group.upper()}_HEADER" if right_group else "",
+            )
+        )
+        left_metrics = groups[left_group] if left_group else []
+        right_metrics = groups[right_group] if right_group else []
+        for left_metric, right_metric in zip_longest(left_metrics, right_metrics, fillvalue=""):
+            grid_rows.append((metric_title(left_metric), metric_title(right_metric)))
 
     # Available width for each column
     # Account for panel padding (2) and some space between columns (4)
@@ -105,7 +143,7 @@ def format_notes_section(notes: list[tuple[str, str]]) -> RenderableType | None:
         content = Text()
 
         # Get the style name for this metric from the theme
-        metric_style = COLOR_SCHEME.get(metric_name.lower(), "white")
+        metric_style = COLOR_SCHEME.get(metric_name.lower().replace(" ", "_"), "white")
 
         # Add metric name using the theme style with alignment
         if align_right:
@@ -132,7 +170,7 @@ def format_notes_section(notes: list[tuple[str, str]]) -> RenderableType | None:
 
     def format_group_header(group_name: str, align_right: bool = False) -> tuple[Text, int]:
         """Format a group header and return content plus line count"""
-        title, _ = GROUP_HEADERS[group_name.lower()]
+        title = group_title(group_name.lower())
         content = Text()
         if align_right:
             content.append(f"{title.upper():>{column_width}}", style="category_name")
@@ -151,7 +189,7 @@ def format_notes_section(notes: list[tuple[str, str]]) -> RenderableType | None:
 
         # Handle group headers
         if left_item.startswith("__") and left_item.endswith("_HEADER"):
-            group_name = left_item.replace("__", "").replace("_HEADER", "")
+            group_name = left_item.removeprefix("__").removesuffix("_HEADER")
             # EXPRESSION and STYLE should be left-aligned in the left column
             left_content, left_height = format_group_header(group_name, align_right=False)
         elif left_item in notes_dict:
@@ -160,7 +198,7 @@ def format_notes_section(notes: list[tuple[str, str]]) -> RenderableType | None:
             )
 
         if right_item.startswith("__") and right_item.endswith("_HEADER"):
-            group_name = right_item.replace("__", "").replace("_HEADER", "")
+            group_name = right_item.removeprefix("__").removesuffix("_HEADER")
             # GROUNDEDNESS and IMPACT should be right-aligned in the right column
             right_content, right_height = format_group_header(group_name, align_right=True)
         elif right_item in notes_dict:
@@ -217,94 +255,79 @@ def format_notes_section(notes: list[tuple[str, str]]) -> RenderableType | None:
     return notes_panel
 
 
-def format_prose_metrics_rich(prose_metrics: ProseMetrics) -> RenderableType:
+def format_score_half(
+    metric_name: str | None, score: Score | None, align_right: bool
+) -> tuple[str, str, str]:
     """
-    Format ProseMetrics object with rich formatting matching the sample layout.
+    One side of a score row as its label (metric name and value), its bar
+    (growing out from the center line), and their style. Blank if there's no
+    metric on this side of the row.
     """
+    if metric_name is None or score is None:
+        return (" " * 22 if align_right else ""), EMPTY_SYMBOL * 5, "white"
+    color = COLOR_SCHEME.get(metric_name, "white")
+    symbols = format_score_viz(score.value, reversed=align_right)
+    if align_right:
+        return f"{metric_title(metric_name):>18}  {score.value} ", symbols, color
+    return f" {score.value}  {metric_title(metric_name):<17}", symbols, color
 
-    # Get all the data dynamically
-    expression = prose_metrics.expression
-    style = prose_metrics.style
-    groundedness = prose_metrics.groundedness
-    impact = prose_metrics.impact
 
-    # Get metric names from model structure
-    exp_metrics = list(type(expression).model_fields.keys())
-    style_metrics = list(type(style).model_fields.keys())
-    ground_metrics = list(type(groundedness).model_fields.keys())
-    impact_metrics = list(type(impact).model_fields.keys())
+def format_prose_metrics_rich(prose_metrics: RubricMetrics) -> RenderableType:
+    """
+    Format metrics with rich formatting matching the sample layout: groups
+    in two columns, with each pair of groups' scores as bars growing out from
+    a shared center line.
+    """
+
+    # Get all the data dynamically
+    groups = get_group_metrics(prose_metrics)
+    pairs = paired_groups(list(groups))
 
     # Create the layout with proper spacing and labels
     content = Text()
 
-    # Top row with group labels
-    content.append("EXPRESSION", style="category_name")
-    content.append("            ╭───────────╮           ", style="white")
-    content.append("GROUNDEDNESS", style="category_name")
-    content.append("\n")
-
-    # Expression vs Groundedness rows
-    for i in range(3):
-        exp_score = getattr(expression, exp_metrics[i])
-        ground_score = getattr(groundedness, ground_metrics[i])
-
-        exp_color = COLOR_SCHEME.get(exp_metrics[i], "white")
-        ground_color = COLOR_SCHEME.get(ground_metrics[i], "white")
-
-        # Create symbol displays (right-aligned for left, left-aligned for right)
-        left_symbols = (EMPTY_SYMBOL * (5 - exp_score.value)) + (FILLED_SYMBOL * exp_score.value)
-        right_symbols = (FILLED_SYMBOL * ground_score.value) + (
-            EMPTY_SYMBOL * (5 - ground_score.value)
-        )
-
-        # Format the row: right-aligned metric_name score│symbols│symbols│score left-aligned metric_name
-        content.append(f"{exp_metrics[i].title():>18}  {exp_score.value} ", style=exp_color)
-        content.append("│", style="white")
-        content.append(f"{left_symbols}", style=exp_color)
-        content.append("│", style="white")
-        content.append(f"{right_symbols}", style=ground_color)
-        content.append("│", style="white")
+    for pair_index, (left_group, right_group) in enumerate(pairs):
+        # Row with group labels
+        left_title = group_title(left_group).upper() if left_group else ""
+        right_title = group_title(right_group).upper() if right_group else ""
+        center = "╭───────────╮" if pair_index == 0 else "│─────┼─────│"
+        content.append(left_title, style="category_name")
         content.append(
-            f" {ground_score.value}  {ground_metrics[i].title():<17}", style=ground_color
+            " " * max(1, 22 - len(left_title)) + center + " " * max(1, 23 - len(right_title)),
+            style="white",
         )
+        content.append(right_title, style="category_name")
         content.append("\n")
 
-    # Separator row
-    content.append("STYLE", style="category_name")
-    content.append("                 │─────┼─────│                 ", style="white")
-    content.append("IMPACT", style="category_name")
-    content.append("\n")
-
-    # Style vs Impact rows
-    for i in range(3):
-        style_score = getattr(style, style_metrics[i])
-        impact_score = getattr(impact, impact_metrics[i])
-
-        style_color = COLOR_SCHEME.get(style_metrics[i], "white")
-        impact_color = COLOR_SCHEME.get(impact_metrics[i], "white")
-
-        # Create symbol displays (right-aligned for left, left-aligned for right)
-        left_symbols = (EMPTY_SYMBOL * (5 - style_score.value)) + (
-            FILLED_SYMBOL * style_score.value
-        )
-        right_symbols = (FILLED_SYMBOL * impact_score.value) + (
-            EMPTY_SYMBOL * (5 - impact_score.value)
-        )
-
-        # Format the row: right-aligned metric_name score│symbols│symbols│score left-aligned metric_name
-        content.append(f"{style_metrics[i].title():>18}  {style_score.value} ", style=style_color)
-        content.append("│", style="white")
-        content.append(f"{left_symbols}", style=style_color)
-        content.append("│", style="white")
-        content.append(f"{right_symbols}", style=impact_color)
-        content.append("│", style="white")
-        content.append(
-            f" {impact_score.value}  {impact_metrics[i].title():<17}", style=impact_color
-        )
-        if i < 2:  # Don't add newline after last row
-            content.append("\n")
+        # Left vs right group rows
+        left_metrics = groups[left_group] if left_group else []
+        right_metrics = groups[right_group] if right_group else []
+        rows = list(zip_longest(left_metrics, right_metrics))
+        for row_index, (left_metric, right_metric) in enumerate(rows):
+            left_group_scores = getattr(prose_metrics, left_group) if left_group else None
+            right_group_scores = getattr(prose_metrics, right_group) if right_group else None
+            left_score = getattr(left_group_scores, left_metric) if left_metric else None
+            right_score = getattr(right_group_scores, right_metric) if right_metric else None
+
+            # Format the row: right-aligned metric_name score│symbols│symbols│score left-aligned metric_name
+            left_label, left_symbols, left_style = format_score_half(
+                left_metric, left_score, align_right=True
+            )
+            right_label, right_symbols, right_style = format_score_half(
+                right_metric, right_score, align_right=False
+            )
+            content.append(left_label, style=left_style)
+            content.append("│", style="white")
+            content.append(left_symbols, style=left_style)
+            content.append("│", style="white")
+            content.append(right_symbols, style=right_style)
+            content.append("│", style="white")
+            content.append(right_label, style=right_style)
+            is_last_row = pair_index == len(pairs) - 1 and row_index == len(rows) - 1
+            if not is_last_row:  # Don't add newline after last row
+                content.append("\n")
 
-    # Bottom row with group labels
+    # Bottom row
     content.append("\n")
     content.append("                      ╰───────────╯                       ")
 
@@ -318,7 +341,7 @@ def format_prose_metrics_rich(prose_metrics: ProseMetrics) -> RenderableType:
 
     # Collect and format notes
     notes = collect_notes(prose_metrics)
-    notes_section = format_notes_section(notes)
+    notes_section = format_notes_section(notes, groups)
 
     # Combine main panel with notes section
     if notes_section:
@@ -327,9 +350,9 @@ def format_prose_metrics_rich(prose_metrics: ProseMetrics) -> RenderableType:
         return main_panel
 
 
-def format_prose_metrics_plain(prose_metrics: ProseMetrics) -> str:
+def format_prose_metrics_plain(prose_metrics: RubricMetrics) -> str:
     """
-    Format ProseMetrics object as plain text.
+    Format metrics as plain text.
     """
     lines: list[str] = []
     lines.append(METRICS_TITLE)
@@ -339,8 +362,7 @@ def format_prose_metrics_plain(prose_metrics: ProseMetrics) -> str:
     groups = get_group_metrics(prose_metrics)
     for group_name, metric_names in groups.items():
         # Group header
-        title, _ = GROUP_HEADERS[group_name]
-        lines.append(title.upper())
+        lines.append(group_title(group_name).upper())
         lines.append("-" * 20)
 
         group = getattr(prose_metrics, group_name)
@@ -348,13 +370,13 @@ def format_prose_metrics_plain(prose_metrics: ProseMetrics) -> str:
         for metric_name in metric_names:
             score = getattr(group, metric_name)
             # Format metric name with appropriate padding
-            formatted_name = f"{metric_name.title()}"
+            formatted_name = f"{metric_title(metric_name)}"
             # Adjust padding based on longest name in the group
             padding = 13 if metric_name == "subjectivity" else 12
             padded_name = f"{formatted_name:<{padding}}"
 
             lines.append(
-                f"{padded_name}{format_score_viz(score.value)} ({score.value}) {score.note}"
+                f"{padded_name}{format_score_viz(score.value)} ({format_score_value(score)}) {score.note}"
             )
 
         lines.append("")
@@ -368,25 +390,29 @@ def format_score_standalone(score: Score) -> str:
     """
     symbols = format_score_viz(score.value)
     if score.note:
-        return f"{symbols} ({score.value}) {score.note}"
-    return f"{symbols} ({score.value})"
+        return f"{symbols} ({format_score_value(score)}) {score.note}"
+    return f"{symbols} ({format_score_value(score)})"
 
 
 def format_complete_analysis(
-    prose_metrics: ProseMetrics,
-    doc: TextDoc,
-    text: str,
+    prose_metrics: RubricMetrics,
+    doc: DocAnalysis,
+    sample: TextSample | None = None,
 ) -> RenderableType:
     """
-    Format complete analysis with document stats and prose metrics.
+    Format complete analysis with document stats and prose metrics, noting
+    if the scores are from a sample of the document.
     """
     # Create document summary panel
-    doc_panel = format_doc_stats(doc, text)
+    doc_panel = format_doc_stats(doc)
 
     # Create metrics panel
     metrics_panel = format_prose_metrics_rich(prose_metrics)
 
     # Combine with spacing
+    if sample and sample.is_sampled:
+        sample_note = Align.center(Text(sample.summary_str(), style="hint"), width=REPORT_WIDTH)
+        return Group(doc_panel, "", sample_note, "", metrics_panel)
     return Group(doc_panel, "", metrics_panel)
 
 
@@ -395,7 +421,6 @@ def format_complete_analysis(
 
 def test_compact_format():
     """Test the complete analysis format with document stats and metrics."""
-    from chopdiff.docs import TextDoc
     from rich.console import Console
 
     from leximetry.eval.metrics_model import (
@@ -439,7 +464,34 @@ def test_compact_format():
 
     # Create test text and doc
     test_text = "This is a sample text for testing the document statistics and formatting. " * 1000
-    test_doc = TextDoc.from_text(test_text)
+    test_doc = DocAnalysis(test_text)
 
     console = Console(theme=LEXIMETRY_THEME)
-    console.print(format_complete_analysis(test_metrics, test_doc, test_text))
+    console.print(format_complete_analysis(test_metrics, test_doc))
+
+
+def test_custom_rubric_format():
+    from rich.console import Console
+
+    from leximetry.eval.metrics_model import MetricRubric, Score, ScoringRubric
+
+    values = {0: "Cannot assess", 5: "Excellent"}
+    rubric = ScoringRubric(
+        metrics=[
+            MetricRubric(name=name, description=f"The {name}.", values=values)
+            for name in ("tone", "jargon", "pacing")
+        ],
+        groups={"voice": ["tone", "jargon"], "flow_of_ideas": ["pacing"]},
+    )
+    metrics = rubric.metrics_type.from_scores(
+        {"tone": Score(value=4, note="Friendly."), "jargon": Score(value=2)}
+    )
+
+    console = Console(theme=LEXIMETRY_THEME, width=REPORT_WIDTH, record=True)
+    console.print(format_prose_metrics_rich(metrics))
+    report = console.export_text()
+    assert "VOICE" in report and "FLOW OF IDEAS" in report
+    assert "Tone  4" in report and "0  Pacing" in report and "Friendly." in report
+
+    plain = format_prose_metrics_plain(metrics)
+    assert "FLOW OF IDEAS" in plain and "Not evaluated" in plain
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from chopdiff.docs import TextUnit
+
+from leximetry.eval.chunking import PARA_SEP, TextChunk, split_paragraph
+from leximetry.eval.doc_analysis import DocAnalysis, analyze
+from leximetry.eval.eval_options import DEFAULT_SAMPLE_TOKENS
+
+GAP_MARKER = "[…]"
+
+
+@dataclass(frozen=True)
+class SampleSettings:
+    """
+    Settings for evaluating a representative sample of a long document.
+    """
+
+    max_size: int = DEFAULT_SAMPLE_TOKENS
+    unit: TextUnit = TextUnit.tiktokens
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class TextSample:
+    """
+    Text selected for evaluation and how much of the original it covers.
+    """
+
+    text: str
+    sample_size: int
+    total_size: int
+    unit: TextUnit
+
+    @property
+    def is_sampled(self) -> bool:
+        return self.sample_size < self.total_size
+
+    @property
+    def fraction(self) -> float:
+        return self.sample_size / self.total_size if self.total_size else 1.0
+
+    def summary_str(self) -> str:
+        return (
+            f"Scored a sample of {self.sample_size:,} of {self.total_size:,} {self.unit.value} "
+            f"({self.fraction:.1%} of the document)"
+        )
+
+
+def sample_text(text: str | DocAnalysis, settings: SampleSettings) -> TextSample:
+    """
+    Pick paragraphs totaling at most `settings.max_size` from across the text.
+
+    The document is divided into contiguous strata of equal size and one
+    paragraph is picked at random from each, so the sample spans the whole
+    document. Any remaining budget is filled with further random paragraphs.
+    Selection is deterministic for a given text and seed. Paragraphs too large
+    to sample are split at sentence boundaries. Picked paragraphs are kept in
+    document order, with a gap marker wherever text was skipped.
+    """
+    analysis = analyze(text)
+    budget = settings.max_size
+
+    def iter_passages() -> Iterator[TextChunk]:
+        for para, para_size in analysis.sized_paragraphs(settings.unit):
+            if para_size > budget // 4:
+                yield from split_paragraph(para, max(1, budget // 4), settings.unit)
+            else:
+                yield TextChunk(para.original_text, para_size)
+
+    # Only sizes are kept while choosing, and the text of just the picked
+    # passages is collected afterwards, so long documents aren't copied.
+    passage_sizes = [passage.size for passage in iter_passages()]
+    total_size = sum(passage_sizes)
+    if total_size <= budget:
+        return TextSample(analysis.text, total_size, total_size, settings.unit)
+
+    # Assign each passage to a stratum by its starting offset in the document.
+    num_passages = len(passage_sizes)
+    mean_size = total_size / num_passages
+    num_strata = max(1, min(num_passages, round(budget / mean_size)))
+    strata: list[list[int]] = [[] for _ in range(num_strata)]
+    offset = 0
+    for i, passage_size in enumerate(passage_sizes):
+        strata[min(num_strata - 1, offset * num_strata // total_size)].append(i)
+        offset += passage_size
+
+    rng = random.Random(settings.seed)
+    picked: set[int] = set()
+    remaining = budget
+
+    def try_pick(candidates: list[int]) -> None:
+        nonlocal remaining
+        fitting = [i for i in candidates if i not in picked and passage_sizes[i] <= remaining]
+        if fitting:
+            choice = rng.choice(fitting)
+            picked.add(choice)
+            remaining -= passage_sizes[choice]
+
+    # Visit strata in random order so a tight budget doesn't favor the start.
+    for stratum in rng.sample(strata, len(strata)):
+        try_pick(stratum)
+    for i in rng.sample(range(num_passages), num_passages):
+        try_pick([i])
+
+    parts: list[str] = []
+    prev = -1
+    for i, passage in enumerate(iter_passages()):
+        if i not in picked:
+            continue
+        if i != prev + 1:
+            parts.append(GAP_MARKER)
+        parts.append(passage.text)
+        prev = i
+    if prev != num_passages - 1:
+        parts.append(GAP_MARKER)
+
+    return TextSample(PARA_SEP.join(parts), budget - remaining, total_size, settings.unit)
+
+
+## Tests
+
+
+def test_sample_text():
+    paras = [f"Paragraph {i} has a few words. It has two sentences." for i in range(100)]
+    text = PARA_SEP.join(paras)
+    settings = SampleSettings(max_size=100, unit=TextUnit.words, seed=1)
+
+    sample = sample_text(text, settings)
+    assert sample.is_sampled
+    assert sample.total_size == 1000
+    assert 90 <= sample.sample_size <= 100
+    assert 0.09 <= sample.fraction <= 0.1
+    assert sample == sample_text(text, settings)
+    assert sample != sample_text(text, SampleSettings(max_size=100, unit=TextUnit.words, seed=2))
+
+    # Stratified: every tenth of the document is represented.
+    picked = [int(p.split()[1]) for p in sample.text.split(PARA_SEP) if p != GAP_MARKER]
+    assert picked == sorted(picked)
+    assert {i // 10 for i in picked} == set(range(10))
+
+    # Short texts are returned whole.
+    short = sample_text(PARA_SEP.join(paras[:5]), settings)
+    assert not short.is_sampled
+    assert short.text == PARA_SEP.join(paras[:5])
+    assert short.fraction == 1.0
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from strif import atomic_output_file, hash_string
+
+from leximetry.eval.doc_analysis import DocAnalysis, analyze
+from leximetry.eval.eval_options import CACHE_DIR_ENV
+from leximetry.eval.metrics_model import MetricRubric, Score
+
+DEFAULT_MAX_ENTRIES = 50_000
+
+CACHE_SUFFIX = ".json"
+
+
+def default_cache_dir() -> Path:
+    """
+    Default location for the score cache: `$LEXIMETRY_CACHE_DIR` if set, otherwise
+    `$XDG_CACHE_HOME/leximetry/scores` (usually `~/.cache/leximetry/scores`).
+    """
+    env_dir = os.environ.get(CACHE_DIR_ENV)
+    if env_dir:
+        return Path(env_dir).expanduser()
+    xdg_cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg_cache) / "leximetry" / "scores"
+
+
+def score_cache_key(
+    text: str | DocAnalysis, metric: MetricRubric, prompt_template: str, model_name: str
+) -> str:
+    """
+    Content-addressed key for a single metric score. Any change to the text, the
+    metric rubric, the prompt template (including its version), or the model
+    gives a new key. The text and rubric are keyed by their memoized content
+    hashes, so pass a `DocAnalysis` to hash a document once for all its keys.
+    """
+    key_material = json.dumps(
+        {
+            "text_sha256": analyze(text).content_hash,
+            "metric_sha256": metric.content_hash,
+            "prompt_template": prompt_template,
+            "model": model_name,
+        },
+        sort_keys=True,
+    )
+    return hash_string(key_material, algorithm="sha256").hex
+
+
+@dataclass
+class ScoreCache:
+    """
+    Persistent on-disk cache of parsed `Score`s, one small JSON file per key.
+
+    Recency is tracked with file mtimes (touched on every hit), so once the cache
+    grows past `max_entries` the least recently used entries are evicted.
+    Entries are only counted on the first write of a new entry, so opening the
+    cache and reading from it never scans the directory.
+    With `refresh` set, lookups always miss but new scores are still written.
+    """
+
+    cache_dir: Path
+    max_entries: int = DEFAULT_MAX_ENTRIES
+    refresh: bool = False
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    _entry_count: int | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _entry_paths(self) -> list[Path]:
+        return list(self.cache_dir.glob(f"*/*{CACHE_SUFFIX}"))
+
+    def entry_path(self, key: str) -> Path:
+        # Two-level fan-out keeps directories small for large caches.
+        return self.cache_dir / key[:2] / f"{key}{CACHE_SUFFIX}"
+
+    def contains(self, key: str) -> bool:
+        """
+        Whether a lookup would likely hit, without counting it or updating recency.
+        """
+        return not self.refresh and self.entry_path(key).exists()
+
+    def get(self, key: str) -> Score | None:
+        """
+        Look up a cached score, updating its recency on a hit.
+        """
+        path = self.entry_path(key)
+        if self.refresh or not path.exists():
+            self.misses += 1
+            return None
+        try:
+            score = Score.model_validate_json(path.read_text())
+            os.utime(path)
+        except (OSError, ValueError):
+            # Treat unreadable or stale-format entries as misses.
+            self.misses += 1
+            return None
+        self.hits += 1
+        return score
+
+    def put(self, key: str, score: Score) -> None:
+        """
+        Store a score, evicting least recently used entries if the cache is full.
+        """
+        path = self.entry_path(key)
+        is_new = not path.exists()
+        with atomic_output_file(path, make_parents=True, force=True) as tmp_path:
+            tmp_path.write_text(score.model_dump_json())
+        if not is_new:
+            return
+        if self._entry_count is None:
+            self._entry_count = len(self._entry_paths())
+        else:
+            self._entry_count += 1
+        if self._entry_count > self.max_entries:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drop the oldest entries by mtime. Evicts down to 90% of capacity so we
+        don't rescan the directory on every subsequent write.
+        """
+        target = int(self.max_entries * 0.9)
+        entries: list[tuple[float, Path]] = []
+        for path in self._entry_paths():
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+        to_remove = max(0, len(entries) - target)
+        for _, path in entries[:to_remove]:
+            try:
+                path.unlink()
+                self.evictions += 1
+            except OSError:
+                pass
+        self._entry_count = len(entries) - to_remove
+
+    def stats_str(self) -> str:
+        return f"Score cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+
+
+## Tests
+
+
+def _test_metric(name: str = "Clarity") -> MetricRubric:
+    return MetricRubric(
+        name=name,
+        description="Is the language clear?",
+        values={0: "Cannot assess", 5: "Perfectly clear"},
+    )
+
+
+def test_score_cache_key():
+    metric = _test_metric()
+    key = score_cache_key("Some text.", metric, "template", "gpt-4o")
+    assert key == score_cache_key("Some text.", metric, "template", "gpt-4o")
+    assert key != score_cache_key("Other text.", metric, "template", "gpt-4o")
+    assert key != score_cache_key("Some text.", _test_metric("Depth"), "template", "gpt-4o")
+    assert key != score_cache_key("Some text.", metric, "template v2", "gpt-4o")
+    assert key != score_cache_key("Some text.", metric, "template", "gpt-4o-mini")
+    assert key == score_cache_key(DocAnalysis("Some text."), _test_metric(), "template", "gpt-4o")
+
+
+def test_score_cache_get_put():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ScoreCache(Path(tmp_dir))
+        key = score_cache_key("Some text.", _test_metric(), "template", "gpt-4o")
+
+        assert cache.get(key) is None
+        cache.put(key, Score(value=4, note="Clear"))
+        assert cache.get(key) == Score(value=4, note="Clear")
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # A new cache instance sees the persisted entry, without counting entries
+        # until it writes one.
+        reopened = ScoreCache(Path(tmp_dir))
+        assert reopened.contains(key)
+        assert reopened._entry_count is None  # pyright: ignore[reportPrivateUsage]
+        assert reopened.get(key) == Score(value=4, note="Clear")
+
+        # Refresh skips lookups but still writes.
+        refreshing = ScoreCache(Path(tmp_dir), refresh=True)
+        assert not refreshing.contains(key)
+        assert refreshing.get(key) is None
+        refreshing.put(key, Score(value=3, note="Less clear"))
+        assert reopened.get(key) == Score(value=3, note="Less clear")
+
+
+def test_score_cache_lru_eviction():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = ScoreCache(Path(tmp_dir), max_entries=10)
+        keys = [score_cache_key(f"Text {i}.", _test_metric(), "t", "m") for i in range(10)]
+        for i, key in enumerate(keys):
+            cache.put(key, Score(value=i % 6))
+            # Spread mtimes so eviction order is deterministic.
+            os.utime(cache.entry_path(key), (1_000_000 + i, 1_000_000 + i))
+
+        # Touch the oldest entry so it becomes the most recently used.
+        assert cache.get(keys[0]) is not None
+
+        # A reopened cache counts the existing entries when it first writes.
+        reopened = ScoreCache(Path(tmp_dir), max_entries=10)
+        reopened.put(score_cache_key("One more.", _test_metric(), "t", "m"), Score(value=1))
+        assert reopened.evictions == 2
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) is None
+        assert cache.get(keys[3]) is not None
@@ -2,13 +2,14 @@ from __future__ import annotations
 
 from datetime import timedelta
 
-from chopdiff.docs import TextDoc, TextUnit
 from prettyfmt import fmt_timedelta
 from rich.columns import Columns
 from rich.console import RenderableType
 from rich.panel import Panel
 from rich.text import Text
 
+from leximetry.eval.doc_analysis import DocAnalysis
+
 REPORT_WIDTH = 72
 
 WORDS_PER_PAGE = 275
@@ -25,17 +26,17 @@ def _add_stat_line(
         content.append("\n")
 
 
-def format_doc_stats(doc: TextDoc, text: str) -> RenderableType:
+def format_doc_stats(doc: DocAnalysis) -> RenderableType:
     """
-    Format document statistics in two columns using TextDoc object.
+    Format document statistics in two columns using its (memoized) analysis.
     """
-    # Calculate document statistics from doc object
-    bytes_count = len(text.encode("utf-8"))
-    lines = doc.size(TextUnit.lines)
-    paras = doc.size(TextUnit.paragraphs)
-    sents = doc.size(TextUnit.sentences)
-    words = doc.size(TextUnit.words)
-    tokens = doc.size(TextUnit.tiktokens)
+    sizes = doc.sizes
+    bytes_count = sizes.bytes
+    lines = sizes.lines
+    paras = sizes.paragraphs
+    sents = sizes.sentences
+    words = sizes.words
+    tokens = doc.tiktokens
 
     # Calculate derived statistics
     pages = max(1, round(words / WORDS_PER_PAGE))
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from pydantic_ai.usage import Usage
+
+CACHED_TOKEN_DETAILS = ("cached_tokens", "cache_read_input_tokens", "cached_content_tokens")
+"""
+Keys in pydantic_ai `Usage.details` for input tokens read from the provider's
+prompt cache (OpenAI, Anthropic, and Gemini, respectively).
+"""
+
+CACHE_WRITE_DETAILS = ("cache_creation_input_tokens",)
+"""
+Keys for input tokens written to the provider's prompt cache (Anthropic only;
+other providers cache automatically without reporting it).
+"""
+
+
+def cached_input_tokens(usage: Usage) -> int:
+    details = usage.details or {}
+    return sum(details.get(key, 0) for key in CACHED_TOKEN_DETAILS)
+
+
+@dataclass
+class UsageStats:
+    """
+    Token usage totals across LLM calls, including how many input tokens were
+    served from the provider's prompt cache.
+    """
+
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    def add(self, usage: Usage) -> None:
+        details = usage.details or {}
+        self.requests += usage.requests
+        self.input_tokens += usage.request_tokens or 0
+        self.output_tokens += usage.response_tokens or 0
+        self.cached_tokens += cached_input_tokens(usage)
+        self.cache_write_tokens += sum(details.get(key, 0) for key in CACHE_WRITE_DETAILS)
+
+    @property
+    def cached_fraction(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def summary_str(self) -> str:
+        return (
+            f"LLM usage: {self.requests} requests, {self.input_tokens:,} input tokens "
+            f"({self.cached_tokens:,} cached, {self.cached_fraction:.0%}), "
+            f"{self.output_tokens:,} output tokens"
+        )
+
+
+## Tests
+
+
+def test_usage_stats():
+    stats = UsageStats()
+    stats.add(Usage(requests=1, request_tokens=2000, response_tokens=20))
+    stats.add(
+        Usage(
+            requests=1,
+            request_tokens=2000,
+            response_tokens=30,
+            details={"cached_tokens": 1536, "reasoning_tokens": 0},
+        )
+    )
+    stats.add(
+        Usage(
+            requests=1,
+            request_tokens=2000,
+            response_tokens=10,
+            details={"cache_read_input_tokens": 1800, "cache_creation_input_tokens": 0},
+        )
+    )
+    assert (stats.requests, stats.input_tokens, stats.output_tokens) == (3, 6000, 60)
+    assert stats.cached_tokens == 3336
+    assert stats.summary_str() == (
+        "LLM usage: 3 requests, 6,000 input tokens (3,336 cached, 56%), 60 output tokens"
+    )
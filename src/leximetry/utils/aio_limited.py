@@ -1,46 +1,515 @@
 from __future__ import annotations
 
 import asyncio
-from collections.abc import Coroutine
-from typing import TypeVar, overload
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterator, Sequence
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Literal, TypeVar, overload
 
 from aiolimiter import AsyncLimiter
 
+log = logging.getLogger(__name__)
+
 T = TypeVar("T")
 
+DEFAULT_MAX_CONCURRENT = 5
+DEFAULT_MAX_RPS = 5.0
+
+MIN_RPS = 0.2
+"""Floor for the adaptive request rate."""
+
+DECREASE_COOLDOWN = 1.0
+"""
+Minimum seconds between multiplicative decreases, so a burst of errors from
+calls that were already in flight only counts as one congestion signal.
+"""
+
+LATENCY_FACTOR = 3.0
+MIN_LATENCY_INCREASE = 1.0
+"""
+Smoothed latency `LATENCY_FACTOR` times the best seen so far, and at least
+`MIN_LATENCY_INCREASE` seconds more, counts as congestion. The absolute margin
+keeps jitter on very fast calls from registering.
+"""
+
+TRANSIENT_STATUS_CODES = frozenset({408, 500, 502, 503, 504, 529})
+
+TRANSIENT_ERROR_NAMES = frozenset(
+    {"APIConnectionError", "APITimeoutError", "TransportError", "TimeoutException"}
+)
+"""
+Exception class names (matched anywhere in the MRO) for network errors from
+provider SDKs and httpx. Matched by name so we don't import any SDK here.
+"""
+
+ErrorKind = Literal["throttle", "timeout", "transient"]
+
+
+@dataclass(frozen=True)
+class RetrySettings:
+    """
+    Retry policy for calls made through a `CallLimiter`. Backoff is exponential
+    with full jitter, and never shorter than a server's `Retry-After`.
+    `timeout` bounds each attempt and `deadline` bounds a call including all
+    retries (both in seconds, or None for no limit).
+    """
+
+    max_retries: int = 4
+    initial_backoff: float = 1.0
+    max_backoff: float = 60.0
+    timeout: float | None = 180.0
+    deadline: float | None = None
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Seconds to wait before retry number `attempt` (starting at 1).
+        """
+        delay = random.uniform(0, min(self.max_backoff, self.initial_backoff * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    A call whose `RetrySettings.deadline` passed while it waited for the
+    limiter, before its next attempt could start.
+    """
+
+
+def _exception_chain(e: BaseException) -> list[BaseException]:
+    chain: list[BaseException] = []
+    current: BaseException | None = e
+    while current is not None and current not in chain:
+        chain.append(current)
+        current = current.__cause__ or current.__context__
+    return chain
+
+
+def _status_code(e: BaseException) -> int | None:
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_seconds(e: BaseException) -> float | None:
+    """
+    Seconds to wait from a `Retry-After` or `retry-after-ms` header on the
+    HTTP response behind an exception (or any exception it was raised from).
+    """
+    for error in _exception_chain(e):
+        headers: Any = getattr(getattr(error, "response", None), "headers", None)
+        if headers is None:
+            continue
+        retry_after_ms: str | None = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return max(0.0, float(retry_after_ms) / 1000)
+            except ValueError:
+                pass
+        retry_after: str | None = headers.get("retry-after")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+    return None
+
+
+def classify_error(e: BaseException) -> ErrorKind | None:
+    """
+    Classify an exception as a retryable throttle (HTTP 429), timeout, or
+    transient server or network error. Returns None if it shouldn't be retried.
+    """
+    for error in _exception_chain(e):
+        status = _status_code(error)
+        if status == 429:
+            return "throttle"
+        if isinstance(error, TimeoutError):
+            return "timeout"
+        if status in TRANSIENT_STATUS_CODES:
+            return "transient"
+        if any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__):
+            return "transient"
+    return None
+
+
+@dataclass
+class CallTiming:
+    """
+    Where a limited call spent its time before running, summed over attempts:
+    waiting for a concurrency slot (`queue_wait`) and waiting for rate and token
+    limits or a server-requested pause (`limiter_wait`).
+    """
+
+    queue_wait: float = 0.0
+    limiter_wait: float = 0.0
+    attempts: int = 0
+
+
+current_call_timing: ContextVar[CallTiming | None] = ContextVar("current_call_timing", default=None)
+"""
+Timing for the limited call the current coroutine is running in, so the call
+itself can report it (e.g. in per-call instrumentation).
+"""
+
+
+@contextmanager
+def _timed_call() -> Iterator[CallTiming]:
+    timing = CallTiming()
+    context_token = current_call_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        current_call_timing.reset(context_token)
+
+
+class TokenBucket:
+    """
+    Token bucket for a tokens-per-minute quota. Holds up to one minute of tokens
+    and refills continuously. Callers are served in arrival order, so a large
+    request isn't starved by a stream of small ones, and a request larger than
+    the whole bucket waits for a full bucket.
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity: float = tokens_per_minute
+        self.rate: float = tokens_per_minute / 60
+        self.tokens_charged: int = 0
+        self._level: float = self.capacity
+        self._updated: float = time.monotonic()
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int) -> None:
+        """
+        Wait until `tokens` are available and take them.
+        """
+        needed = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            if self._level < needed:
+                await asyncio.sleep((needed - self._level) / self.rate)
+                self._refill()
+            self._level -= needed
+            self.tokens_charged += tokens
+
+    def drain(self) -> None:
+        """
+        Empty the bucket, e.g. when the server says the quota is used up even
+        though our estimates say otherwise.
+        """
+        self._refill()
+        self._level = min(self._level, 0.0)
+
+
+class CallLimiter:
+    """
+    Concurrency and rate limits that can be shared by many `gather_limited()`
+    calls, so all calls in a process (e.g. across documents in a batch) draw on
+    one global budget. Must be used within a single event loop.
+
+    `max_concurrent` and `max_rps` are ceilings. When `adaptive`, the limiter
+    uses AIMD (additive increase, multiplicative decrease): the current
+    concurrency and rate halve on rate limit errors or timeouts, drop slightly
+    when latency climbs well above its best level, and otherwise grow back
+    toward the ceilings by about one per round of successful calls. A
+    `Retry-After` from the server pauses all new calls until it passes.
+
+    With `max_tpm`, each call is also charged its estimated token count against
+    a tokens-per-minute bucket shared by all calls.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        max_rps: float = DEFAULT_MAX_RPS,
+        retry: RetrySettings | None = None,
+        adaptive: bool = True,
+        max_tpm: int | None = None,
+    ):
+        self.max_concurrent: int = max_concurrent
+        self.max_rps: float = max_rps
+        self.max_tpm: int | None = max_tpm
+        self.retry: RetrySettings = retry or RetrySettings()
+        self.adaptive: bool = adaptive
+
+        self.concurrency: float = max_concurrent
+        self.rps: float = max_rps
+        self.in_flight: int = 0
+
+        self.throttles: int = 0
+        self.timeouts: int = 0
+        self.retries: int = 0
+
+        self._slot_waiters: deque[asyncio.Future[None]] = deque()
+        # A leaky bucket can't hold less than one call, so slow rates allow one
+        # call per period instead.
+        self._rate_limiter: AsyncLimiter = (
+            AsyncLimiter(max_rps, 1.0) if max_rps >= 1 else AsyncLimiter(1, 1 / max_rps)
+        )
+        self._token_bucket: TokenBucket | None = TokenBucket(max_tpm) if max_tpm else None
+        self._next_start: float = 0.0
+        self._paused_until: float = 0.0
+        self._last_decrease: float = float("-inf")
+        self._latency_ewma: float | None = None
+        self._latency_floor: float | None = None
+
+    @property
+    def tokens_charged(self) -> int:
+        return self._token_bucket.tokens_charged if self._token_bucket else 0
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int = 0) -> AsyncIterator[None]:
+        """
+        Wait for a concurrency slot, `tokens` from the token budget (if there is
+        a `max_tpm`), any server-requested pause, and rate limit capacity. Wait
+        times are added to the `current_call_timing`, if any.
+        """
+        start = time.monotonic()
+        await self._acquire_slot()
+        try:
+            slot_time = time.monotonic()
+            if self._token_bucket and tokens:
+                await self._token_bucket.acquire(tokens)
+            await self._pace()
+            async with self._rate_limiter:
+                timing = current_call_timing.get()
+                if timing:
+                    timing.queue_wait += slot_time - start
+                    timing.limiter_wait += time.monotonic() - slot_time
+                    timing.attempts += 1
+                yield
+        finally:
+            self.in_flight -= 1
+            self._wake_waiters()
+
+    def _has_free_slot(self) -> bool:
+        return self.in_flight < max(1, int(self.concurrency))
+
+    async def _acquire_slot(self) -> None:
+        """
+        Take a concurrency slot, waiting in FIFO order if none is free. Waiters
+        are woken one per free slot (not all at once), so a large backlog of
+        waiting calls costs O(1) per release.
+        """
+        if self._has_free_slot() and not self._slot_waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._slot_waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Woken with a slot but cancelled before running, so pass it on.
+                self.in_flight -= 1
+                self._wake_waiters()
+            raise
+
+    def _wake_waiters(self) -> None:
+        """
+        Hand free slots to waiting calls. The slot is taken on the waiter's behalf.
+        """
+        while self._slot_waiters and self._has_free_slot():
+            waiter = self._slot_waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def _pace(self) -> None:
+        """
+        Space out call starts while paused or while the adaptive rate is below
+        the ceiling. The ceiling itself is enforced by the leaky bucket.
+        """
+        now = time.monotonic()
+        start = max(now, self._paused_until)
+        if self.rps < self.max_rps:
+            start = max(start, self._next_start)
+            self._next_start = start + 1 / self.rps
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def record_success(self, latency: float) -> None:
+        if not self.adaptive:
+            return
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+        if self._latency_floor is None or self._latency_ewma < self._latency_floor:
+            self._latency_floor = self._latency_ewma
+
+        if (
+            self._latency_ewma > LATENCY_FACTOR * self._latency_floor
+            and self._latency_ewma - self._latency_floor > MIN_LATENCY_INCREASE
+        ):
+            self._decrease(0.9)
+        else:
+            self.concurrency = min(self.max_concurrent, self.concurrency + 1 / self.concurrency)
+            self.rps = min(self.max_rps, self.rps + 1 / self.rps)
+            self._wake_waiters()
+
+    def record_throttle(self, retry_after: float | None = None) -> None:
+        self.throttles += 1
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        if self._token_bucket:
+            self._token_bucket.drain()
+        self._decrease(0.5)
+
+    def record_timeout(self) -> None:
+        self.timeouts += 1
+        self._decrease(0.5)
+
+    def _decrease(self, factor: float) -> None:
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.concurrency = max(1.0, self.concurrency * factor)
+        self.rps = max(min(MIN_RPS, self.max_rps), self.rps * factor)
+
+    async def call(self, make_coro: Callable[[], Coroutine[None, None, T]], tokens: int = 0) -> T:
+        """
+        Run a call within the limits, retrying throttled, timed out, or
+        transient failures per `self.retry`. `make_coro` is called once per
+        attempt, since a coroutine can only be awaited once. Each attempt is
+        charged `tokens`.
+        """
+        with _timed_call():
+            return await self._call_with_retries(make_coro, tokens)
+
+    async def _call_with_retries(
+        self, make_coro: Callable[[], Coroutine[None, None, T]], tokens: int
+    ) -> T:
+        retry = self.retry
+        call_start = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                async with self.acquire(tokens):
+                    attempt_start = time.monotonic()
+                    timeout = retry.timeout
+                    if retry.deadline is not None:
+                        remaining = retry.deadline - (attempt_start - call_start)
+                        if remaining <= 0:
+                            raise DeadlineExceeded(
+                                f"Call deadline of {retry.deadline}s passed before attempt {attempt + 1}"
+                            )
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                    result = await asyncio.wait_for(make_coro(), timeout)
+                self.record_success(time.monotonic() - attempt_start)
+                return result
+            except Exception as e:
+                # A call that never started says nothing about the provider, so
+                # it fails fast without counting as a timeout.
+                kind = None if isinstance(e, DeadlineExceeded) else classify_error(e)
+                if kind is None:
+                    raise
+                retry_after = retry_after_seconds(e)
+                if kind == "throttle":
+                    self.record_throttle(retry_after)
+                elif kind == "timeout":
+                    self.record_timeout()
+
+                attempt += 1
+                delay = retry.backoff(attempt, retry_after)
+                elapsed = time.monotonic() - call_start
+                if attempt > retry.max_retries or (
+                    retry.deadline is not None and elapsed + delay >= retry.deadline
+                ):
+                    raise
+                self.retries += 1
+                log.warning(
+                    "Retrying after %s error (retry %s of %s, waiting %.1fs): %s",
+                    kind,
+                    attempt,
+                    retry.max_retries,
+                    delay,
+                    e,
+                )
+                await asyncio.sleep(delay)
+
+    def stats_str(self) -> str:
+        stats = (
+            f"Rate limits: {self.throttles} throttled, {self.timeouts} timed out, "
+            f"{self.retries} retries; ended at {int(self.concurrency)} concurrent, "
+            f"{self.rps:.1f} rps"
+        )
+        if self.max_tpm:
+            stats += f"; {self.tokens_charged:,} estimated tokens"
+        return stats
+
+
+CoroOrFactory = Coroutine[None, None, T] | Callable[[], Coroutine[None, None, T]]
+"""
+A coroutine, or a zero-argument function returning one. Only functions can be
+retried, since a coroutine can only be awaited once.
+"""
+
 
 @overload
 async def gather_limited(
-    *coros: Coroutine[None, None, T],
-    max_concurrent: int = 5,
-    max_rps: float = 5.0,
+    *coros: CoroOrFactory[T],
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    max_rps: float = DEFAULT_MAX_RPS,
     return_exceptions: bool = False,
+    limiter: CallLimiter | None = None,
+    tokens: Sequence[int] | None = None,
 ) -> list[T]: ...
 
 
 @overload
 async def gather_limited(
-    *coros: Coroutine[None, None, T],
-    max_concurrent: int = 5,
-    max_rps: float = 5.0,
+    *coros: CoroOrFactory[T],
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    max_rps: float = DEFAULT_MAX_RPS,
     return_exceptions: bool = True,
+    limiter: CallLimiter | None = None,
+    tokens: Sequence[int] | None = None,
 ) -> list[T | BaseException]: ...
 
 
 async def gather_limited(
-    *coros: Coroutine[None, None, T],
-    max_concurrent: int = 5,
-    max_rps: float = 5.0,
+    *coros: CoroOrFactory[T],
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    max_rps: float = DEFAULT_MAX_RPS,
     return_exceptions: bool = False,
+    limiter: CallLimiter | None = None,
+    tokens: Sequence[int] | None = None,
 ) -> list[T] | list[T | BaseException]:
     """
-    Rate-limited version of asyncio.gather(). Uses the aiolimiter leaky-bucket algorithm.
+    Rate-limited version of asyncio.gather(). Uses the aiolimiter leaky-bucket
+    algorithm, with adaptive concurrency and rate below those limits (see
+    `CallLimiter`).
 
     Args:
-        *coros: Coroutines to execute
+        *coros: Coroutines to execute, or functions returning coroutines.
+            Functions are retried on rate limit, timeout, and transient errors.
         max_concurrent: Maximum number of concurrent executions
         max_rps: Maximum requests per second
         return_exceptions: If True, exceptions are returned as results
+        limiter: Shared limiter to use instead of creating one from
+            `max_concurrent` and `max_rps`
+        tokens: Estimated token cost of each call, charged against the
+            limiter's tokens-per-minute budget (if it has one)
 
     Returns:
         List of results in the same order as input coroutines
@@ -48,14 +517,201 @@ async def gather_limited(
     if not coros:
         return []
 
-    semaphore = asyncio.Semaphore(max_concurrent)
-    rate_limiter = AsyncLimiter(max_rps, 1.0)
+    shared_limiter = limiter or CallLimiter(max_concurrent, max_rps)
+    if tokens is None:
+        tokens = [0] * len(coros)
+    elif len(tokens) != len(coros):
+        raise ValueError(f"Got {len(tokens)} token costs for {len(coros)} calls")
 
-    async def rate_limited_coro(coro: Coroutine[None, None, T]) -> T:
-        async with semaphore:
-            async with rate_limiter:
-                return await coro
+    async def rate_limited_coro(coro: CoroOrFactory[T], cost: int) -> T:
+        if isinstance(coro, Coroutine):
+            with _timed_call():
+                async with shared_limiter.acquire(cost):
+                    return await coro
+        return await shared_limiter.call(coro, cost)
 
     return await asyncio.gather(
-        *[rate_limited_coro(coro) for coro in coros], return_exceptions=return_exceptions
+        *[rate_limited_coro(coro, cost) for coro, cost in zip(coros, tokens, strict=True)],
+        return_exceptions=return_exceptions,
     )
+
+
+## Tests
+
+
+def test_shared_limiter():
+    """Concurrency is bounded across separate gather_limited() calls sharing a limiter."""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def task(i: int) -> int:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return i
+
+    async def run() -> tuple[list[int], list[int]]:
+        limiter = CallLimiter(max_concurrent=3, max_rps=1000)
+        return await asyncio.gather(
+            gather_limited(*[task(i) for i in range(5)], limiter=limiter),
+            gather_limited(*[task(i) for i in range(5, 10)], limiter=limiter),
+        )
+
+    results = asyncio.run(run())
+    assert list(results) == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+    assert max_in_flight == 3
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, headers: dict[str, str]):
+        self.status_code: int = status_code
+        self.headers: dict[str, str] = headers
+
+
+class _FakeAPIError(Exception):
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None):
+        super().__init__(f"HTTP {status_code}")
+        self.response: _FakeResponse = _FakeResponse(status_code, headers or {})
+
+
+def test_classify_error():
+    assert classify_error(_FakeAPIError(429)) == "throttle"
+    assert classify_error(_FakeAPIError(503)) == "transient"
+    assert classify_error(_FakeAPIError(400)) is None
+    assert classify_error(TimeoutError()) == "timeout"
+    assert classify_error(ValueError("bad")) is None
+
+    # Wrapped errors are classified by their cause, as with pydantic_ai's ModelHTTPError.
+    try:
+        try:
+            raise _FakeAPIError(429, {"retry-after": "7"})
+        except _FakeAPIError as e:
+            raise RuntimeError("wrapped") from e
+    except RuntimeError as wrapped:
+        assert classify_error(wrapped) == "throttle"
+        assert retry_after_seconds(wrapped) == 7.0
+
+    assert retry_after_seconds(_FakeAPIError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(_FakeAPIError(429)) is None
+
+
+def test_retry_and_backoff():
+    """Throttled calls are retried, honoring Retry-After, and the limits back off."""
+    calls = 0
+
+    async def flaky() -> str:
+        nonlocal calls
+        calls += 1
+        if calls <= 2:
+            raise _FakeAPIError(429, {"retry-after": "0.05"})
+        return "ok"
+
+    async def run() -> tuple[list[str], CallLimiter]:
+        retry = RetrySettings(max_retries=3, initial_backoff=0.01, max_backoff=0.02)
+        limiter = CallLimiter(max_concurrent=8, max_rps=1000, retry=retry)
+        return await gather_limited(flaky, limiter=limiter), limiter
+
+    start = time.monotonic()
+    results, limiter = asyncio.run(run())
+    assert results == ["ok"]
+    assert calls == 3
+    assert (limiter.throttles, limiter.retries) == (2, 2)
+    assert time.monotonic() - start >= 0.1
+    # Both throttles came within the cooldown, so the limits were halved once.
+    assert int(limiter.concurrency) == 4
+
+    async def not_retryable() -> str:
+        raise ValueError("bad request")
+
+    async def run_bad() -> list[str | BaseException]:
+        return await gather_limited(not_retryable, return_exceptions=True)
+
+    [error] = asyncio.run(run_bad())
+    assert isinstance(error, ValueError)
+
+
+def test_attempt_timeout():
+    attempts = 0
+
+    async def slow_once() -> str:
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(10 if attempts == 1 else 0)
+        return "done"
+
+    async def run() -> tuple[list[str], CallLimiter]:
+        retry = RetrySettings(max_retries=1, initial_backoff=0.01, timeout=0.05)
+        limiter = CallLimiter(max_concurrent=2, max_rps=1000, retry=retry)
+        return await gather_limited(slow_once, limiter=limiter), limiter
+
+    results, limiter = asyncio.run(run())
+    assert results == ["done"]
+    assert limiter.timeouts == 1
+
+
+def test_slow_rate():
+    """Rates below one call per second still let calls through."""
+
+    async def call() -> str:
+        return "done"
+
+    async def run() -> list[str]:
+        return await gather_limited(call, limiter=CallLimiter(max_rps=0.5))
+
+    assert asyncio.run(run()) == ["done"]
+
+
+def test_deadline_before_start():
+    """A call whose deadline passes while it waits fails without shrinking the limits."""
+
+    async def call() -> str:
+        return "done"
+
+    async def run() -> tuple[list[str | BaseException], CallLimiter]:
+        retry = RetrySettings(deadline=0.05)
+        limiter = CallLimiter(max_concurrent=4, max_rps=1000, retry=retry)
+        # Pause new calls past the deadline, as a server's Retry-After would.
+        limiter._paused_until = time.monotonic() + 0.1  # pyright: ignore[reportPrivateUsage]
+        return await gather_limited(call, limiter=limiter, return_exceptions=True), limiter
+
+    [result], limiter = asyncio.run(run())
+    assert isinstance(result, DeadlineExceeded)
+    assert (limiter.timeouts, limiter.retries, limiter.concurrency) == (0, 0, 4)
+
+
+def test_token_bucket():
+    """Calls past the token budget wait for it to refill."""
+
+    async def run() -> tuple[float, CallLimiter]:
+        # 6000 tokens per minute refills at 100 tokens per second.
+        limiter = CallLimiter(max_concurrent=8, max_rps=1000, max_tpm=6000)
+
+        async def call() -> None:
+            pass
+
+        start = time.monotonic()
+        await gather_limited(*[call for _ in range(3)], limiter=limiter, tokens=[3000, 3000, 10])
+        return time.monotonic() - start, limiter
+
+    elapsed, limiter = asyncio.run(run())
+    assert 0.05 <= elapsed < 1.0
+    assert limiter.tokens_charged == 6010
+
+
+def test_call_timing():
+    """Calls can see how long they waited for a slot and how many attempts they took."""
+
+    async def timed() -> CallTiming | None:
+        await asyncio.sleep(0.05)
+        return current_call_timing.get()
+
+    async def run() -> list[CallTiming | None]:
+        limiter = CallLimiter(max_concurrent=1, max_rps=1000, adaptive=False)
+        return await gather_limited(timed, timed(), limiter=limiter)
+
+    first, second = asyncio.run(run())
+    assert first and second and first.attempts == second.attempts == 1
+    assert first.queue_wait < 0.01 and second.queue_wait >= 0.04
+    assert current_call_timing.get() is None
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import glob
+from collections.abc import Iterable
+from pathlib import Path
+
+TEXT_SUFFIXES = frozenset({".txt", ".text", ".md", ".markdown", ".rst"})
+"""
+File suffixes picked up when walking a directory. Files named explicitly or
+matched by a glob are always included, whatever their suffix.
+"""
+
+
+def _has_glob_chars(pattern: str) -> bool:
+    return any(char in pattern for char in "*?[")
+
+
+def _is_hidden(path: Path, root: Path) -> bool:
+    return any(part.startswith(".") for part in path.relative_to(root).parts)
+
+
+def expand_input_paths(
+    inputs: Iterable[str], suffixes: frozenset[str] = TEXT_SUFFIXES
+) -> list[Path]:
+    """
+    Expand a list of files, directories, and glob patterns into a de-duplicated
+    list of files, in input order with each directory's or glob's matches sorted.
+    Directories are walked recursively for files
+    with one of the given `suffixes`, skipping hidden files and directories.
+    Raises `FileNotFoundError` if an input matches nothing, or if the inputs
+    together match no files (say, only empty directories).
+    """
+    inputs = list(inputs)
+    paths: dict[Path, None] = {}
+    for input_str in inputs:
+        path = Path(input_str).expanduser()
+        if path.is_file():
+            matches = [path]
+        elif path.is_dir():
+            matches = sorted(
+                p
+                for p in path.rglob("*")
+                if p.is_file() and p.suffix.lower() in suffixes and not _is_hidden(p, path)
+            )
+        elif _has_glob_chars(input_str):
+            matches = sorted(
+                Path(p) for p in glob.glob(str(path), recursive=True) if Path(p).is_file()
+            )
+        else:
+            raise FileNotFoundError(input_str)
+
+        if not matches and not path.is_dir():
+            raise FileNotFoundError(f"No files match: {input_str}")
+        for match in matches:
+            paths[match] = None
+
+    if not paths:
+        raise FileNotFoundError(f"No matching files in: {', '.join(inputs)}")
+    return list(paths)
+
+
+## Tests
+
+
+def test_expand_input_paths():
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        (root / "docs" / "sub").mkdir(parents=True)
+        (root / "docs" / ".hidden").mkdir()
+        (root / "docs" / "a.md").write_text("a")
+        (root / "docs" / "sub" / "b.txt").write_text("b")
+        (root / "docs" / "sub" / "c.json").write_text("{}")
+        (root / "docs" / ".hidden" / "d.md").write_text("d")
+        (root / "e.txt").write_text("e")
+
+        assert expand_input_paths([str(root / "docs")]) == [
+            root / "docs" / "a.md",
+            root / "docs" / "sub" / "b.txt",
+        ]
+        assert expand_input_paths([str(root / "**" / "*.json")]) == [
+            root / "docs" / "sub" / "c.json"
+        ]
+        # Explicit files are kept in order and de-duplicated.
+        assert expand_input_paths(
+            [str(root / "e.txt"), str(root / "docs"), str(root / "e.txt")]
+        ) == [root / "e.txt", root / "docs" / "a.md", root / "docs" / "sub" / "b.txt"]
+
+        try:
+            expand_input_paths([str(root / "missing.txt")])
+            raise AssertionError("Expected FileNotFoundError")
+        except FileNotFoundError:
+            pass
+
+        # An empty directory is fine alongside other inputs, but not alone.
+        (root / "empty").mkdir()
+        assert expand_input_paths([str(root / "empty"), str(root / "e.txt")]) == [root / "e.txt"]
+        try:
+            expand_input_paths([str(root / "empty")])
+            raise AssertionError("Expected FileNotFoundError")
+        except FileNotFoundError as e:
+            assert "No matching files" in str(e)
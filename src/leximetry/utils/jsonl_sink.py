@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import TextIO, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class JsonlSink:
+    """
+    Append-only JSONL file of pydantic records. Each record is flushed and
+    synced as soon as it's written, so a crash loses at most the record being
+    written, and a partial last line left by a crash is terminated before new
+    records are appended. With `sync=False`, records are only flushed, which is
+    much cheaper for high-volume logs like traces.
+    """
+
+    def __init__(self, path: Path, sync: bool = True):
+        self.path: Path = path
+        self.sync: bool = sync
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        needs_newline = False
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with self.path.open("rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._file: TextIO = self.path.open("a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+
+    def write(self, record: BaseModel) -> None:
+        self._file.write(record.model_dump_json() + "\n")
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> JsonlSink:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def read_jsonl_records(path: Path, record_type: type[M]) -> Iterator[M]:
+    """
+    Read records from a JSONL file, skipping blank or malformed lines (such as
+    a line truncated by a crash). Yields nothing if the file doesn't exist.
+    """
+    if not path.exists():
+        return
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield record_type.model_validate_json(line)
+            except ValidationError:
+                continue
+
+
+## Tests
+
+
+def test_jsonl_sink():
+    import tempfile
+
+    class Record(BaseModel):
+        name: str
+        value: int
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "records.jsonl"
+        with JsonlSink(path) as sink:
+            sink.write(Record(name="a", value=1))
+            sink.write(Record(name="b", value=2))
+
+        # Simulate a crash mid-write, then append more.
+        with path.open("a") as f:
+            f.write('{"name": "c", "va')
+        with JsonlSink(path) as sink:
+            sink.write(Record(name="d", value=4))
+
+        records = list(read_jsonl_records(path, Record))
+        assert [r.name for r in records] == ["a", "b", "d"]
+        assert list(read_jsonl_records(Path(tmp_dir) / "missing.jsonl", Record)) == []
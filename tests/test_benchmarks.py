@@ -0,0 +1,255 @@
+"""
+End-to-end benchmarks using the offline mock model, so no API key is needed.
+
+Skipped by default; run with `make bench`. The 10k document and 100 MB input
+benchmarks only run with LEXIMETRY_BENCH_LARGE=1 set.
+"""
+
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from leximetry.eval.doc_analysis import DocAnalysis
+from leximetry.eval.evaluate_batch import BatchRecord, evaluate_files_async
+from leximetry.eval.metrics_model import ProseMetrics
+from leximetry.eval.model_registry import get_model
+from leximetry.eval.report_output import format_complete_analysis
+from leximetry.utils.aio_limited import CallLimiter, RetrySettings, gather_limited
+
+LARGE_BENCHMARKS = bool(os.environ.get("LEXIMETRY_BENCH_LARGE"))
+
+DOC_COUNTS = [
+    1,
+    100,
+    pytest.param(10_000, marks=pytest.mark.skipif(not LARGE_BENCHMARKS, reason="slow")),
+]
+
+INPUT_MBS = [
+    1,
+    pytest.param(100, marks=pytest.mark.skipif(not LARGE_BENCHMARKS, reason="slow")),
+]
+
+
+def make_doc(i: int) -> str:
+    return (
+        f"Document {i} opens with a plain statement about its subject. "
+        "It follows with a second sentence that adds some detail and context. "
+        "A third sentence offers an opinion, which the fourth sentence supports with a reason. "
+        "Finally, the document closes by summarizing what was said and why it matters. "
+        "Along the way it touches on history, a few practical examples, and some open questions "
+        "that readers might want to explore further on their own."
+    )
+
+
+def write_corpus(root: Path, num_docs: int) -> list[Path]:
+    paths = [root / f"doc{i:05d}.txt" for i in range(num_docs)]
+    for i, path in enumerate(paths):
+        path.write_text(make_doc(i))
+    return paths
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def latency_percentiles(latencies: list[float]) -> dict[str, float]:
+    if len(latencies) < 2:
+        return {"p50": latencies[0], "p95": latencies[0], "p99": latencies[0]}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def run_batch(
+    tmp_path: Path, num_docs: int, model_name: str, limiter: CallLimiter
+) -> dict[str, Any]:
+    paths = write_corpus(tmp_path, num_docs)
+    output_path = tmp_path / f"out-{time.time_ns()}.jsonl"
+
+    start = time.perf_counter()
+    summary = asyncio.run(evaluate_files_async(paths, output_path, model_name, limiter=limiter))
+    elapsed = time.perf_counter() - start
+
+    assert summary.succeeded == num_docs
+    records = [BatchRecord.model_validate_json(line) for line in output_path.open()]
+    latencies = [record.elapsed for record in records]
+    return {
+        "docs_per_sec": round(num_docs / elapsed, 1),
+        **{key: round(value, 4) for key, value in latency_percentiles(latencies).items()},
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+@pytest.mark.parametrize("num_docs", DOC_COUNTS)
+def test_bench_batch(benchmark: Any, tmp_path: Path, num_docs: int):
+    """Throughput, per-document latency, and memory with a zero-latency model."""
+
+    def run() -> dict[str, Any]:
+        limiter = CallLimiter(max_concurrent=64, max_rps=1_000_000)
+        return run_batch(tmp_path, num_docs, "mock:latency=0,dist=fixed", limiter)
+
+    benchmark.extra_info.update(benchmark.pedantic(run, rounds=1, iterations=1))
+
+
+def test_bench_batch_throttled(benchmark: Any, tmp_path: Path):
+    """Realistic latency with injected 429s, to exercise backoff and adaptive limits."""
+
+    def run() -> dict[str, Any]:
+        retry = RetrySettings(max_retries=8, initial_backoff=0.01, max_backoff=0.1)
+        limiter = CallLimiter(max_concurrent=32, max_rps=1000, retry=retry)
+        stats = run_batch(
+            tmp_path, 20, "mock:latency=0.02,throttle_rate=0.02,retry_after=0.05", limiter
+        )
+        return {**stats, "throttles": limiter.throttles, "retries": limiter.retries}
+
+    benchmark.extra_info.update(benchmark.pedantic(run, rounds=1, iterations=1))
+
+
+def test_bench_gather_limited(benchmark: Any):
+    """Limiter overhead per call, with limits high enough never to wait."""
+
+    async def noop() -> None:
+        pass
+
+    async def run() -> None:
+        limiter = CallLimiter(max_concurrent=1000, max_rps=1_000_000)
+        await gather_limited(*[noop for _ in range(1000)], limiter=limiter)
+
+    benchmark.pedantic(lambda: asyncio.run(run()), rounds=5, iterations=1)
+
+
+def test_bench_report(benchmark: Any):
+    """Analyzing one document and rendering its console report."""
+    from pydantic_ai import Agent
+
+    text = "\n\n".join(make_doc(i) for i in range(20))
+    metrics = Agent(get_model("mock:latency=0"), output_type=ProseMetrics).run_sync(text).output
+
+    # A fresh analysis each round, as memoized sizes would hide the parsing cost.
+    benchmark(lambda: format_complete_analysis(metrics, DocAnalysis(text)))
+
+
+LARGE_INPUT_SCRIPT = """
+import json, resource, sys, time
+from pathlib import Path
+
+from chopdiff.docs import TextUnit
+
+from leximetry.eval.chunking import ChunkSettings
+from leximetry.eval.doc_analysis import DocAnalysis
+from leximetry.eval.evaluate_text import evaluate_text
+from leximetry.eval.preflight import read_text_file
+from leximetry.utils.aio_limited import CallLimiter
+
+start = time.perf_counter()
+doc = DocAnalysis(read_text_file(Path(sys.argv[1])))
+sizes = doc.sizes
+evaluate_text(
+    doc,
+    "mock:latency=0",
+    limiter=CallLimiter(max_concurrent=64, max_rps=1_000_000),
+    chunk_settings=ChunkSettings(max_size=6000, unit=TextUnit.words),
+)
+print(json.dumps({
+    "elapsed": round(time.perf_counter() - start, 1),
+    "words": sizes.words,
+    "peak_rss_mb": round(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        1,
+    ),
+}))
+"""
+"""
+Reads, sizes, and evaluates one large file in chunks (in words, so no
+tokenizer download is needed), then reports its own peak RSS.
+"""
+
+
+def write_large_doc(path: Path, size_mb: int, newline: str = "\n") -> None:
+    target = size_mb * 1024 * 1024
+    written = 0
+    with path.open("w", newline=newline) as f:
+        i = 0
+        while written < target:
+            para = make_doc(i) + "\n\n"
+            f.write(para)
+            written += len(para)
+            i += 1
+
+
+@pytest.mark.parametrize("input_mb", INPUT_MBS)
+def test_bench_large_input(benchmark: Any, tmp_path: Path, input_mb: int):
+    """Peak memory for one large input, in a fresh process so other tests don't count."""
+    path = tmp_path / "large.md"
+    write_large_doc(path, input_mb)
+
+    def run() -> dict[str, Any]:
+        result = subprocess.run(
+            [sys.executable, "-c", LARGE_INPUT_SCRIPT, str(path)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return {"input_mb": input_mb, **json.loads(result.stdout.splitlines()[-1])}
+
+    stats = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info.update(stats)
+    assert stats["words"] > 0
+
+
+READ_SCRIPT = """
+import resource, sys
+from pathlib import Path
+
+from leximetry.eval.preflight import read_text_file
+
+path = Path(sys.argv[2])
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+text = read_text_file(path) if sys.argv[1] == "read_text_file" else path.read_text()
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(round((after - before) / (1024 * 1024 if sys.platform == "darwin" else 1024), 1))
+"""
+"""
+Reads one file with `read_text_file()` or `Path.read_text()` and reports how
+much the read grew peak RSS.
+"""
+
+
+@pytest.mark.parametrize("input_mb", INPUT_MBS)
+def test_bench_read_large(benchmark: Any, tmp_path: Path, input_mb: int):
+    """Peak memory of reading a large CRLF file, against `Path.read_text()`."""
+    path = tmp_path / "large.md"
+    # Written in blocks, since a child process starts with its parent's peak RSS.
+    write_large_doc(path, input_mb, newline="\r\n")
+
+    def peak_rss_growth(reader: str) -> float:
+        result = subprocess.run(
+            [sys.executable, "-c", READ_SCRIPT, reader, str(path)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return float(result.stdout.splitlines()[-1])
+
+    def run() -> dict[str, Any]:
+        return {
+            "input_mb": input_mb,
+            "read_text_file_rss_mb": peak_rss_growth("read_text_file"),
+            "read_text_rss_mb": peak_rss_growth("read_text"),
+        }
+
+    stats = benchmark.pedantic(run, rounds=1, iterations=1)
+    benchmark.extra_info.update(stats)
+    if input_mb >= 100:
+        assert stats["read_text_file_rss_mb"] < stats["read_text_rss_mb"]
@@ -0,0 +1,59 @@
+"""
+Guard CLI cold-start time: `leximetry --help` shouldn't load the evaluation
+stack, provider SDKs, tokenizers, or report rendering.
+"""
+
+import subprocess
+import sys
+
+HELP_IMPORT_BUDGET_MS = 500
+"""
+Total import time for `--help`. It's around 200ms on a typical laptop (most of
+it argparse formatting with rich), versus over 1s with eager imports.
+"""
+
+HEAVY_MODULES = [
+    "pydantic_ai",
+    "openai",
+    "anthropic",
+    "google.genai",
+    "tiktoken",
+    "chopdiff",
+    "leximetry.eval.evaluate_text",
+    "leximetry.eval.report_output",
+]
+
+
+def import_times(*args: str) -> dict[str, int]:
+    """
+    Self import time in microseconds of each module imported by running the CLI.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "leximetry.cli.cli_main", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative_us, module = line.removeprefix("import time:").split("|")
+        times[module.strip()] = int(self_us)
+    return times
+
+
+def test_help_import_time():
+    times = import_times("--help")
+
+    loaded = [
+        heavy
+        for heavy in HEAVY_MODULES
+        if any(module == heavy or module.startswith(heavy + ".") for module in times)
+    ]
+    assert not loaded, f"`--help` imported heavy modules: {loaded}"
+
+    total_ms = sum(times.values()) / 1000
+    assert total_ms < HELP_IMPORT_BUDGET_MS, (
+        f"`--help` imports took {total_ms:.0f}ms, over the {HELP_IMPORT_BUDGET_MS}ms budget"
+    )